@@ -0,0 +1,77 @@
+"""
+Compare the JSON array exporter with the Parquet exporter: file size,
+write time and load time for a batch of synthetic normalized records.
+
+    python benchmarks/bench_columnar.py --records 100000
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT / "src"))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from corpus import synthetic_records  # noqa: E402
+from pipelines.columnar import write_parquet  # noqa: E402
+from pipelines.exporters import write_json_array  # noqa: E402
+
+def _timed(fn):
+    started = time.perf_counter()
+    result = fn()
+    return result, time.perf_counter() - started
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    ap.add_argument("--records", type=int, default=50_000)
+    ap.add_argument("--row-group-size", type=int, default=10_000)
+    ap.add_argument("--json-out", default=None, help="Optional path to save results as JSON")
+    args = ap.parse_args(argv)
+
+    import pyarrow.parquet as pq
+
+    records = list(synthetic_records(args.records))
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        json_path = os.path.join(tmp, "records.json")
+        pq_path = os.path.join(tmp, "records.parquet")
+
+        _, write_json_s = _timed(lambda: write_json_array(records, json_path))
+        _, write_pq_s = _timed(lambda: write_parquet(records, pq_path, row_group_size=args.row_group_size))
+
+        def load_json():
+            with open(json_path, encoding="utf-8") as f:
+                return json.load(f)
+
+        _, load_json_s = _timed(load_json)
+        _, load_pq_s = _timed(lambda: pq.read_table(pq_path))
+        _, load_pq_cols_s = _timed(lambda: pq.read_table(pq_path, columns=["priceValue", "latitudeValue", "longitudeValue"]))
+
+        results = {
+            "records": args.records,
+            "json": {"bytes": os.path.getsize(json_path), "writeSeconds": write_json_s, "loadSeconds": load_json_s},
+            "parquet": {
+                "bytes": os.path.getsize(pq_path),
+                "writeSeconds": write_pq_s,
+                "loadSeconds": load_pq_s,
+                "loadNumericColumnsSeconds": load_pq_cols_s,
+            },
+        }
+
+    print(f"{'format':<10} {'MB':>8} {'write s':>9} {'load s':>9}")
+    for fmt in ("json", "parquet"):
+        r = results[fmt]
+        print(f"{fmt:<10} {r['bytes'] / 1e6:>8.2f} {r['writeSeconds']:>9.3f} {r['loadSeconds']:>9.3f}")
+    print(f"parquet numeric columns only: {results['parquet']['loadNumericColumnsSeconds']:.3f}s")
+    if args.json_out:
+        with open(args.json_out, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+"""
+Near-duplicate index: SimHash cost per post and lookup latency as the
+index grows.
+
+    python benchmarks/bench_dedup.py --posts 1000000
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT / "src"))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from corpus import _words  # noqa: E402
+from pipelines.dedup import DedupIndex, simhash  # noqa: E402
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    ap.add_argument("--posts", type=int, default=200_000, help="Signatures stored before timing lookups")
+    ap.add_argument("--lookups", type=int, default=5_000)
+    ap.add_argument("--json-out", default=None, help="Optional path to save results as JSON")
+    args = ap.parse_args(argv)
+
+    rnd = random.Random(3)
+    bodies = [_words(rnd, rnd.randint(80, 300)) for _ in range(200)]
+    started = time.perf_counter()
+    sigs = [simhash(body) for body in bodies]
+    simhash_ms = (time.perf_counter() - started) / len(bodies) * 1e3
+
+    with tempfile.TemporaryDirectory() as tmp:
+        index = DedupIndex(os.path.join(tmp, "dedup.sqlite3"), commit_every=50_000)
+        started = time.perf_counter()
+        for i in range(args.posts):
+            index.add(str(i), rnd.getrandbits(64))
+        for i, sig in enumerate(sigs):
+            index.add(f"ad{i}", sig)
+        index.flush()
+        add_us = (time.perf_counter() - started) / (args.posts + len(sigs)) * 1e6
+
+        latencies = []
+        for k in range(args.lookups):
+            probe = sigs[k % len(sigs)] ^ (1 << rnd.randrange(64))  # a one-bit edit of a stored ad
+            t = time.perf_counter()
+            assert index.find(probe) is not None
+            latencies.append((time.perf_counter() - t) * 1e6)
+        size_mb = os.path.getsize(index.path) / 1e6
+        index.close()
+
+    latencies.sort()
+    results = {
+        "posts": args.posts,
+        "simhashMs": simhash_ms,
+        "addMicros": add_us,
+        "lookupMedianMicros": statistics.median(latencies),
+        "lookupP99Micros": latencies[int(len(latencies) * 0.99)],
+        "indexMB": size_mb,
+    }
+    print(f"simhash: {simhash_ms:.2f} ms/post, add: {add_us:.0f} us/post, index {size_mb:.0f} MB")
+    print(f"lookup over {args.posts} posts: median {results['lookupMedianMicros']:.0f} us, "
+          f"p99 {results['lookupP99Micros']:.0f} us")
+    if args.json_out:
+        with open(args.json_out, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+
+if __name__ == "__main__":
+    main()
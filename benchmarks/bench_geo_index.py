@@ -0,0 +1,79 @@
+"""
+Geo index: build time, open time and query latency against a brute-force
+scan over the same points.
+
+    python benchmarks/bench_geo_index.py --points 1000000
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT / "src"))
+
+from pipelines.geo_index import GeoIndex, GeoIndexBuilder, haversine_km  # noqa: E402
+
+def _best_ms(fn, repeat=20):
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - started)
+    return result, best * 1e3
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    ap.add_argument("--points", type=int, default=1_000_000)
+    ap.add_argument("--cell-deg", type=float, default=0.01)
+    ap.add_argument("--json-out", default=None, help="Optional path to save results as JSON")
+    args = ap.parse_args(argv)
+
+    rnd = random.Random(5)
+    # A metro-sized area, so cells are dense
+    points = [(str(7_000_000_000 + i), 40.5 + rnd.random() * 0.5, -74.2 + rnd.random() * 0.5) for i in range(args.points)]
+    center, radius, box = (40.75, -73.98), 1.0, (40.70, -74.00, 40.72, -73.98)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "posts.geoidx")
+        started = time.perf_counter()
+        with GeoIndexBuilder(path, cell_deg=args.cell_deg) as builder:
+            for pid, lat, lon in points:
+                builder.add({"id": pid, "latitude": lat, "longitude": lon})
+        build_s = time.perf_counter() - started
+
+        started = time.perf_counter()
+        index = GeoIndex(path)
+        open_ms = (time.perf_counter() - started) * 1e3
+        hits, radius_ms = _best_ms(lambda: index.within(*center, radius))
+        ids, bbox_ms = _best_ms(lambda: index.bbox(*box))
+        _, cells_ms = _best_ms(lambda: index.cell_counts(40.6, -74.1, 40.9, -73.8))
+        index.close()
+
+    _, brute_ms = _best_ms(lambda: [p for p, la, lo in points if haversine_km(*center, la, lo) <= radius], repeat=1)
+    results = {
+        "points": args.points,
+        "buildSeconds": build_s,
+        "openMs": open_ms,
+        "radiusMs": radius_ms,
+        "radiusHits": len(hits),
+        "bboxMs": bbox_ms,
+        "bboxHits": len(ids),
+        "cellCountsMs": cells_ms,
+        "bruteForceRadiusMs": brute_ms,
+    }
+    print(f"{args.points} points: build {build_s:.1f}s, open {open_ms:.2f} ms")
+    print(f"within {radius} km: {radius_ms:.2f} ms ({len(hits)} hits); brute force {brute_ms:.0f} ms")
+    print(f"bbox: {bbox_ms:.2f} ms ({len(ids)} hits); cell counts over 0.3x0.3 deg: {cells_ms:.2f} ms")
+    if args.json_out:
+        with open(args.json_out, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+
+if __name__ == "__main__":
+    main()
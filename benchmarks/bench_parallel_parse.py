@@ -0,0 +1,88 @@
+"""
+Post-page parsing throughput on a process pool, by worker count: bare
+`ParallelParser`, and the detail stage of `CrawlPipeline` over an in-memory
+site (parsed on its threads, then on the pool one page or a batch per task).
+
+    python benchmarks/bench_parallel_parse.py --pages 400 --workers 1 2 4 8 16
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT / "src"))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from corpus import list_page, post_page, post_url  # noqa: E402
+from extractors.backends import parse_list_html  # noqa: E402
+from pipelines.crawl import CrawlPipeline  # noqa: E402
+from pipelines.parallel_parse import ParallelParser, parse_batch  # noqa: E402
+
+def _site(pages: int):
+    """In-memory search pages and the post pages their rows link to (120 rows per search page)."""
+    site = {}
+    for i in range((pages + 119) // 120):
+        url = f"https://example.org/search/apa?s={i * 120}"
+        site[url] = list_page(seed=i)
+        for row in parse_list_html(site[url], source_url=url)[: pages - i * 120]:
+            site.setdefault(row["url"], post_page(seed=len(site), paragraphs=10, images=16))
+    return site
+
+def _crawl(site, pool, batch_size: int, detail_workers: int = 8) -> float:
+    pipeline = CrawlPipeline(site.get, detail_workers=detail_workers, parse_executor=pool, parse_batch_size=batch_size)
+    started = time.perf_counter()
+    count = sum(1 for _ in pipeline.run([url for url in site if "/search/" in url]))
+    elapsed = time.perf_counter() - started
+    return count / elapsed
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    ap.add_argument("--pages", type=int, default=400)
+    ap.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4, os.cpu_count() or 1])
+    ap.add_argument("--batch-size", type=int, default=16)
+    ap.add_argument("--backend", default="bs4")
+    ap.add_argument("--json-out", default=None, help="Optional path to save results as JSON")
+    args = ap.parse_args(argv)
+    results = {"pages": args.pages, "batchSize": args.batch_size, "cpus": os.cpu_count(), "parser": {}, "crawl": {}}
+
+    pages = [(post_url(i), post_page(seed=i, paragraphs=10, images=16).encode("utf-8")) for i in range(args.pages)]
+
+    started = time.perf_counter()
+    expected = parse_batch("post", args.backend, pages)
+    serial = time.perf_counter() - started
+    results["parser"]["serial"] = args.pages / serial
+    print(f"{'serial':<10} {args.pages / serial:>10.1f} pages/s")
+
+    for workers in args.workers:
+        with ParallelParser(workers=workers, batch_size=args.batch_size, backend=args.backend) as parser:
+            list(parser.parse(pages[: workers * args.batch_size]))  # warm up the pool
+            started = time.perf_counter()
+            records = list(parser.parse(pages))
+            elapsed = time.perf_counter() - started
+        assert records == expected, "parallel output differs from serial output"
+        results["parser"][workers] = args.pages / elapsed
+        print(f"{workers:<10} {args.pages / elapsed:>10.1f} pages/s  speedup x{serial / elapsed:.2f}")
+
+    site = _site(args.pages)
+    threads = _crawl(site, None, args.batch_size)
+    results["crawl"]["threads"] = threads
+    print(f"\ncrawl, parsed on threads {threads:>10.1f} pages/s")
+    for workers in args.workers:
+        with ProcessPoolExecutor(workers) as pool:
+            list(pool.map(abs, range(workers)))  # start the workers
+            row = {size: _crawl(site, pool, size) for size in (1, args.batch_size)}
+        results["crawl"][workers] = row
+        print(f"crawl, {workers:<2} process(es)  batch 1 {row[1]:>8.1f} pages/s  "
+              f"batch {args.batch_size} {row[args.batch_size]:>8.1f} pages/s  speedup x{row[args.batch_size] / threads:.2f}")
+    if args.json_out:
+        with open(args.json_out, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,116 @@
+"""
+Per-record memory and normalize time: parsed dicts through `normalize_record`
+versus compact `Record`s normalized in place.
+
+    python benchmarks/bench_records.py --records 1000000
+"""
+from __future__ import annotations
+
+import argparse
+import gc
+import json
+import pickle
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT / "src"))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from corpus import post_page, post_url  # noqa: E402
+from extractors.backends import parse_post_html  # noqa: E402
+from pipelines.normalizers import normalize_record  # noqa: E402
+from pipelines.records import Record  # noqa: E402
+
+CATEGORY = "housing"
+
+def _fresh(s: str) -> str:
+    # A new string object, as each parsed page yields its own
+    return (s + ".")[:-1]
+
+def parsed_records(n: int, templates: int = 50):
+    """Parser output for `n` posts: corpus pages parsed once, then varied per post."""
+    base = [parse_post_html(post_page(seed), source_url=post_url(seed), backend="lxml") for seed in range(templates)]
+    for i in range(n):
+        rec = dict(base[i % templates])
+        pid = str(7_600_000_000 + i)
+        rec["id"], rec["url"] = pid, post_url(i)
+        for key in ("title", "post", "location", "price", "datetime", "latitude", "longitude"):
+            if key in rec:
+                rec[key] = _fresh(rec[key])
+        rec["pics"] = [_fresh(p) for p in rec.get("pics", [])]
+        rec["attributes"] = [_fresh(a) for a in rec.get("attributes", [])]
+        rec["category"] = _fresh(CATEGORY)
+        yield rec
+
+def _held(build) -> int:
+    """Bytes still allocated, values included, once `build()`'s records are built (held, as in a queue or batch)."""
+    gc.collect()
+    tracemalloc.start()
+    held = build()
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del held
+    return size
+
+def _timed(fn, repeat: int = 3) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - started)
+    return best
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    ap.add_argument("--records", type=int, default=100_000)
+    ap.add_argument("--json-out", default=None, help="Optional path to save results as JSON")
+    args = ap.parse_args(argv)
+    n = args.records
+
+    dict_bytes = _held(lambda: [normalize_record(rec) for rec in parsed_records(n)])
+    record_bytes = _held(lambda: [Record(rec).normalize() for rec in parsed_records(n)])
+    raw = list(parsed_records(n))
+
+    dict_s = _timed(lambda: [normalize_record(rec) for rec in raw])
+    build_s = _timed(lambda: [Record(rec) for rec in raw])
+    compact = [Record(rec) for rec in raw]
+    normalize_s = _timed(lambda: [rec.normalize() for rec in compact])
+    to_dict_s = _timed(lambda: [rec.to_dict() for rec in compact])
+    # Parser output to an NDJSON line, as the crawl pipeline and writer do it
+    dict_line_s = _timed(lambda: [json.dumps(normalize_record(rec), ensure_ascii=False) for rec in raw])
+    record_line_s = _timed(lambda: [json.dumps(Record(rec).normalize().to_dict(), ensure_ascii=False) for rec in raw])
+
+    normalized = [normalize_record(rec) for rec in raw[:1000]]
+    dict_pickle = len(pickle.dumps(normalized, protocol=pickle.HIGHEST_PROTOCOL)) / len(normalized)
+    record_pickle = len(pickle.dumps(compact[:1000], protocol=pickle.HIGHEST_PROTOCOL)) / len(normalized)
+
+    results = {
+        "records": n,
+        "fieldsPerRecord": sum(map(len, normalized)) / len(normalized),
+        "heldBytesPerRecord": {"dict": dict_bytes / n, "record": record_bytes / n},
+        "usPerRecord": {
+            "normalizeRecord": dict_s / n * 1e6,
+            "recordFromDict": build_s / n * 1e6,
+            "recordNormalize": normalize_s / n * 1e6,
+            "recordToDict": to_dict_s / n * 1e6,
+            "dictToLine": dict_line_s / n * 1e6,
+            "recordToLine": record_line_s / n * 1e6,
+        },
+        "pickleBytesPerRecord": {"dict": dict_pickle, "record": record_pickle},
+    }
+    held, us = results["heldBytesPerRecord"], results["usPerRecord"]
+    print(f"{n} records, {results['fieldsPerRecord']:.1f} fields each")
+    print(f"held per normalized record: dict {held['dict']:.0f} B, Record {held['record']:.0f} B")
+    print(f"normalize: normalize_record {us['normalizeRecord']:.2f} us, Record.normalize {us['recordNormalize']:.2f} us "
+          f"(+ from_dict {us['recordFromDict']:.2f} us, to_dict at export {us['recordToDict']:.2f} us)")
+    print(f"parsed -> NDJSON line: dict {us['dictToLine']:.2f} us, Record {us['recordToLine']:.2f} us")
+    print(f"pickled: dict {dict_pickle:.0f} B, Record {record_pickle:.0f} B")
+    if args.json_out:
+        with open(args.json_out, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+
+if __name__ == "__main__":
+    main()
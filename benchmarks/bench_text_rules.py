@@ -0,0 +1,84 @@
+"""
+Time the post-body heuristics (phones, compensation, employment type) as
+separate regex passes versus the single-pass scan in `text_rules`.
+
+    python benchmarks/bench_text_rules.py --bodies 2000 --paragraphs 40
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import random
+import re
+import sys
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT / "src"))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from corpus import _phone, _words  # noqa: E402
+from extractors.geo_utils import find_phone_numbers  # noqa: E402
+from extractors.text_rules import scan_post_body  # noqa: E402
+
+def post_body(seed: int, paragraphs: int) -> str:
+    rnd = random.Random(seed)
+    return "\n".join(
+        _words(rnd, rnd.randint(20, 60))
+        + (f" Pay: ${rnd.randint(15, 40)}/hr" if k == 1 else "")
+        + (f" call {_phone(rnd)}" if k % 3 == 2 else "")
+        + (" full-time" if k == 4 else "")
+        for k in range(paragraphs)
+    )
+
+def separate_rules(body: str) -> dict:
+    """The rules as `build_post_record` applied them before the single pass."""
+    phones = find_phone_numbers(body)
+    lowered = body.lower()
+    comp = re.search(r"(?:compensation|pay|salary)\s*[:\-]\s*([^\n\r]+)", body, flags=re.I)
+    return {
+        "phones": phones,
+        "compensation": comp.group(1) if comp else None,
+        "fullTime": "full-time" in lowered,
+        "partTime": "part-time" in lowered,
+    }
+
+def _timed(fn, bodies, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        for body in bodies:
+            fn(body)
+        best = min(best, time.perf_counter() - started)
+    return best
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    ap.add_argument("--bodies", type=int, default=1000)
+    ap.add_argument("--paragraphs", type=int, default=40)
+    ap.add_argument("--repeat", type=int, default=5)
+    ap.add_argument("--json-out", default=None, help="Optional path to save results as JSON")
+    args = ap.parse_args(argv)
+
+    bodies = [post_body(seed, args.paragraphs) for seed in range(args.bodies)]
+    for body in bodies[:50]:
+        a, b = separate_rules(body), scan_post_body(body)
+        assert sorted(a.pop("phones")) == sorted(b.pop("phones")) and a == b
+
+    results = {
+        "bodies": args.bodies,
+        "avgBodyChars": sum(map(len, bodies)) // len(bodies),
+        "separateSeconds": _timed(separate_rules, bodies, args.repeat),
+        "singlePassSeconds": _timed(scan_post_body, bodies, args.repeat),
+    }
+    per = 1e6 / args.bodies
+    print(f"{args.bodies} bodies, ~{results['avgBodyChars']} chars each")
+    print(f"separate rules: {results['separateSeconds'] * per:8.1f} us/body")
+    print(f"single pass:    {results['singlePassSeconds'] * per:8.1f} us/body")
+    if args.json_out:
+        with open(args.json_out, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,141 @@
+"""
+Deterministic synthetic Craigslist pages and records for benchmarks and fixtures.
+
+Pages mimic the markup the parsers target: classic `.result-row` and modern
+`li.cl-search-result` list pages with 120 rows, and post pages with
+attrgroups, image galleries, page chrome and an embedded map script.
+"""
+from __future__ import annotations
+
+import html
+import random
+from typing import Dict, Iterator, List
+
+from pipelines.normalizers import normalize_record
+
+HOODS = ["Astoria", "Upper East Side", "Queens", "Mission District", "Back Bay", "Bushwick", "SoMa"]
+CATEGORIES = ["jobs", "housing", "gigs", "for sale", "services"]
+WORDS = (
+    "deli grill experience required sandwiches breakfast salads flexible slicer clean organize "
+    "equipment sunny spacious quiet renovated studio furnished laundry parking dishwasher doorman "
+    "weekend movers truck hourly bonus benefits manager shift nights downtown subway walk-in"
+).split()
+ATTRS = [
+    "furnished", "w/d in unit", "air conditioning", "off-street parking", "apartment", "private bath",
+    "condition: like new", "make / manufacturer: Honda", "employment type: part-time",
+    "compensation: $25/hr", "available on: jun 1", "cats are OK - purrr", "no smoking",
+]
+
+def _words(rnd: random.Random, n: int) -> str:
+    return " ".join(rnd.choice(WORDS) for _ in range(n))
+
+def _phone(rnd: random.Random) -> str:
+    return f"{rnd.randint(201, 989)}-{rnd.randint(200, 999)}-{rnd.randint(1000, 9999)}"
+
+def list_page(seed: int = 0, rows: int = 120, modern: bool = False) -> str:
+    """One search results page; `modern` switches to the `li.cl-search-result` layout."""
+    rnd = random.Random(seed)
+    out: List[str] = ["<!DOCTYPE html><html><head><title>craigslist: search</title>"]
+    out.append("<script>var pagetype = 'search';</script></head><body>")
+    out.append('<header class="global-header"><a href="/">CL</a> <nav>' + "".join(
+        f'<a href="/search/{c}">{c}</a>' for c in ("sss", "jjj", "hhh", "ggg")) + "</nav></header>")
+    out.append('<ol class="cl-static-search-results">' if modern else '<ul class="rows">')
+    for i in range(rows):
+        pid = 7_500_000_000 + seed * 1000 + i
+        url = f"https://newyork.craigslist.org/que/apa/{pid}.html"
+        title = html.escape(f"{_words(rnd, rnd.randint(3, 9))} #{i}")
+        price = f"${rnd.randint(15, 5000)}"
+        hood = rnd.choice(HOODS)
+        snippet = f"{_words(rnd, 12)} call {_phone(rnd)}" if rnd.random() < 0.3 else _words(rnd, 12)
+        if modern:
+            out.append(
+                f'<li class="cl-search-result cl-search-view-mode-list" data-pid="{pid}">'
+                f'<a class="cl-app-anchor text-only posting-title" href="{url}"><span class="label">{title}</span></a>'
+                f'<div class="meta"><time class="result-date" datetime="2024-03-0{i % 9 + 1}T09:30:00-0500">Mar {i % 9 + 1}</time>'
+                f'<span class="nearby">({hood})</span></div><span class="priceinfo price">{price}</span>'
+                f'<p class="snippet">{snippet}</p></li>'
+            )
+        else:
+            out.append(
+                f'<li class="result-row" data-pid="{pid}"><a href="{url}" class="result-image gallery"></a>'
+                f'<div class="result-info"><time class="result-date" datetime="2024-03-0{i % 9 + 1} 09:30">Mar {i % 9 + 1}</time>'
+                f'<h3 class="result-heading"><a href="{url}" class="result-title hdrlnk">{title}</a></h3>'
+                f'<span class="result-meta"><span class="result-price">{price}</span>'
+                f'<span class="result-hood"> ({hood})</span></span>'
+                f'<p class="result-description">{snippet}</p></div></li>'
+            )
+    out.append("</ol>" if modern else "</ul>")
+    out.append('<footer class="global-footer">' + "".join(f'<a href="/about/{k}">link {k}</a>' for k in range(40)) + "</footer>")
+    out.append("</body></html>")
+    return "".join(out)
+
+def post_page(seed: int = 0, paragraphs: int = 6, images: int = 12, map_in_script: bool = False) -> str:
+    """One post page; size grows with `paragraphs` and `images`."""
+    rnd = random.Random(seed)
+    pid = 7_600_000_000 + seed
+    lat, lon = 40.5 + rnd.random(), -74.2 + rnd.random()
+    title = html.escape(f"**{_words(rnd, 5)}** ({rnd.choice(HOODS)})")
+    body = "".join(
+        f"<br>\n{_words(rnd, rnd.randint(20, 60))}" + (f" Pay: ${rnd.randint(15, 40)}/hr" if k == 1 else "")
+        + (f" call {_phone(rnd)}" if k % 3 == 2 else "")
+        + (" full-time" if k == 4 else "")
+        for k in range(paragraphs)
+    )
+    attrs = "".join(f"<span><b>{html.escape(a)}</b></span><br>" for a in rnd.sample(ATTRS, k=min(len(ATTRS), 8)))
+    gallery = "".join(
+        f'<a href="https://images.craigslist.org/{pid}_{k}_600x450.jpg"><img src="https://images.craigslist.org/{pid}_{k}_50x50c.jpg"></a>'
+        for k in range(images)
+    )
+    chrome_imgs = "".join(f'<img src="/static/www/icon-{k}.png" alt="">' for k in range(20))
+    map_div = (
+        f'<div id="map" class="viewposting" data-latitude="{lat:.6f}" data-longitude="{lon:.6f}" data-accuracy="{rnd.randint(1, 30)}"></div>'
+        if not map_in_script else ""
+    )
+    scripts = "".join(
+        f"<script>var tracker{k} = {{\"id\": {k}, \"events\": [{', '.join(str(x) for x in range(30))}]}};</script>"
+        for k in range(8)
+    )
+    if map_in_script:
+        scripts += f'<script>var postingMap = {{"latitude": "{lat:.6f}", "longitude": {lon:.6f}, "accuracy": 22}};</script>'
+    return (
+        "<!DOCTYPE html><html><head>"
+        f'<meta property="og:updated_time" content="2024-02-10T10:30:00-0500"><title>{title}</title>{scripts}</head><body>'
+        f'<header class="global-header">{chrome_imgs}</header>'
+        f'<section class="page-container"><section class="body">'
+        f'<h1 class="postingtitle"><span class="postingtitletext"><span id="titletextonly">{title}</span>'
+        f' <span class="price">${rnd.randint(15, 5000)}</span><small> ({rnd.choice(HOODS)})</small></span></h1>'
+        f'<section class="userbody"><figure class="iw multiimage"><div class="gallery">{gallery}</div></figure>'
+        f'<div class="mapAndAttrs"><div class="mapbox">{map_div}<p class="mapaddress">{rnd.choice(HOODS)}</p></div>'
+        f'<p class="attrgroup">{attrs}</p></div>'
+        f'<section id="postingbody"><div class="print-information print-qrcode-container">'
+        f'<p class="print-qrcode-label">QR Code Link to This Post</p></div>{body}</section>'
+        f'<ul class="notices"><li>do NOT contact me with unsolicited services or offers</li></ul>'
+        f'<div class="postinginfos"><p class="postinginfo">post id: {pid}</p>'
+        f'<p class="postinginfo reveal">posted: <time class="date timeago" datetime="2024-02-0{seed % 9 + 1}T10:30:00-0500">x</time></p></div>'
+        f'</section></section></section><footer>{_words(rnd, 80)}</footer></body></html>'
+    )
+
+def post_url(seed: int) -> str:
+    return f"https://newyork.craigslist.org/que/apa/{7_600_000_000 + seed}.html"
+
+def synthetic_records(n: int, seed: int = 7) -> Iterator[Dict]:
+    """Normalized records shaped like the README example."""
+    rnd = random.Random(seed)
+    for i in range(n):
+        pid = str(7_500_000_000 + i)
+        yield normalize_record({
+            "id": pid,
+            "url": f"https://newyork.craigslist.org/que/apa/{pid}.html",
+            "title": f"Listing {i} {_words(rnd, 4)}",
+            "datetime": f"2024-0{rnd.randint(1, 9)}-1{rnd.randint(0, 9)}T11:13:56-0400",
+            "location": rnd.choice(HOODS),
+            "category": rnd.choice(CATEGORIES),
+            "price": f"${rnd.randint(15, 5000)}",
+            "latitude": f"{40.5 + rnd.random():.6f}",
+            "longitude": f"{-74.2 + rnd.random():.6f}",
+            "mapAccuracy": str(rnd.randint(1, 30)),
+            "post": _words(rnd, 60),
+            "phoneNumbers": [_phone(rnd)],
+            "pics": [f"https://images.craigslist.org/{pid}_{k}.jpg" for k in range(rnd.randint(0, 8))],
+            "attributes": ["furnished", "w/d in unit"][: rnd.randint(0, 2)],
+        })
@@ -0,0 +1,188 @@
+"""
+Parser / normalizer / exporter benchmark suite over a synthetic page corpus.
+
+    python benchmarks/run_benchmarks.py                    # save results/<commit>.json
+    python benchmarks/run_benchmarks.py --compare results/abc1234.json
+    python benchmarks/run_benchmarks.py --write-fixtures   # refresh tests/fixtures/sample_pages
+
+Each case reports throughput (pages/s or records/s) and the tracemalloc peak
+of a single pass, so regressions can be compared across commits.
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+from typing import Callable, Dict, List
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT / "src"))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from bs4 import BeautifulSoup  # noqa: E402
+
+from corpus import list_page, post_page, post_url, synthetic_records  # noqa: E402
+from extractors.backends import BACKENDS, parse_list_html, parse_post_html  # noqa: E402
+from extractors.geo_utils import extract_coords_from_map  # noqa: E402
+from pipelines.exporters import JSONArrayWriter, NDJSONWriter, write_json_array  # noqa: E402
+from pipelines.normalizers import normalize_record  # noqa: E402
+
+FIXTURES = ROOT / "tests" / "fixtures" / "sample_pages"
+RESULTS = Path(__file__).resolve().parent / "results"
+
+def _measure(fn: Callable[[], None], units: int, min_seconds: float) -> Dict:
+    """Run `fn` until `min_seconds` elapsed; `units` is the work done per call."""
+    tracemalloc.start()
+    fn()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    calls = 0
+    started = time.perf_counter()
+    while True:
+        fn()
+        calls += 1
+        elapsed = time.perf_counter() - started
+        if elapsed >= min_seconds:
+            break
+    return {
+        "perSecond": round(units * calls / elapsed, 2),
+        "secondsPerCall": elapsed / calls,
+        "peakBytes": peak,
+        "calls": calls,
+    }
+
+def build_corpus(pages: int) -> Dict[str, List]:
+    lists = [list_page(seed=i, modern=bool(i % 2)) for i in range(pages)]
+    posts = [
+        (post_url(i), post_page(seed=i, paragraphs=4 + (i % 5) * 6, images=4 + (i % 4) * 8, map_in_script=bool(i % 3 == 0)))
+        for i in range(pages)
+    ]
+    return {"lists": lists, "posts": posts}
+
+def run(pages: int, records: int, min_seconds: float) -> Dict:
+    corpus = build_corpus(pages)
+    lists, posts = corpus["lists"], corpus["posts"]
+    results: Dict[str, Dict] = {}
+
+    for backend in BACKENDS:
+        def lists_once(backend=backend):
+            for markup in lists:
+                parse_list_html(markup, source_url="https://newyork.craigslist.org/search/apa", backend=backend)
+
+        def posts_once(backend=backend):
+            for url, markup in posts:
+                parse_post_html(markup, source_url=url, backend=backend)
+
+        results[f"parse_list_page[{backend}]"] = dict(_measure(lists_once, len(lists), min_seconds), unit="pages")
+        results[f"parse_post_page[{backend}]"] = dict(_measure(posts_once, len(posts), min_seconds), unit="pages")
+
+    soups = [BeautifulSoup(markup, "lxml") for _, markup in posts]
+
+    def coords_once():
+        for soup in soups:
+            extract_coords_from_map(soup)
+
+    results["extract_coords_from_map"] = dict(_measure(coords_once, len(soups), min_seconds), unit="pages")
+
+    parsed = [parse_post_html(markup, source_url=url) for url, markup in posts]
+    batch = [parsed[i % len(parsed)] for i in range(records)]
+
+    def normalize_once():
+        for rec in batch:
+            normalize_record(rec)
+
+    results["normalize_record"] = dict(_measure(normalize_once, len(batch), min_seconds), unit="records")
+
+    normalized = list(synthetic_records(records))
+    with tempfile.TemporaryDirectory() as tmp:
+        exporters = {
+            "write_json_array": lambda: write_json_array(normalized, os.path.join(tmp, "a.json")),
+            "JSONArrayWriter": lambda: _stream(JSONArrayWriter(os.path.join(tmp, "b.json")), normalized),
+            "NDJSONWriter": lambda: _stream(NDJSONWriter(os.path.join(tmp, "c.ndjson")), normalized),
+            "NDJSONWriter[gzip]": lambda: _stream(NDJSONWriter(os.path.join(tmp, "d.ndjson"), compression="gzip"), normalized),
+        }
+        try:
+            from pipelines.columnar import ParquetWriter, pq
+
+            if pq is not None:
+                exporters["ParquetWriter"] = lambda: _stream(ParquetWriter(os.path.join(tmp, "e.parquet")), normalized)
+        except ImportError:
+            pass
+        for name, fn in exporters.items():
+            results[name] = dict(_measure(fn, len(normalized), min_seconds), unit="records")
+    return results
+
+def _stream(writer, records) -> None:
+    with writer:
+        writer.write_many(records)
+
+def _commit() -> str:
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, text=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+def compare(current: Dict, baseline: Dict) -> str:
+    lines = [f"{'case':<30} {'baseline/s':>12} {'current/s':>12} {'change':>8} {'peak MB':>8}"]
+    for name, r in current["results"].items():
+        base = baseline.get("results", {}).get(name)
+        if base:
+            change = f"{(r['perSecond'] / base['perSecond'] - 1) * 100:+.1f}%"
+            lines.append(f"{name:<30} {base['perSecond']:>12.1f} {r['perSecond']:>12.1f} {change:>8} {r['peakBytes'] / 1e6:>8.2f}")
+        else:
+            lines.append(f"{name:<30} {'-':>12} {r['perSecond']:>12.1f} {'new':>8} {r['peakBytes'] / 1e6:>8.2f}")
+    return "\n".join(lines)
+
+def write_fixtures() -> None:
+    FIXTURES.mkdir(parents=True, exist_ok=True)
+    (FIXTURES / "list_page.html").write_text(list_page(seed=1), encoding="utf-8")
+    (FIXTURES / "list_page_modern.html").write_text(list_page(seed=2, modern=True), encoding="utf-8")
+    (FIXTURES / "post_page.html").write_text(post_page(seed=3), encoding="utf-8")
+    (FIXTURES / "post_page_map_script.html").write_text(post_page(seed=4, map_in_script=True), encoding="utf-8")
+    print(f"Wrote fixtures to {FIXTURES}")
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Craigslist Scraper benchmarks")
+    ap.add_argument("--pages", type=int, default=20, help="Synthetic list and post pages in the corpus")
+    ap.add_argument("--records", type=int, default=5000, help="Records for normalizer/exporter cases")
+    ap.add_argument("--min-seconds", type=float, default=1.0, help="Minimum timed duration per case")
+    ap.add_argument("--out", default=None, help="Results path (default: benchmarks/results/<commit>.json)")
+    ap.add_argument("--compare", default=None, help="Earlier results file to compare against")
+    ap.add_argument("--write-fixtures", action="store_true", help="Regenerate tests/fixtures/sample_pages and exit")
+    args = ap.parse_args(argv)
+
+    if args.write_fixtures:
+        write_fixtures()
+        return
+
+    commit = _commit()
+    report = {
+        "commit": commit,
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "params": {"pages": args.pages, "records": args.records, "minSeconds": args.min_seconds},
+        "results": run(args.pages, args.records, args.min_seconds),
+    }
+    out = Path(args.out) if args.out else RESULTS / f"{commit}.json"
+    out.parent.mkdir(parents=True, exist_ok=True)
+    out.write_text(json.dumps(report, indent=2), encoding="utf-8")
+
+    if args.compare:
+        baseline = json.loads(Path(args.compare).read_text(encoding="utf-8"))
+        print(compare(report, baseline))
+    else:
+        for name, r in report["results"].items():
+            print(f"{name:<30} {r['perSecond']:>12.1f} {r['unit']}/s  peak {r['peakBytes'] / 1e6:.2f} MB")
+    print(f"Saved {out}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,10 @@
+"""`python -m src ...` (from the repository root) or `python src ...`: see cli.py."""
+import os
+import sys
+
+# Modules import each other as top-level packages (extractors, pipelines, ...)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from cli import main  # noqa: E402
+
+main()
@@ -0,0 +1,157 @@
+from __future__ import annotations
+
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+from typing import Dict, List, Optional, Tuple
+import argparse
+import json
+import logging
+import os
+import sys
+import time
+
+from config.settings import DATA_DIR
+from runner import CraigslistScraper
+
+logger = logging.getLogger(__name__)
+
+def load_jobs(path: str) -> List[Tuple[str, str]]:
+    """
+    Read `category,location` pairs from an inputs file such as data/inputs.sample.txt.
+    Blank lines and `#` comments are ignored; duplicate pairs are kept once.
+    """
+    jobs: List[Tuple[str, str]] = []
+    with open(path, encoding="utf-8") as f:
+        for lineno, raw in enumerate(f, 1):
+            line = raw.split("#", 1)[0].strip()
+            if not line:
+                continue
+            parts = [p.strip() for p in line.split(",")]
+            if len(parts) != 2 or not all(parts):
+                raise ValueError(f"{path}:{lineno}: expected 'category,location', got {raw.strip()!r}")
+            jobs.append((parts[0], parts[1]))
+    return list(dict.fromkeys(jobs))
+
+def run_job(
+    category: str,
+    location: str,
+    num_pages: int = 5,
+    retries: int = 2,
+    backoff: float = 1.0,
+    scraper_kwargs: Optional[Dict] = None,
+    scraper_cls=CraigslistScraper,
+) -> Dict:
+    """
+    Scrape one category/location pair, retrying with exponential backoff.
+    Never raises: failures are reported in the returned summary under `error`.
+    """
+    started = time.monotonic()
+    report: Dict = {"category": category, "location": location, "attempts": 0, "error": None}
+    for attempt in range(retries + 1):
+        report["attempts"] = attempt + 1
+        # Each attempt's scraper releases its sessions and stores before the next one is built
+        with scraper_cls(category, location, **(scraper_kwargs or {})) as scraper:
+            try:
+                scraper.scrape(num_pages)
+                report["error"] = None
+                break
+            except Exception as e:  # noqa: BLE001 - one bad job must not sink the batch
+                report["error"] = f"{type(e).__name__}: {e}"
+                logger.warning("%s/%s attempt %d failed: %s", category, location, attempt + 1, report["error"])
+        if attempt < retries:
+            time.sleep(backoff * (2 ** attempt))
+    report.update(scraper.stats)
+    report["seconds"] = round(time.monotonic() - started, 3)
+    return report
+
+def run_batch(
+    jobs: List[Tuple[str, str]],
+    num_pages: int = 5,
+    workers: int = 4,
+    use_processes: bool = False,
+    retries: int = 2,
+    backoff: float = 1.0,
+    scraper_kwargs: Optional[Dict] = None,
+) -> List[Dict]:
+    """
+    Run every job on a thread or process pool. `workers` is the global cap on
+    jobs in flight; each job may additionally fetch pages concurrently when
+    `scraper_kwargs` sets `concurrency`. Reports come back in input order.
+    """
+    pool_cls = ProcessPoolExecutor if use_processes else ThreadPoolExecutor
+    reports: List[Optional[Dict]] = [None] * len(jobs)
+    with pool_cls(max_workers=max(1, workers)) as pool:
+        futures = {
+            pool.submit(run_job, category, location, num_pages, retries, backoff, scraper_kwargs): i
+            for i, (category, location) in enumerate(jobs)
+        }
+        for fut in as_completed(futures):
+            report = fut.result()
+            logger.info(
+                "%s/%s: %d page(s), %d listing(s) in %.1fs%s",
+                report["category"], report["location"], report["pages"], report["listings"],
+                report["seconds"], f" [{report['error']}]" if report["error"] else "",
+            )
+            reports[futures[fut]] = report
+    return reports
+
+def format_report(reports: List[Dict], wall_seconds: Optional[float] = None) -> str:
+    """Render per-job summaries as a fixed-width text table."""
+    header = f"{'category':<12} {'location':<16} {'pages':>6} {'listings':>9} {'bytes':>12} {'seconds':>9} {'tries':>5}  status"
+    lines = [header, "-" * len(header)]
+    for r in reports:
+        lines.append(
+            f"{r['category']:<12} {r['location']:<16} {r['pages']:>6} {r['listings']:>9} "
+            f"{r['bytes']:>12} {r['seconds']:>9.2f} {r['attempts']:>5}  {r['error'] or 'ok'}"
+        )
+    lines.append("-" * len(header))
+    lines.append(
+        f"{'total':<29} {sum(r['pages'] for r in reports):>6} {sum(r['listings'] for r in reports):>9} "
+        f"{sum(r['bytes'] for r in reports):>12}"
+        + (f" {wall_seconds:>9.2f}" if wall_seconds is not None else "")
+    )
+    return "\n".join(lines)
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Craigslist Scraper batch runner")
+    ap.add_argument("--input", default=os.path.join(DATA_DIR, "inputs.sample.txt"),
+                    help="File of category,location pairs")
+    ap.add_argument("--pages", type=int, default=5, help="Search pages to scrape per job")
+    ap.add_argument("--workers", type=int, default=4, help="Jobs to run at the same time")
+    ap.add_argument("--processes", action="store_true", help="Use a process pool instead of threads")
+    ap.add_argument("--concurrency", type=int, default=None, help="Concurrent page fetches within each job")
+    ap.add_argument("--format", choices=("json", "ndjson", "parquet"), default="json", help="Output format per job")
+    ap.add_argument("--output-dir", default=None, help="Output directory (default: the repository's data/)")
+    ap.add_argument("--retries", type=int, default=2, help="Retries per job after the first attempt")
+    ap.add_argument("--backoff", type=float, default=1.0, help="Base backoff in seconds, doubled per retry")
+    ap.add_argument("--report", default=None, help="Optional path to write the summary as JSON")
+    args = ap.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+    if not os.path.exists(args.input):
+        logger.error("Input file not found: %s", args.input)
+        sys.exit(2)
+    jobs = load_jobs(args.input)
+    if not jobs:
+        logger.error("No jobs in %s", args.input)
+        sys.exit(3)
+
+    started = time.monotonic()
+    reports = run_batch(
+        jobs,
+        num_pages=args.pages,
+        workers=args.workers,
+        use_processes=args.processes,
+        retries=args.retries,
+        backoff=args.backoff,
+        scraper_kwargs={"concurrency": args.concurrency, "output_format": args.format, "output_dir": args.output_dir},
+    )
+    wall = time.monotonic() - started
+    print(format_report(reports, wall))
+    if args.report:
+        with open(args.report, "w", encoding="utf-8") as f:
+            json.dump({"wallSeconds": round(wall, 3), "jobs": reports}, f, ensure_ascii=False, indent=2)
+    if any(r["error"] for r in reports):
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,224 @@
+"""
+Command-line entry point for the scraper, the parsers and the exporters.
+
+    python -m src scrape jobs newyork --pages 10 --concurrency 8 --format ndjson --profile
+    python -m src batch --input data/inputs.sample.txt --workers 4 --format ndjson
+    python -m src crawl seed --input data/inputs.sample.txt --pages 10 && python -m src crawl work --workers 4
+    python -m src parse --input page.html --backend lxml
+    python -m src export --input data/jobs_newyork_scrape.ndjson --format csv
+"""
+from __future__ import annotations
+
+from typing import Dict, Iterator, List, Optional
+import argparse
+import json
+import logging
+import os
+import sys
+import time
+
+logger = logging.getLogger(__name__)
+
+SCRAPE_FORMATS = ("ndjson", "json", "parquet")
+EXPORT_FORMATS = ("ndjson", "json", "parquet", "csv")
+
+def _scrape(args) -> int:
+    from metrics import Metrics, NULL_METRICS, format_summary
+    from runner import CraigslistScraper
+
+    metrics = Metrics() if (args.profile or args.metrics_port is not None or args.metrics_json) else NULL_METRICS
+    if args.metrics_port is not None:
+        metrics.serve(args.metrics_port)
+    if args.metrics_json:
+        metrics.start_snapshots(args.metrics_json, args.metrics_interval)
+    with CraigslistScraper(
+        args.category,
+        args.location,
+        output_format=args.format,
+        concurrency=args.concurrency,
+        rate_per_host=args.rate,
+        base_url=args.base_url,
+        backend=args.backend,
+        compression=args.compression,
+        output_dir=args.output_dir,
+        state_path=args.state,
+        cache_path=args.cache,
+        replay=args.replay,
+        dedup_path=args.dedup,
+        geo_index_path=args.geo_index,
+        history_path=args.history,
+        checkpoint_path=args.checkpoint,
+        profile_path=args.cprofile,
+        metrics=metrics,
+    ) as scraper:
+        started = time.monotonic()
+        try:
+            paths = scraper.scrape(args.pages, details=args.details, resume=args.resume)
+        finally:
+            metrics.close()
+    wall = time.monotonic() - started
+    for path in paths:
+        print(path)
+    logger.info("%d page(s), %d listing(s), %d bytes in %.1fs",
+                scraper.stats["pages"], scraper.stats["listings"], scraper.stats["bytes"], wall)
+    if args.profile:
+        print(format_summary(metrics.summary(), wall), file=sys.stderr)
+        http = scraper.stats["http"]
+        print(f"http: {http['requests']} request(s), {http['retries']} retries, {http['failures']} failure(s), "
+              f"{http['bytes']} bytes", file=sys.stderr)
+    return 0
+
+def _batch(args) -> int:
+    import batch
+
+    batch.main(args.args)  # exits non-zero itself when a job failed
+    return 0
+
+def _crawl(args) -> int:
+    import coordinator
+
+    coordinator.main(args.args)  # exits non-zero itself when units failed
+    return 0
+
+def _is_list_page(html: str) -> bool:
+    return "result-row" in html or "cl-search-result" in html or "cl-static-search-result" in html
+
+def _parse(args) -> int:
+    from extractors.backends import parse_list_html, parse_post_html
+    from metrics import Metrics, NULL_METRICS, format_summary
+
+    metrics = Metrics() if args.profile else NULL_METRICS
+    started = time.monotonic()
+    inputs = args.input or ["-"]
+    records: List[Dict] = []
+    for path in inputs:
+        if path == "-":
+            html = sys.stdin.read()
+        else:
+            with open(path, encoding="utf-8") as f:
+                html = f.read()
+        source_url = args.url or ("" if path == "-" else path)
+        kind = args.kind if args.kind != "auto" else ("list" if _is_list_page(html) else "post")
+        with metrics.timer(f"parse_{kind}"):
+            if kind == "list":
+                records.extend(parse_list_html(html, source_url=source_url, backend=args.backend))
+            else:
+                records.append(parse_post_html(html, source_url=source_url, backend=args.backend))
+    _emit(records, args.output, args.format)
+    if args.profile:
+        print(format_summary(metrics.summary(), time.monotonic() - started), file=sys.stderr)
+    return 0
+
+def _export(args) -> int:
+    from pipelines.geo_index import iter_exported_records
+
+    def records() -> Iterator[Dict]:
+        for path in args.input:
+            yield from iter_exported_records(path)
+
+    output = args.output or os.path.splitext(args.input[0])[0] + "." + args.format
+    _emit(records(), output, args.format)
+    print(output)
+    return 0
+
+def _emit(records, output: Optional[str], fmt: str) -> None:
+    """Write records to `output` in `fmt`, or to stdout (ndjson/json only) when it is None or "-"."""
+    if output in (None, "-"):
+        if fmt == "json":
+            json.dump(list(records), sys.stdout, ensure_ascii=False, indent=2)
+            sys.stdout.write("\n")
+        elif fmt == "ndjson":
+            for rec in records:
+                sys.stdout.write(json.dumps(rec, ensure_ascii=False) + "\n")
+        else:
+            raise SystemExit(f"--format {fmt} needs an --output file")
+        return
+    if fmt == "csv":
+        from outputs.exporters import export_to_csv
+
+        data = list(records)
+        if not data:
+            raise SystemExit("No records to write as CSV")
+        export_to_csv(data, output)
+        return
+    from pipelines.exporters import open_writer
+
+    with open_writer(output, fmt) as writer:
+        writer.write_many(records)
+
+def build_parser() -> argparse.ArgumentParser:
+    from extractors.backends import BACKENDS
+
+    ap = argparse.ArgumentParser(prog="craigslist-scraper", description="Craigslist Scraper")
+    ap.add_argument("-v", "--verbose", action="store_true", help="Debug logging")
+    sub = ap.add_subparsers(dest="command", required=True)
+
+    sc = sub.add_parser("scrape", help="Scrape one category/location")
+    sc.add_argument("category", help="Category code, e.g. jobs, apa, sss")
+    sc.add_argument("location", help="Site name, e.g. newyork")
+    sc.add_argument("--pages", type=int, default=5, help="Most search pages to fetch (paging stops earlier at the end)")
+    sc.add_argument("--concurrency", type=int, default=None, help="Concurrent page fetches (default: one at a time)")
+    sc.add_argument("--base-url", default=None, help="Site root (default: https://<location>.craigslist.org)")
+    sc.add_argument("--rate", type=float, default=1.0, help="Requests per second per host in concurrent mode")
+    sc.add_argument("--format", choices=SCRAPE_FORMATS, default="json", help="Output format")
+    sc.add_argument("--compression", choices=("gzip", "zstd"), default=None)
+    sc.add_argument("--output-dir", default=None, help="Output directory (default: the repository's data/)")
+    sc.add_argument("--details", action="store_true", help="Also fetch and parse every post page")
+    sc.add_argument("--backend", choices=BACKENDS, default="bs4", help="Parser backend for --details")
+    sc.add_argument("--state", default=None, help="Crawl state store: skip posts unchanged since the last run")
+    sc.add_argument("--cache", default=None, help="HTTP response cache (SQLite path)")
+    sc.add_argument("--replay", action="store_true", help="Serve every page from the cache, no network")
+    sc.add_argument("--dedup", default=None, help="Repost index (SQLite path); reposts get repostOf")
+    sc.add_argument("--geo-index", default=None, help="Write a geo index of the output to this path")
+    sc.add_argument("--history", default=None, help="Search depth history (SQLite path) for concurrent paging")
+    sc.add_argument("--checkpoint", default=None, help="Checkpoint file, committed as the crawl progresses")
+    sc.add_argument("--resume", action="store_true", help="Continue the crawl recorded in --checkpoint")
+    sc.add_argument("--profile", action="store_true", help="Print a per-stage timing breakdown after the run")
+    sc.add_argument("--cprofile", default=None, metavar="PREFIX", help="Write cProfile/tracemalloc output to PREFIX.*")
+    sc.add_argument("--metrics-port", type=int, default=None, help="Serve Prometheus metrics on this port")
+    sc.add_argument("--metrics-json", default=None, help="Rewrite a JSON metrics snapshot at this path")
+    sc.add_argument("--metrics-interval", type=float, default=10.0, help="Seconds between JSON snapshots")
+    sc.set_defaults(func=_scrape)
+
+    bt = sub.add_parser("batch", help="Scrape every category,location pair in an inputs file (see batch.py --help)",
+                        add_help=False)
+    bt.add_argument("args", nargs=argparse.REMAINDER, help="Options for batch.py")
+    bt.set_defaults(func=_batch)
+
+    cr = sub.add_parser("crawl", help="Sharded crawl over a shared work queue: seed, work, status (see coordinator.py)",
+                        add_help=False)
+    cr.add_argument("args", nargs=argparse.REMAINDER, help="Options for coordinator.py")
+    cr.set_defaults(func=_crawl)
+
+    pa = sub.add_parser("parse", help="Parse saved list or post pages")
+    pa.add_argument("--input", nargs="*", help="HTML files (default: stdin)")
+    pa.add_argument("--kind", choices=("auto", "list", "post"), default="auto")
+    pa.add_argument("--backend", choices=BACKENDS, default="bs4")
+    pa.add_argument("--url", default=None, help="Source URL recorded on the parsed records")
+    pa.add_argument("--format", choices=EXPORT_FORMATS, default="ndjson")
+    pa.add_argument("--output", default=None, help="Output file (default: stdout)")
+    pa.add_argument("--profile", action="store_true", help="Print a parse timing breakdown on stderr")
+    pa.set_defaults(func=_parse)
+
+    ex = sub.add_parser("export", help="Convert exported NDJSON/JSON records to another format")
+    ex.add_argument("--input", nargs="+", required=True, help=".ndjson/.json files (optionally .gz/.zst)")
+    ex.add_argument("--format", choices=EXPORT_FORMATS, required=True)
+    ex.add_argument("--output", default=None, help="Output file (default: next to the first input)")
+    ex.set_defaults(func=_export)
+    return ap
+
+def main(argv=None) -> None:
+    from extractors.utils import setup_logging
+
+    argv = sys.argv[1:] if argv is None else list(argv)
+    if argv[:1] == ["batch"]:
+        # Everything after `batch` is batch.py's, --help included
+        sys.exit(_batch(argparse.Namespace(args=argv[1:])))
+    if argv[:1] == ["crawl"]:
+        sys.exit(_crawl(argparse.Namespace(args=argv[1:])))
+    args = build_parser().parse_args(argv)
+    setup_logging(logging.DEBUG if args.verbose else logging.INFO)
+    sys.exit(args.func(args))
+
+if __name__ == "__main__":
+    main()
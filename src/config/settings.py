@@ -0,0 +1,20 @@
+import json
+import os
+
+_CONFIG_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# The repository's data/ directory: default home of exports and stores, whatever the working directory
+DATA_DIR = os.path.join(os.path.dirname(os.path.dirname(_CONFIG_DIR)), 'data')
+
+# Copy settings.example.json to settings.json (or point SCRAPER_SETTINGS at a file) to configure proxies.
+SETTINGS_PATH = os.environ.get('SCRAPER_SETTINGS', os.path.join(_CONFIG_DIR, 'settings.json'))
+
+def load_settings(path=SETTINGS_PATH):
+    if not os.path.exists(path):
+        return {}
+    with open(path, encoding='utf-8') as f:
+        return json.load(f)
+
+_settings = load_settings()
+
+PROXY_CONFIG = _settings.get('PROXY_CONFIG') or None
@@ -0,0 +1,213 @@
+"""
+Sharded crawl: (location, category, page) work units in a shared queue,
+claimed under leases by any number of worker processes or hosts.
+
+    python -m src crawl seed --queue data/crawl_queue.sqlite3 --input data/inputs.sample.txt --pages 10
+    python -m src crawl work --queue data/crawl_queue.sqlite3 --workers 4 --rate 1
+    python -m src crawl status --queue data/crawl_queue.sqlite3
+
+Workers on other hosts run the same `work` command against the same queue.
+"""
+from __future__ import annotations
+
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Iterable, List, Optional, Tuple
+from urllib.parse import urlsplit
+import argparse
+import json
+import logging
+import os
+import socket
+import sys
+import threading
+import time
+
+from config.settings import DATA_DIR
+from pipelines.exporters import open_writer
+from pipelines.work_queue import Lease, WorkQueue, WorkUnit, next_units, open_queue
+from runner import CraigslistScraper
+
+logger = logging.getLogger(__name__)
+
+def seed(queue: WorkQueue, jobs: Iterable[Tuple[str, str]], num_pages: int = 5) -> int:
+    """Queue the first search page of every `category,location` job; later pages are queued as results come in."""
+    return queue.add(WorkUnit(location, category, 0, num_pages) for category, location in jobs)
+
+def unit_path(output_dir: str, unit: WorkUnit) -> str:
+    """Output file of one unit; re-running a unit rewrites the same file."""
+    return os.path.join(output_dir, unit.location, unit.category, f"page-{unit.page:05d}.ndjson")
+
+class CrawlWorker:
+    """
+    Claims units from a shared `WorkQueue` until it is drained: fetches the
+    search page, writes its listings to `unit_path()` (atomically, so a
+    redone unit replaces rather than duplicates its output), then completes
+    the unit and queues the pages that follow (see `work_queue.next_units`).
+
+    Every fetch first books a slot with `queue.reserve()`, so `rate_per_host`
+    holds across all workers sharing the queue. The scrapers make one HTTP
+    attempt per fetch (no client-side retries, which would bypass that
+    budget): a failed fetch or parse fails the unit, which is retried, with
+    a new slot, up to the queue's `max_attempts`.
+    While the queue still has leased units (possibly held by a dead worker)
+    an idle worker keeps polling, so it picks them up once their leases run out.
+    """
+
+    def __init__(
+        self,
+        queue: WorkQueue,
+        worker_id: Optional[str] = None,
+        output_dir: Optional[str] = None,
+        rate_per_host: float = 1.0,
+        poll_seconds: float = 1.0,
+        scraper_kwargs: Optional[Dict] = None,
+        scraper_cls=CraigslistScraper,
+    ):
+        if rate_per_host <= 0:
+            raise ValueError("rate_per_host must be positive")
+        self.queue = queue
+        self.worker_id = worker_id or f"{socket.gethostname()}:{os.getpid()}:{threading.get_ident()}"
+        self.output_dir = output_dir or DATA_DIR
+        self.interval = 1.0 / rate_per_host
+        self.poll_seconds = poll_seconds
+        self.scraper_kwargs = scraper_kwargs or {}
+        self.scraper_cls = scraper_cls
+        self.stats = {"units": 0, "listings": 0, "failures": 0, "lost": 0, "waited": 0.0}
+        self._scrapers: Dict[Tuple[str, str], CraigslistScraper] = {}
+
+    def _scraper(self, unit: WorkUnit):
+        key = (unit.category, unit.location)
+        if key not in self._scrapers:
+            self._scrapers[key] = self.scraper_cls(unit.category, unit.location, **dict(self.scraper_kwargs, retries=0))
+        return self._scrapers[key]
+
+    def run(self, max_units: Optional[int] = None, stop: Optional[threading.Event] = None) -> Dict:
+        """Work until the queue is drained (or `max_units` were processed, or `stop` is set)."""
+        while not (stop is not None and stop.is_set()):
+            if max_units is not None and self.stats["units"] >= max_units:
+                break
+            lease = self.queue.claim(self.worker_id)
+            if lease is None:
+                if self.queue.drained():
+                    break
+                time.sleep(self.poll_seconds)
+                continue
+            self.process(lease)
+        return self.stats
+
+    def close(self) -> None:
+        """Close the per-search scrapers (their sessions and stores); the queue belongs to the caller."""
+        for scraper in self._scrapers.values():
+            scraper.close()
+        self._scrapers.clear()
+
+    def __enter__(self) -> "CrawlWorker":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def process(self, lease: Lease) -> bool:
+        """Scrape one claimed unit; returns whether it completed."""
+        unit = lease.unit
+        self.stats["units"] += 1
+        try:
+            scraper = self._scraper(unit)
+            url = scraper.page_url(unit.page)
+            wait = self.queue.reserve(urlsplit(url).netloc, self.interval)
+            if wait > 0:
+                self.stats["waited"] += wait
+                time.sleep(wait)
+                # A long wait for a busy host must not cost the lease
+                lease = self.queue.renew(lease)
+                if lease is None:
+                    self.stats["lost"] += 1
+                    return False
+            page = scraper.fetch_search_page(unit.page)
+            if page is None:
+                raise IOError(f"could not fetch {url}")
+            listings, total = page
+            if listings:
+                # Per-lease file renamed into place: a worker that lost its lease cannot interleave with the new holder
+                path = unit_path(self.output_dir, unit)
+                with open_writer(f"{path}.{lease.token}", "ndjson") as writer:
+                    writer.write_many(listings)
+                os.replace(writer.paths[0], path)
+        except Exception as e:  # noqa: BLE001 - the unit is retried, the worker carries on
+            logger.warning("%s failed (attempt %d): %s", unit.key, lease.attempt, e)
+            self.stats["failures"] += 1
+            self.queue.fail(lease, f"{type(e).__name__}: {e}")
+            return False
+        if not self.queue.complete(lease, len(listings), total, next_units(unit, len(listings), total)):
+            # The lease ran out and another worker took the unit over; its output file is the same
+            logger.warning("Lease on %s expired before it completed", unit.key)
+            self.stats["lost"] += 1
+            return False
+        self.stats["listings"] += len(listings)
+        return True
+
+def run_worker(queue_path: str, worker_id: Optional[str] = None, lease_seconds: float = 120.0,
+               max_attempts: int = 3, **kwargs) -> Dict:
+    """Process-pool entry point: open the queue in this process and work it until drained."""
+    with open_queue(queue_path, lease_seconds=lease_seconds, max_attempts=max_attempts) as queue:
+        with CrawlWorker(queue, worker_id=worker_id, **kwargs) as worker:
+            return worker.run()
+
+def run_workers(queue_path: str, workers: int = 4, **kwargs) -> List[Dict]:
+    """Run `workers` local worker processes against the queue; returns each one's stats."""
+    host = socket.gethostname()
+    with ProcessPoolExecutor(max_workers=max(1, workers)) as pool:
+        futures = [pool.submit(run_worker, queue_path, f"{host}:w{i}", **kwargs) for i in range(max(1, workers))]
+        return [fut.result() for fut in futures]
+
+def format_status(counts: Dict[str, int], failures: List[Dict]) -> str:
+    lines = ["  ".join(f"{state}={counts.get(state, 0)}" for state in ("pending", "leased", "done", "failed"))]
+    for f in failures:
+        lines.append(f"failed {f['location']}/{f['category']}/{f['page']} after {f['attempts']} attempt(s): {f['error']}")
+    return "\n".join(lines)
+
+def main(argv=None):
+    from batch import load_jobs
+
+    common = argparse.ArgumentParser(add_help=False)
+    common.add_argument("--queue", default=os.path.join(DATA_DIR, "crawl_queue.sqlite3"), help="Shared queue (SQLite path)")
+    common.add_argument("--lease", type=float, default=120.0, help="Seconds a claimed unit stays leased without renewal")
+    common.add_argument("--max-attempts", type=int, default=3, help="Tries per unit before it is marked failed")
+    ap = argparse.ArgumentParser(prog="craigslist-scraper crawl", description="Sharded crawl over a shared work queue")
+    sub = ap.add_subparsers(dest="action", required=True)
+
+    sd = sub.add_parser("seed", parents=[common], help="Queue the first page of every category,location pair")
+    sd.add_argument("--input", default=os.path.join(DATA_DIR, "inputs.sample.txt"), help="File of category,location pairs")
+    sd.add_argument("--pages", type=int, default=5, help="Most search pages per pair")
+
+    wk = sub.add_parser("work", parents=[common], help="Claim and scrape units until the queue is drained")
+    wk.add_argument("--workers", type=int, default=1, help="Worker processes on this host")
+    wk.add_argument("--rate", type=float, default=1.0, help="Requests per second per site, across all workers")
+    wk.add_argument("--output-dir", default=None, help="Output directory (default: the repository's data/)")
+    wk.add_argument("--base-url", default=None, help="Site root for every unit (testing against a mirror)")
+
+    sub.add_parser("status", parents=[common], help="Units per state, and failed units")
+    args = ap.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+    if args.action == "seed":
+        with open_queue(args.queue, lease_seconds=args.lease, max_attempts=args.max_attempts) as queue:
+            added = seed(queue, load_jobs(args.input), args.pages)
+        print(f"{added} unit(s) queued in {args.queue}")
+    elif args.action == "work":
+        started = time.monotonic()
+        scraper_kwargs = {"base_url": args.base_url} if args.base_url else None
+        stats = run_workers(args.queue, args.workers, lease_seconds=args.lease, max_attempts=args.max_attempts,
+                            output_dir=args.output_dir, rate_per_host=args.rate, scraper_kwargs=scraper_kwargs)
+        totals = {key: sum(s[key] for s in stats) for key in stats[0]}
+        logger.info("%d unit(s), %d listing(s), %d failure(s) in %.1fs", totals["units"], totals["listings"],
+                    totals["failures"], time.monotonic() - started)
+        print(json.dumps(totals))
+    with open_queue(args.queue, lease_seconds=args.lease, max_attempts=args.max_attempts) as queue:
+        failures = queue.failures()
+        print(format_status(queue.counts(), failures))
+    if failures:
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,37 @@
+from __future__ import annotations
+
+from typing import Dict, List, Union
+
+from bs4 import BeautifulSoup
+
+from . import lxml_parser, partial_parser
+from .craigslist_list_parser import parse_list_page
+from .craigslist_post_parser import parse_post_page
+
+# "bs4" is the reference implementation; "lxml" is the compiled-XPath fast path
+# and "partial" builds only the post-page subtrees bs4 reads (list pages use
+# the bs4 path). Both must return exactly the same records.
+BACKENDS = ("bs4", "lxml", "partial")
+DEFAULT_BACKEND = "bs4"
+
+Markup = Union[str, bytes]
+
+def _check(backend: str) -> None:
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown parser backend {backend!r}; expected one of {', '.join(BACKENDS)}")
+
+def parse_list_html(markup: Markup, *, source_url: str, backend: str = DEFAULT_BACKEND) -> List[Dict]:
+    """Parse raw list-page HTML with the chosen backend."""
+    _check(backend)
+    if backend == "lxml":
+        return lxml_parser.parse_list_page(markup, source_url=source_url)
+    return parse_list_page(BeautifulSoup(markup, "lxml"), source_url=source_url)
+
+def parse_post_html(markup: Markup, *, source_url: str, backend: str = DEFAULT_BACKEND) -> Dict:
+    """Parse raw post-page HTML with the chosen backend."""
+    _check(backend)
+    if backend == "lxml":
+        return lxml_parser.parse_post_page(markup, source_url=source_url)
+    if backend == "partial":
+        return partial_parser.parse_post_page(markup, source_url=source_url)
+    return parse_post_page(BeautifulSoup(markup, "lxml"), source_url=source_url)
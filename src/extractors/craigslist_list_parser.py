@@ -21,6 +21,51 @@ def _price_text(s: str) -> Optional[str]:
         return s
     return None
 
+def id_from_url(url: Optional[str]) -> Optional[str]:
+    """Post id from a `/1234567.html` URL (falls back to the falsy `url` itself)."""
+    if not url:
+        return url
+    m = re.search(r"/(\d+)\.html", url)
+    return m.group(1) if m else None
+
+def build_item(
+    *,
+    url: Optional[str],
+    cid: Optional[str],
+    title: str,
+    datetime: Optional[str],
+    price: Optional[str],
+    location: Optional[str],
+    category: Optional[str],
+    snippet: str,
+) -> Optional[Dict]:
+    """
+    Assemble a list item from extracted row fields; shared by every parser backend.
+    Returns None for rows without a URL or title.
+    """
+    item = {
+        "id": cid,
+        "url": url,
+        "title": title or None,
+        "datetime": datetime,
+        "location": location or None,
+        "price": price,
+        "label": "post",
+    }
+    if category:
+        item["category"] = category
+
+    # Pull any phone-like strings if snippets are present
+    if snippet:
+        phones = list({m.group(0) for m in _PHONE_RE.finditer(snippet)})
+        if phones:
+            item["phoneNumbers"] = phones
+
+    # Skip entries with no URL or title
+    if not (item["url"] and item["title"]):
+        return None
+    return item
+
 def parse_list_page(soup: BeautifulSoup, *, source_url: str) -> List[Dict]:
     """
     Parse a Craigslist search/list page into a list of lightweight items.
@@ -42,9 +87,7 @@ def parse_list_page(soup: BeautifulSoup, *, source_url: str) -> List[Dict]:
         # URL / id
         link = row.select_one("a.result-title") or row.select_one("a.cl-app-anchor") or row.find("a", href=True)
         url = link["href"] if link and link.has_attr("href") else None
-        cid = (
-            (row.get("data-pid") or row.get("data-id") or (url and re.search(r"/(\d+)\.html", url) and re.search(r"/(\d+)\.html", url).group(1)))
-        )
+        cid = row.get("data-pid") or row.get("data-id") or id_from_url(url)
 
         # Title
         title = _text(link)
@@ -67,27 +110,13 @@ def parse_list_page(soup: BeautifulSoup, *, source_url: str) -> List[Dict]:
         if cat_el and cat_el.has_attr("data-cat"):
             category = cat_el["data-cat"]
 
-        item = {
-            "id": cid,
-            "url": url,
-            "title": title or None,
-            "datetime": datetime,
-            "location": location or None,
-            "price": price,
-            "label": "post",
-        }
-        if category:
-            item["category"] = category
-
-        # Pull any phone-like strings if snippets are present
         snippet = _text(row.select_one(".result-description") or row.select_one(".snippet"))
-        if snippet:
-            phones = list({m.group(0) for m in _PHONE_RE.finditer(snippet)})
-            if phones:
-                item["phoneNumbers"] = phones
 
-        # Skip entries with no URL or title
-        if not (item["url"] and item["title"]):
+        item = build_item(
+            url=url, cid=cid, title=title, datetime=datetime, price=price,
+            location=location, category=category, snippet=snippet,
+        )
+        if item is None:
             continue
 
         items.append(item)
@@ -1,4 +1,4 @@
-thonfrom bs4 import BeautifulSoup
+from bs4 import BeautifulSoup
 
 class CraigslistParser:
     def __init__(self):
@@ -1,11 +1,12 @@
 from __future__ import annotations
 
-from typing import Dict, List, Optional
+from typing import Dict, Iterable, List, Optional
 import json
 import re
 from bs4 import BeautifulSoup
 
-from .geo_utils import extract_coords_from_map, find_phone_numbers
+from .geo_utils import extract_coords_from_map
+from .text_rules import AMENITY_RE, JOB_TITLE_MARKERS_RE, POST_ID_TEXT_RE, scan_post_body
 
 # Common attribute label mappings for normalization
 _ATTR_LABEL_MAP = {
@@ -49,9 +50,13 @@ def _get_datetime(soup: BeautifulSoup) -> Optional[str]:
 
 def _get_id(soup: BeautifulSoup, source_url: str) -> Optional[str]:
     # Prefer post ID element
-    id_el = soup.select_one(".postinginfos .postinginfo") or soup.find(string=re.compile(r"post id", re.I))
-    if id_el:
-        m = re.search(r"(\d{7,})", str(id_el))
+    id_el = soup.select_one(".postinginfos .postinginfo") or soup.find(string=POST_ID_TEXT_RE)
+    return post_id_from(str(id_el) if id_el else None, source_url)
+
+def post_id_from(id_markup: Optional[str], source_url: str) -> Optional[str]:
+    """First 7+ digit run in the post-id element's markup, else the id in the URL."""
+    if id_markup:
+        m = re.search(r"(\d{7,})", id_markup)
         if m:
             return m.group(1)
     # Fallback to URL
@@ -61,12 +66,13 @@ def _get_id(soup: BeautifulSoup, source_url: str) -> Optional[str]:
 def _get_body(soup: BeautifulSoup) -> Optional[str]:
     body_el = soup.select_one("#postingbody") or soup.select_one(".userbody") or soup.select_one(".description")
     if body_el:
-        # Craigslist often prefixes "QR Code Link to This Post"
-        body = _text(body_el)
-        body = re.sub(r"^QR Code Link to This Post\s*", "", body, flags=re.I)
-        return body
+        return clean_body(_text(body_el))
     return None
 
+def clean_body(body: str) -> str:
+    # Craigslist often prefixes "QR Code Link to This Post"
+    return re.sub(r"^QR Code Link to This Post\s*", "", body, flags=re.I)
+
 def _parse_attributes(soup: BeautifulSoup) -> Dict:
     """
     Parse attribute lists found under .attrgroup
@@ -76,33 +82,39 @@ def _parse_attributes(soup: BeautifulSoup) -> Dict:
       - attributes: list[str]
       - normalized fields like manufacturer/model/condition/etc when present
     """
+    img_srcs = (img.get("src") for img in soup.select("img"))
+    span_texts = (_text(span) for group in soup.select(".attrgroup") for span in group.select("span"))
+    return collect_attributes(img_srcs, span_texts)
+
+def collect_attributes(img_srcs: Iterable[Optional[str]], span_texts: Iterable[str]) -> Dict:
+    """
+    Build the attribute fields from every `img` src (document order) and the
+    text of every span under each `.attrgroup`; shared by every parser backend.
+    """
     out: Dict = {"pics": [], "amenities": [], "attributes": []}
     # Pictures
-    for img in soup.select("img"):
-        src = img.get("src")
+    for src in img_srcs:
         if src and "images.craigslist.org" in src:
             out["pics"].append(src)
 
     # Attribute groups
-    for group in soup.select(".attrgroup"):
-        # Amenities / feature bullets are often inside span + b
-        for span in group.select("span"):
-            text = _text(span)
-            if not text:
-                continue
-            out["attributes"].append(text)
-
-            # Normalize key:value pairs if present
-            if ":" in text:
-                k, v = [t.strip() for t in text.split(":", 1)]
-                key_norm = _ATTR_LABEL_MAP.get(k.lower())
-                if key_norm:
-                    out[key_norm] = v
-            else:
-                # Amenities heuristics (housing)
-                lowered = text.lower()
-                if any(tok in lowered for tok in ["furnished", "air", "w/d", "dishwasher", "parking", "apartment", "condo", "private", "shared", "studio"]):
-                    out["amenities"].append(text)
+    # Amenities / feature bullets are often inside span + b
+    for text in span_texts:
+        if not text:
+            continue
+        out["attributes"].append(text)
+
+        # Normalize key:value pairs if present
+        if ":" in text:
+            k, v = [t.strip() for t in text.split(":", 1)]
+            key_norm = _ATTR_LABEL_MAP.get(k.lower())
+            if key_norm:
+                out[key_norm] = v
+        else:
+            # Amenities heuristics (housing)
+            lowered = text.lower()
+            if AMENITY_RE.search(lowered):
+                out["amenities"].append(text)
 
     # Deduplicate
     out["pics"] = list(dict.fromkeys(out["pics"]))
@@ -124,7 +136,26 @@ def parse_post_page(soup: BeautifulSoup, *, source_url: str) -> Dict:
 
     attrs = _parse_attributes(soup)
 
-    phones = find_phone_numbers(body or "")
+    return build_post_record(
+        source_url=source_url, pid=pid, title=title, dt=dt, location=location,
+        price=price, body=body, coords=coords, attrs=attrs,
+    )
+
+def build_post_record(
+    *,
+    source_url: str,
+    pid: Optional[str],
+    title: Optional[str],
+    dt: Optional[str],
+    location: Optional[str],
+    price: Optional[str],
+    body: Optional[str],
+    coords: Dict,
+    attrs: Dict,
+) -> Dict:
+    """Assemble a post record from extracted fields; shared by every parser backend."""
+    facts = scan_post_body(body or "")
+    phones = facts["phones"]
 
     record: Dict = {
         "id": pid,
@@ -145,20 +176,18 @@ def parse_post_page(soup: BeautifulSoup, *, source_url: str) -> Dict:
     record.update(attrs)
 
     # Job-specific fields if present inside attributes/body (heuristic)
-    body_lower = (body or "").lower()
-    if "full-time" in body_lower:
+    if facts["fullTime"]:
         record["employmentType"] = record.get("employmentType") or "full-time"
-    if "part-time" in body_lower and not record.get("employmentType"):
+    if facts["partTime"] and not record.get("employmentType"):
         record["employmentType"] = "part-time"
 
     # Compensation heuristics
-    comp_match = re.search(r"(?:compensation|pay|salary)\s*[:\-]\s*([^\n\r]+)", body or "", flags=re.I)
-    if comp_match and not record.get("compensation"):
-        record["compensation"] = comp_match.group(1).strip()
+    if facts["compensation"] is not None and not record.get("compensation"):
+        record["compensation"] = facts["compensation"].strip()
 
     # Try to guess jobTitle from title by stripping company markers
     if title:
-        jt = re.sub(r"\*+|~+|\[.*?\]|\(.*?\)", "", title).strip()
+        jt = JOB_TITLE_MARKERS_RE.sub("", title).strip()
         record["jobTitle"] = jt if jt else None
 
     # Clean Nones
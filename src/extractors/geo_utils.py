@@ -26,19 +26,9 @@ def extract_coords_from_map(soup: BeautifulSoup) -> Dict[str, Optional[str]]:
     # Try JSON inside a script
     for sc in soup.find_all("script"):
         txt = sc.string or sc.get_text()
-        if not txt:
-            continue
-        if "latitude" in txt and "longitude" in txt:
-            # crude parse
-            lat_match = re.search(r'"latitude"\s*:\s*("?)(-?\d+(\.\d+)?)\1', txt)
-            lon_match = re.search(r'"longitude"\s*:\s*("?)(-?\d+(\.\d+)?)\1', txt)
-            acc_match = re.search(r'"accuracy"\s*:\s*("?)(\d+(\.\d+)?)\1', txt)
-            if lat_match and lon_match:
-                return {
-                    "latitude": lat_match.group(2),
-                    "longitude": lon_match.group(2),
-                    "mapAccuracy": acc_match.group(2) if acc_match else None,
-                }
+        coords = coords_from_script(txt)
+        if coords:
+            return coords
 
     # Fallback: sometimes meta tags hold coords
     meta_lat = soup.find("meta", {"property": "place:location:latitude"})
@@ -52,6 +42,23 @@ def extract_coords_from_map(soup: BeautifulSoup) -> Dict[str, Optional[str]]:
 
     return {"latitude": None, "longitude": None, "mapAccuracy": None}
 
+def coords_from_script(txt: Optional[str]) -> Optional[Dict[str, Optional[str]]]:
+    """Coordinates from JSON-ish `"latitude": ..` / `"longitude": ..` text in a script, if both are present."""
+    if not txt:
+        return None
+    if "latitude" in txt and "longitude" in txt:
+        # crude parse
+        lat_match = re.search(r'"latitude"\s*:\s*("?)(-?\d+(\.\d+)?)\1', txt)
+        lon_match = re.search(r'"longitude"\s*:\s*("?)(-?\d+(\.\d+)?)\1', txt)
+        acc_match = re.search(r'"accuracy"\s*:\s*("?)(\d+(\.\d+)?)\1', txt)
+        if lat_match and lon_match:
+            return {
+                "latitude": lat_match.group(2),
+                "longitude": lon_match.group(2),
+                "mapAccuracy": acc_match.group(2) if acc_match else None,
+            }
+    return None
+
 def find_phone_numbers(text: str) -> list[str]:
     """Return unique phone-like strings found."""
     phones = list({m.group(0) for m in _PHONE_RE.finditer(text or "")})
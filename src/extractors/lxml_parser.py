@@ -0,0 +1,197 @@
+from __future__ import annotations
+
+from typing import Dict, Iterator, List, Optional, Union
+import re
+
+from bs4 import UnicodeDammit
+from lxml import etree, html as lxml_html
+
+from .craigslist_list_parser import _price_text, build_item, id_from_url
+from .craigslist_post_parser import build_post_record, clean_body, collect_attributes, post_id_from
+from .geo_utils import coords_from_script
+from .text_rules import POST_ID_TEXT_RE
+
+# Fast parser backend: same records as the BeautifulSoup functions, but each
+# CSS selector the bs4 path uses is translated once into a compiled XPath.
+
+_SKIP_TEXT_TAGS = frozenset(("script", "style", "template"))
+# lxml rejects str input that still carries its XML encoding declaration
+_XML_DECL_RE = re.compile(r"^\s*<\?xml[^>]*\?>")
+
+def _cls(name: str) -> str:
+    return f"contains(concat(' ', normalize-space(@class), ' '), ' {name} ')"
+
+_X = etree.XPath
+
+# List page
+_ROWS = _X(f"//*[{_cls('result-row')}]")
+_ROWS_CL = _X(f"//li[{_cls('cl-search-result')}]")
+_ROWS_UL = _X(f"//ul[{_cls('rows')}]//li[{_cls('result-row')}]")
+_ROW_LINK = (_X(f".//a[{_cls('result-title')}]"), _X(f".//a[{_cls('cl-app-anchor')}]"), _X(".//a[@href]"))
+_ROW_TIME = (_X(".//time"), _X(f".//*[{_cls('result-date')}]"))
+_ROW_PRICE = (_X(f".//*[{_cls('result-price')}]"), _X(f".//*[{_cls('price')}]"))
+_ROW_HOOD = (_X(f".//*[{_cls('result-hood')}]"), _X(f".//*[{_cls('nearby')}]"))
+_ROW_CAT = (_X(f".//*[{_cls('category')}]"), _X(".//*[@data-cat]"))
+_ROW_SNIPPET = (_X(f".//*[{_cls('result-description')}]"), _X(f".//*[{_cls('snippet')}]"))
+
+# Post page
+_TITLE = (_X("//*[@id='titletextonly']"), _X("//h1"))
+_PRICE = (_X(f"//*[{_cls('price')}]"), _X(f"//*[{_cls('buyprice')}]"), _X(f"//*[{_cls('attrgroup')}]//*[{_cls('price')}]"))
+_HOOD_SMALL = _X(f"//*[{_cls('postingtitletext')}]//small")
+_MAPADDRESS = _X(f"//*[{_cls('mapaddress')}]")
+_TIME = _X("//time")
+_META_TIME = (_X("//meta[@property='og:updated_time']"), _X("//meta[@property='article:published_time']"))
+_POSTINGINFO = _X(f"//*[{_cls('postinginfos')}]//*[{_cls('postinginfo')}]")
+_ALL_STRINGS = _X("//text() | //comment()")
+_BODY = (_X("//*[@id='postingbody']"), _X(f"//*[{_cls('userbody')}]"), _X(f"//*[{_cls('description')}]"))
+_IMG_SRC = _X("//img")
+_ATTRGROUPS = _X(f"//*[{_cls('attrgroup')}]")
+_SPANS = _X(".//span")
+_MAP = (_X("//*[@id='map']"), _X("//*[@id='mapcontainer']//*[@id='map']"))
+_SCRIPTS = _X("//script")
+_META_LAT = _X("//meta[@property='place:location:latitude']")
+_META_LON = _X("//meta[@property='place:location:longitude']")
+
+def parse_html(markup: Union[str, bytes]):
+    """
+    Parse a full HTML document with lxml; empty input yields an empty document.
+    Bytes are decoded the way bs4 decodes them (declared charset, else
+    UTF-8, else Windows-1252); lxml alone would read undeclared UTF-8 as
+    latin-1.
+    """
+    if isinstance(markup, bytes):
+        markup = UnicodeDammit(markup, is_html=True).unicode_markup if markup else ""
+    markup = _XML_DECL_RE.sub("", markup, count=1)
+    try:
+        return lxml_html.document_fromstring(markup)
+    except (etree.ParserError, ValueError):
+        return lxml_html.document_fromstring("<html></html>")
+
+def _first(node, *xpaths):
+    """Like `select_one(a) or select_one(b)`: first match of the first selector that matches."""
+    for xp in xpaths:
+        found = xp(node)
+        if found:
+            return found[0]
+    return None
+
+def _iter_text(el) -> Iterator[str]:
+    if el.text:
+        yield el.text
+    for child in el:
+        # Comments/PIs have non-string tags; script/style text is not page text
+        if isinstance(child.tag, str) and child.tag not in _SKIP_TEXT_TAGS:
+            yield from _iter_text(child)
+        if child.tail:
+            yield child.tail
+
+def _text(el) -> str:
+    """Equivalent of bs4's `el.get_text(" ", strip=True)`."""
+    if el is None:
+        return ""
+    # Like bs4, an element inside a template (or script/style) has no page text
+    if next(el.iterancestors(*_SKIP_TEXT_TAGS), None) is not None:
+        return ""
+    return " ".join(s for s in (t.strip() for t in _iter_text(el)) if s).strip()
+
+def parse_list_tree(doc, *, source_url: str) -> List[Dict]:
+    items: List[Dict] = []
+    rows = _ROWS(doc) or _ROWS_CL(doc) or []
+    if not rows:
+        rows = _ROWS_UL(doc)
+
+    for row in rows:
+        link = _first(row, *_ROW_LINK)
+        url = link.get("href") if link is not None and "href" in link.attrib else None
+        cid = row.get("data-pid") or row.get("data-id") or id_from_url(url)
+
+        time_el = _first(row, *_ROW_TIME)
+        if time_el is not None and "datetime" in time_el.attrib:
+            datetime = time_el.get("datetime")
+        else:
+            datetime = _text(time_el) or None
+
+        hood_el = _first(row, *_ROW_HOOD)
+        cat_el = _first(row, *_ROW_CAT)
+
+        item = build_item(
+            url=url,
+            cid=cid,
+            title=_text(link),
+            datetime=datetime,
+            price=_price_text(_text(_first(row, *_ROW_PRICE))),
+            location=_text(hood_el).strip("()") if hood_el is not None else None,
+            category=cat_el.get("data-cat") if cat_el is not None else None,
+            snippet=_text(_first(row, *_ROW_SNIPPET)),
+        )
+        if item is not None:
+            items.append(item)
+    return items
+
+def _post_id_markup(doc) -> Optional[str]:
+    info = _first(doc, _POSTINGINFO)
+    if info is not None:
+        return lxml_html.tostring(info, encoding=str, with_tail=False)
+    for node in _ALL_STRINGS(doc):
+        text = node.text if isinstance(node, etree._Comment) else str(node)
+        if text and POST_ID_TEXT_RE.search(text):
+            return text
+    return None
+
+def _datetime(doc) -> Optional[str]:
+    time_el = _first(doc, _TIME)
+    if time_el is not None and "datetime" in time_el.attrib:
+        return time_el.get("datetime")
+    meta = _first(doc, *_META_TIME)
+    if meta is not None and "content" in meta.attrib:
+        return meta.get("content")
+    return None
+
+def _coords(doc) -> Dict[str, Optional[str]]:
+    m = _first(doc, *_MAP)
+    if m is not None:
+        return {
+            "latitude": m.get("data-latitude"),
+            "longitude": m.get("data-longitude"),
+            "mapAccuracy": m.get("data-accuracy") or m.get("data-accuracy-meters"),
+        }
+    for sc in _SCRIPTS(doc):
+        coords = coords_from_script(sc.text)
+        if coords:
+            return coords
+    meta_lat = _first(doc, _META_LAT)
+    meta_lon = _first(doc, _META_LON)
+    if meta_lat is not None and meta_lon is not None and meta_lat.get("content") and meta_lon.get("content"):
+        return {"latitude": meta_lat.get("content"), "longitude": meta_lon.get("content"), "mapAccuracy": None}
+    return {"latitude": None, "longitude": None, "mapAccuracy": None}
+
+def parse_post_tree(doc, *, source_url: str) -> Dict:
+    title = _text(_first(doc, _TITLE[0])) or _text(_first(doc, _TITLE[1])) or None
+    price = _text(_first(doc, *_PRICE)) or None
+    location = (_text(_first(doc, _HOOD_SMALL)) or _text(_first(doc, _MAPADDRESS))).strip("()") or None
+    body_el = _first(doc, *_BODY)
+    body = clean_body(_text(body_el)) if body_el is not None else None
+
+    attrs = collect_attributes(
+        (img.get("src") for img in _IMG_SRC(doc)),
+        (_text(span) for group in _ATTRGROUPS(doc) for span in _SPANS(group)),
+    )
+    return build_post_record(
+        source_url=source_url,
+        pid=post_id_from(_post_id_markup(doc), source_url),
+        title=title,
+        dt=_datetime(doc),
+        location=location,
+        price=price,
+        body=body,
+        coords=_coords(doc),
+        attrs=attrs,
+    )
+
+def parse_list_page(markup: Union[str, bytes], *, source_url: str) -> List[Dict]:
+    """lxml counterpart of `craigslist_list_parser.parse_list_page`, taking raw HTML."""
+    return parse_list_tree(parse_html(markup), source_url=source_url)
+
+def parse_post_page(markup: Union[str, bytes], *, source_url: str) -> Dict:
+    """lxml counterpart of `craigslist_post_parser.parse_post_page`, taking raw HTML."""
+    return parse_post_tree(parse_html(markup), source_url=source_url)
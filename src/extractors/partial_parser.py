@@ -0,0 +1,140 @@
+from __future__ import annotations
+
+from typing import Dict, Optional, Union
+import re
+
+from bs4 import BeautifulSoup, SoupStrainer
+
+from .craigslist_post_parser import (
+    _get_body,
+    _get_datetime,
+    _get_location,
+    _get_price,
+    _get_title,
+    _parse_attributes,
+    build_post_record,
+    post_id_from,
+)
+from .geo_utils import extract_coords_from_map
+from .text_rules import POST_ID_TEXT_RE
+
+# Partial-tree backend for post pages: BeautifulSoup only materializes the
+# subtrees the bs4 extractors read (title, price, time, body, attribute
+# groups, map, posting info, gallery images), and returns exactly the same
+# record. Every selector they use is a class, id or tag name (or a
+# descendant of one), so keeping each matching element with its whole
+# subtree, in document order, leaves every `select_one`/`find` with the same
+# first hit.
+
+Markup = Union[str, bytes]
+
+# Templates are kept whole: bs4 gives elements inside one no text, so a
+# `.price` in a template must still shadow the ones after it
+_KEEP_TAGS = frozenset(("h1", "time", "template"))
+_KEEP_IDS = frozenset(("titletextonly", "postingbody", "map"))
+_KEEP_CLASSES = frozenset(("price", "buyprice", "attrgroup", "postingtitletext", "mapaddress", "postinginfos"))
+# Body fallbacks when there is no #postingbody; `.userbody` wraps most of the page
+_BODY_FALLBACK_CLASSES = frozenset(("userbody", "description"))
+_KEEP_META = frozenset((
+    "og:updated_time", "article:published_time", "place:location:latitude", "place:location:longitude",
+))
+
+_POST_ID_BYTES_RE = re.compile(POST_ID_TEXT_RE.pattern.encode(), re.I)
+_MAP_ID_RE = re.compile(r"""\bid\s*=\s*["']?map["'\s/>]""", re.I)
+_MAP_ID_BYTES_RE = re.compile(_MAP_ID_RE.pattern.encode(), re.I)
+
+class _PostPageStrainer(SoupStrainer):
+    """
+    Decides per top-level tag (anything not already inside a kept subtree)
+    whether BeautifulSoup builds it. Implements both the pre-4.13
+    (`search_tag`) and the 4.13+ (`allow_tag_creation`) parse_only hooks.
+    """
+
+    def __init__(self, scripts: bool, body_fallbacks: bool):
+        super().__init__()
+        self.scripts = scripts
+        self.classes = _KEEP_CLASSES | _BODY_FALLBACK_CLASSES if body_fallbacks else _KEEP_CLASSES
+
+    def keep(self, name: str, attrs) -> bool:
+        if name in _KEEP_TAGS:
+            return True
+        attrs = attrs or {}
+        if name == "img":
+            # Only gallery images end up in `pics`; skip header/footer chrome
+            return "images.craigslist.org" in (attrs.get("src") or "")
+        if name == "meta":
+            return attrs.get("property") in _KEEP_META
+        if name == "script" and self.scripts:
+            return True
+        if attrs.get("id") in _KEEP_IDS:
+            return True
+        classes = attrs.get("class")
+        if not classes:
+            return False
+        if isinstance(classes, str):
+            classes = classes.split()
+        return not self.classes.isdisjoint(classes)
+
+    def search_tag(self, markup_name=None, markup_attrs={}):  # noqa: B006 - bs4 < 4.13 signature
+        return self.keep(markup_name, markup_attrs)
+
+    def allow_tag_creation(self, nsprefix, name, attrs) -> bool:
+        return self.keep(name, attrs)
+
+    def allow_string_creation(self, string) -> bool:
+        return False
+
+def _contains(markup: Markup, token: str) -> bool:
+    return (token.encode() if isinstance(markup, bytes) else token) in markup
+
+def _may_mention_post_id(markup: Markup) -> bool:
+    # "&#" covers a space written as a character reference, which the raw text would hide
+    if isinstance(markup, bytes):
+        return bool(_POST_ID_BYTES_RE.search(markup)) or b"&#" in markup
+    return bool(POST_ID_TEXT_RE.search(markup)) or "&#" in markup
+
+def _has_map_div(markup: Markup) -> bool:
+    return bool((_MAP_ID_BYTES_RE if isinstance(markup, bytes) else _MAP_ID_RE).search(markup))
+
+def partial_soup(markup: Markup) -> BeautifulSoup:
+    """
+    The subset of the page the post extractors read. Scripts (map JSON) and
+    the `.userbody`/`.description` body fallbacks are only built when a cheap
+    scan of the raw HTML says they may be needed: no `#map` element, but
+    "latitude" and "longitude" somewhere; no "postingbody" anywhere. If the
+    tree then lacks `#map` or `#postingbody` after all (the text was in a
+    comment, say), the page is parsed again with them.
+    """
+    may_have_map_json = _contains(markup, "latitude") and _contains(markup, "longitude")
+    scripts = may_have_map_json and not _has_map_div(markup)
+    body_fallbacks = not _contains(markup, "postingbody")
+    soup = BeautifulSoup(markup, "lxml", parse_only=_PostPageStrainer(scripts, body_fallbacks))
+    need_scripts = not scripts and may_have_map_json and soup.select_one("#map") is None
+    need_fallbacks = not body_fallbacks and soup.select_one("#postingbody") is None
+    if need_scripts or need_fallbacks:
+        soup = BeautifulSoup(markup, "lxml", parse_only=_PostPageStrainer(
+            scripts or need_scripts, body_fallbacks or need_fallbacks
+        ))
+    return soup
+
+def parse_post_page(markup: Markup, *, source_url: str) -> Dict:
+    """Same record as the bs4 backend, from a partial tree."""
+    soup = partial_soup(markup)
+
+    id_el = soup.select_one(".postinginfos .postinginfo")
+    if id_el is None and _may_mention_post_id(markup):
+        # The bs4 backend falls back to the first "post id" text anywhere; that needs the whole page
+        id_el = BeautifulSoup(markup, "lxml").find(string=POST_ID_TEXT_RE)
+    pid: Optional[str] = post_id_from(str(id_el) if id_el else None, source_url)
+
+    return build_post_record(
+        source_url=source_url,
+        pid=pid,
+        title=_get_title(soup),
+        dt=_get_datetime(soup),
+        location=_get_location(soup),
+        price=_get_price(soup),
+        body=_get_body(soup),
+        coords=extract_coords_from_map(soup),
+        attrs=_parse_attributes(soup),
+    )
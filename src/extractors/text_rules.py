@@ -0,0 +1,69 @@
+from __future__ import annotations
+
+from typing import Dict, List, Optional
+import re
+
+from .geo_utils import _PHONE_RE
+
+# One alternation covers every body heuristic, so a post body is scanned once
+# instead of once per rule. The alternatives cannot overlap: phones start with
+# a digit, "+" or "(", the keywords with a letter. The leading lookahead lets
+# the engine skip every other position without trying the alternatives, which
+# is where the time went. Employment-type tokens match ASCII-case-insensitively,
+# which is exactly `token in body.lower()` for them.
+_BODY_SCAN_RE = re.compile(
+    r"(?=[\d+(cpsf])(?:"
+    rf"(?P<phone>{_PHONE_RE.pattern})"
+    r"|(?P<comp>compensation|pay|salary)"
+    r"|(?a:(?P<full>full-time)|(?P<part>part-time)))",
+    re.I,
+)
+
+# Applied at a keyword hit to capture the value exactly as the standalone rule did
+_COMPENSATION_RE = re.compile(r"(?:compensation|pay|salary)\s*[:\-]\s*([^\n\r]+)", re.I)
+
+JOB_TITLE_MARKERS_RE = re.compile(r"\*+|~+|\[.*?\]|\(.*?\)")
+POST_ID_TEXT_RE = re.compile(r"post id", re.I)
+AMENITY_RE = re.compile(r"furnished|air|w/d|dishwasher|parking|apartment|condo|private|shared|studio")
+
+def scan_post_body(body: str) -> Dict:
+    """
+    Single pass over a post body. Returns:
+      - phones: unique phone-like strings (as `find_phone_numbers`)
+      - compensation: raw text after the first "pay:"/"salary -"/... marker, or None
+      - fullTime / partTime: whether those tokens occur
+    """
+    phones = set()
+    compensation: Optional[str] = None
+    full_time = part_time = False
+    for m in _BODY_SCAN_RE.finditer(body):
+        kind = m.lastgroup
+        if kind == "phone":
+            phones.add(m.group(0))
+        elif kind == "comp":
+            if compensation is None:
+                comp = _COMPENSATION_RE.match(body, m.start())
+                if comp:
+                    compensation = comp.group(1)
+        elif kind == "full":
+            full_time = True
+        else:
+            part_time = True
+    phone_list: List[str] = list(phones)
+    return {"phones": phone_list, "compensation": compensation, "fullTime": full_time, "partTime": part_time}
+
+# Result count on a search page: the legacy `<span class="totalcount">3000</span>`
+# or the "1 - 120 of 3,456" range text of the current layout.
+TOTAL_COUNT_RE = re.compile(
+    r'class="totalcount"[^>]*>\s*(?P<count>\d[\d,]*)\s*<'
+    r"|\b\d[\d,]*\s*-\s*\d[\d,]*\s+of\s+(?P<range_total>\d[\d,]*)\b"
+)
+
+def parse_total_count(html) -> Optional[int]:
+    """Total results a search page reports, or None when it does not say."""
+    if isinstance(html, bytes):
+        html = html.decode("utf-8", "replace")
+    m = TOTAL_COUNT_RE.search(html)
+    if m is None:
+        return None
+    return int((m.group("count") or m.group("range_total")).replace(",", ""))
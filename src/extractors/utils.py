@@ -1,10 +1,10 @@
-thonimport logging
+import logging
 
-def setup_logging():
-    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+def setup_logging(level=logging.INFO):
+    logging.basicConfig(level=level, format='%(asctime)s - %(levelname)s - %(message)s')
 
 def log_error(message):
     logging.error(message)
 
 def log_info(message):
-    logging.info(message)
\ No newline at end of file
+    logging.info(message)
@@ -0,0 +1,180 @@
+from __future__ import annotations
+
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Callable, Dict, Iterable, List, Optional
+from urllib.parse import urlsplit
+import asyncio
+import logging
+import threading
+import time
+
+import requests
+
+from .http_client import DEFAULT_HEADERS, HttpClient  # noqa: F401 - DEFAULT_HEADERS re-exported
+
+logger = logging.getLogger(__name__)
+
+@dataclass
+class FetchResult:
+    url: str
+    status: Optional[int] = None
+    text: Optional[str] = None
+    error: Optional[str] = None
+    size: int = 0
+    elapsed: float = 0.0
+
+    @property
+    def ok(self) -> bool:
+        return self.status == 200 and self.text is not None
+
+class TokenBucket:
+    """
+    Token bucket: refills `rate` tokens per second up to `capacity`.
+    Each caller books the next token (the balance may go negative) and sleeps
+    until it is due, so waiters are served in arrival order. Bookings are
+    plain thread-safe arithmetic, so one bucket limits async callers
+    (`acquire`, across event loops) and blocking threads (`take`) together.
+    """
+
+    def __init__(self, rate: float, capacity: Optional[float] = None):
+        if rate <= 0:
+            raise ValueError("rate must be positive")
+        self.rate = float(rate)
+        self.capacity = float(capacity) if capacity is not None else max(1.0, self.rate)
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _book(self) -> float:
+        """Take one token; returns the seconds until it is actually available."""
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate) - 1
+            self._updated = now
+            return max(0.0, -self._tokens / self.rate)
+
+    async def acquire(self) -> None:
+        wait = self._book()
+        if wait:
+            await asyncio.sleep(wait)
+
+    def take(self) -> None:
+        """Blocking `acquire` for threads."""
+        wait = self._book()
+        if wait:
+            time.sleep(wait)
+
+class AsyncFetcher:
+    """
+    Concurrent page fetcher built on asyncio.
+
+    Requests go through an `HttpClient` (pooled keep-alive connections,
+    retries with backoff, proxy rotation), run on a thread pool sized to
+    `max_in_flight`, and are throttled by a token bucket per host (e.g. one
+    bucket for `newyork.craigslist.org`, kept for the fetcher's lifetime, so
+    reuse one fetcher for a whole crawl). Results come back in the order the
+    URLs were given, regardless of completion order. Pass `client` to share
+    one client (and its proxy health) with other fetch paths; otherwise one
+    is built from `timeout`, `proxies` and `headers`.
+
+    Pass `fetch` (a `url -> html or None` callable such as `CachedFetcher`)
+    to route requests through it instead of the built-in session; the
+    callable then does its own byte accounting, so `size` stays 0.
+    """
+
+    def __init__(
+        self,
+        max_in_flight: int = 8,
+        rate_per_host: float = 1.0,
+        burst: Optional[float] = None,
+        timeout: float = 20,
+        proxies=None,
+        headers: Optional[Dict[str, str]] = None,
+        fetch: Optional[Callable[[str], Optional[str]]] = None,
+        client: Optional[HttpClient] = None,
+    ):
+        if max_in_flight < 1:
+            raise ValueError("max_in_flight must be >= 1")
+        self.max_in_flight = max_in_flight
+        self.rate_per_host = rate_per_host
+        self.burst = burst
+        self.timeout = timeout
+        self.proxies = proxies
+        self.fetch = fetch
+        self._owns_client = client is None
+        self.client = client or HttpClient(timeout=timeout, proxies=proxies, headers=headers, pool_size=max_in_flight)
+        self.session = self.client.session
+        self._executor = ThreadPoolExecutor(max_workers=max_in_flight, thread_name_prefix="fetch")
+        self._buckets: Dict[str, TokenBucket] = {}
+        self._buckets_lock = threading.Lock()
+
+    def _bucket(self, url: str) -> TokenBucket:
+        host = urlsplit(url).netloc.lower()
+        with self._buckets_lock:
+            bucket = self._buckets.get(host)
+            if bucket is None:
+                bucket = self._buckets[host] = TokenBucket(self.rate_per_host, self.burst)
+        return bucket
+
+    def throttle(self, url: str) -> None:
+        """
+        Block until `url`'s host may take one more request, so synchronous
+        fetch paths stay within the same per-host rate as `fetch_all`.
+        """
+        self._bucket(url).take()
+
+    def _get(self, url: str) -> FetchResult:
+        started = time.monotonic()
+        if self.fetch is not None:
+            text = self.fetch(url)
+            return FetchResult(
+                url=url,
+                status=200 if text is not None else None,
+                text=text,
+                elapsed=time.monotonic() - started,
+            )
+        try:
+            resp = self.client.get(url, timeout=self.timeout)
+        except requests.RequestException as e:
+            logger.error("Request failed for %s: %s", url, e)
+            return FetchResult(url=url, error=str(e), elapsed=time.monotonic() - started)
+        if resp.status_code != 200:
+            logger.warning("Non-200 for %s: %s", url, resp.status_code)
+        return FetchResult(
+            url=url,
+            status=resp.status_code,
+            text=resp.text,
+            size=len(resp.content),
+            elapsed=time.monotonic() - started,
+        )
+
+    async def _fetch_one(self, url: str, slots: asyncio.Semaphore) -> FetchResult:
+        await self._bucket(url).acquire()
+        async with slots:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self._executor, self._get, url)
+
+    async def fetch_all(self, urls: Iterable[str]) -> List[FetchResult]:
+        """
+        Fetch every URL concurrently; the result list matches the input order.
+        The per-host buckets live as long as the fetcher, so the rate holds
+        across calls.
+        """
+        slots = asyncio.Semaphore(self.max_in_flight)
+        return list(await asyncio.gather(*(self._fetch_one(u, slots) for u in urls)))
+
+    def run(self, urls: Iterable[str]) -> List[FetchResult]:
+        """Blocking wrapper around `fetch_all` for synchronous callers."""
+        return asyncio.run(self.fetch_all(urls))
+
+    def close(self) -> None:
+        self._executor.shutdown(wait=True)
+        if self._owns_client:
+            self.client.close()
+
+    def __enter__(self) -> "AsyncFetcher":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
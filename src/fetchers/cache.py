@@ -0,0 +1,221 @@
+from __future__ import annotations
+
+from typing import Dict, Iterator, Optional, Tuple
+import logging
+import os
+import sqlite3
+import threading
+import time
+import zlib
+
+import requests
+
+from config.settings import DATA_DIR
+from .http_client import HttpClient
+
+logger = logging.getLogger(__name__)
+
+class ResponseCache:
+    """
+    On-disk cache of raw HTML responses keyed by URL (SQLite, zlib-compressed).
+
+    Entries keep the `ETag`/`Last-Modified` validators so stale pages can be
+    revalidated with a conditional GET. Entries older than `ttl` seconds are
+    stale; when the stored (compressed) size exceeds `max_bytes`, the least
+    recently used entries are evicted. A read only rewrites an entry's access
+    stamp once it is older than `ttl / 2` (`access_interval` when given), so
+    hot entries are not written and committed on every hit; LRU order is kept
+    to that resolution.
+    """
+
+    def __init__(
+        self,
+        path: str = os.path.join(DATA_DIR, "http_cache.sqlite3"),
+        ttl: float = 3600,
+        max_bytes: Optional[int] = 512 * 2**20,
+        access_interval: Optional[float] = None,
+    ):
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self.path = path
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        if access_interval is None:
+            access_interval = ttl / 2 if ttl else 60.0
+        self.access_interval = access_interval
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            """CREATE TABLE IF NOT EXISTS responses (
+                url TEXT PRIMARY KEY,
+                status INTEGER NOT NULL,
+                body BLOB NOT NULL,
+                size INTEGER NOT NULL,
+                etag TEXT,
+                last_modified TEXT,
+                fetched_at REAL NOT NULL,
+                last_access REAL NOT NULL
+            )"""
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS responses_lru ON responses (last_access)")
+        self._conn.commit()
+        # Stored bytes, kept up to date by put/evict so a write never sums the whole table
+        self._bytes = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+
+    def get(self, url: str) -> Optional[Dict]:
+        """Cached entry for `url` (with decompressed `text` and a `fresh` flag), or None."""
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT status, body, etag, last_modified, fetched_at, last_access FROM responses WHERE url = ?",
+                (url,),
+            ).fetchone()
+            if row is None:
+                return None
+            if now - row[5] >= self.access_interval:
+                self._conn.execute("UPDATE responses SET last_access = ? WHERE url = ?", (now, url))
+                self._conn.commit()
+        status, body, etag, last_modified, fetched_at, _ = row
+        return {
+            "url": url,
+            "status": status,
+            "text": zlib.decompress(body).decode("utf-8"),
+            "etag": etag,
+            "lastModified": last_modified,
+            "fetchedAt": fetched_at,
+            "fresh": self.ttl is None or now - fetched_at < self.ttl,
+        }
+
+    def put(self, url: str, text: str, status: int = 200, etag: Optional[str] = None, last_modified: Optional[str] = None) -> None:
+        body = zlib.compress(text.encode("utf-8"), 6)
+        now = time.time()
+        with self._lock:
+            old = self._conn.execute("SELECT size FROM responses WHERE url = ?", (url,)).fetchone()
+            self._conn.execute(
+                """INSERT OR REPLACE INTO responses (url, status, body, size, etag, last_modified, fetched_at, last_access)
+                   VALUES (?, ?, ?, ?, ?, ?, ?, ?)""",
+                (url, status, body, len(body), etag, last_modified, now, now),
+            )
+            self._bytes += len(body) - (old[0] if old else 0)
+            self._evict()
+            self._conn.commit()
+
+    def touch(self, url: str) -> None:
+        """Mark an entry as revalidated (a 304 answer) without rewriting its body."""
+        now = time.time()
+        with self._lock:
+            self._conn.execute("UPDATE responses SET fetched_at = ?, last_access = ? WHERE url = ?", (now, now, url))
+            self._conn.commit()
+
+    def _evict(self) -> None:
+        if not self.max_bytes:
+            return
+        if self._bytes <= self.max_bytes:
+            return
+        excess = self._bytes - self.max_bytes
+        victims = []
+        for url, size in self._conn.execute("SELECT url, size FROM responses ORDER BY last_access ASC"):
+            victims.append((url,))
+            excess -= size
+            self._bytes -= size
+            if excess <= 0:
+                break
+        self._conn.executemany("DELETE FROM responses WHERE url = ?", victims)
+        logger.debug("Evicted %d cached response(s)", len(victims))
+
+    def items(self, prefix: str = "") -> Iterator[Tuple[str, str]]:
+        """Yield `(url, html)` for cached 200 responses whose URL starts with `prefix`."""
+        with self._lock:
+            urls = [r[0] for r in self._conn.execute(
+                "SELECT url FROM responses WHERE status = 200 AND url >= ? AND url < ? ORDER BY url",
+                (prefix, prefix + "\U0010ffff"),
+            )]
+        for url in urls:
+            entry = self.get(url)
+            if entry is not None:
+                yield url, entry["text"]
+
+    def size(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM responses").fetchone()[0]
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+class CachedFetcher:
+    """
+    `fetch(url) -> html or None` backed by a `ResponseCache`.
+
+    Fresh entries are served from disk. Stale ones are revalidated with
+    `If-None-Match`/`If-Modified-Since`; a 304 refreshes the entry. With
+    `offline=True` (replay mode) the network is never touched and misses
+    return None, so a whole crawl can be re-parsed from the cache.
+
+    `session` is anything with `Session.get`'s signature; by default an
+    `HttpClient` built from `timeout` and `proxies` (retries, proxy rotation).
+    """
+
+    def __init__(
+        self,
+        cache: ResponseCache,
+        session=None,
+        offline: bool = False,
+        timeout: float = 20,
+        proxies: Optional[Dict[str, str]] = None,
+    ):
+        self.cache = cache
+        if session is None:
+            # The client rotates through `proxies` itself
+            session, proxies = HttpClient(timeout=timeout, proxies=proxies), None
+        self.session = session
+        self.offline = offline
+        self.timeout = timeout
+        self.proxies = proxies
+        self.stats = {"hits": 0, "revalidated": 0, "misses": 0, "bytes": 0}
+        self._lock = threading.Lock()
+
+    def _count(self, key: str, n: int = 1) -> None:
+        with self._lock:
+            self.stats[key] += n
+
+    def __call__(self, url: str) -> Optional[str]:
+        return self.fetch(url)
+
+    def fetch(self, url: str) -> Optional[str]:
+        entry = self.cache.get(url)
+        if entry is not None and (entry["fresh"] or self.offline):
+            self._count("hits")
+            return entry["text"] if entry["status"] == 200 else None
+        if self.offline:
+            self._count("misses")
+            logger.warning("Replay miss (not cached): %s", url)
+            return None
+
+        headers = {}
+        if entry is not None:
+            if entry["etag"]:
+                headers["If-None-Match"] = entry["etag"]
+            if entry["lastModified"]:
+                headers["If-Modified-Since"] = entry["lastModified"]
+        try:
+            resp = self.session.get(url, headers=headers, proxies=self.proxies, timeout=self.timeout)
+        except requests.RequestException as e:
+            logger.error("Request failed for %s: %s", url, e)
+            return None
+        self._count("bytes", len(resp.content))
+        if resp.status_code == 304 and entry is not None:
+            self._count("revalidated")
+            self.cache.touch(url)
+            return entry["text"]
+        self._count("misses")
+        if resp.status_code != 200:
+            logger.warning("Non-200 for %s: %s", url, resp.status_code)
+            return None
+        self.cache.put(url, resp.text, resp.status_code, resp.headers.get("ETag"), resp.headers.get("Last-Modified"))
+        return resp.text
@@ -0,0 +1,264 @@
+from __future__ import annotations
+
+from email.utils import parsedate_to_datetime
+from typing import Callable, Dict, List, Mapping, Optional, Sequence, Union
+import logging
+import random
+import threading
+import time
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from metrics import NULL_METRICS
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_HEADERS = {
+    "User-Agent": "Mozilla/5.0 (compatible; BitbashCraigslistScraper/1.0; +https://bitbash.dev)",
+}
+
+# Worth another attempt: rate limiting and transient server errors
+RETRY_STATUSES = frozenset({429, 500, 502, 503, 504})
+
+ProxyMap = Dict[str, str]
+
+def _as_proxy_map(entry: Union[str, Mapping[str, str]]) -> ProxyMap:
+    if isinstance(entry, str):
+        return {"http": entry, "https": entry}
+    return dict(entry)
+
+class _ProxyHealth:
+    __slots__ = ("proxies", "score", "failures", "evicted_until", "evictions")
+
+    def __init__(self, proxies: ProxyMap):
+        self.proxies = proxies
+        self.score = 1.0
+        self.failures = 0  # consecutive
+        self.evicted_until = 0.0
+        self.evictions = 0
+
+class ProxyPool:
+    """
+    Round-robin proxy rotation with health scores.
+
+    Each success nudges a proxy's score up and clears its failure streak;
+    each failure halves the score. After `max_failures` consecutive failures
+    the proxy is evicted for `cooldown` seconds, doubling on every repeat
+    eviction. If every proxy is evicted, the one that comes back first is
+    used rather than stalling the crawl.
+    """
+
+    def __init__(self, proxies: Sequence[Union[str, Mapping[str, str]]], max_failures: int = 3, cooldown: float = 60.0):
+        self._entries = [_ProxyHealth(_as_proxy_map(p)) for p in proxies]
+        self.max_failures = max(1, max_failures)
+        self.cooldown = cooldown
+        self._next = 0
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_config(cls, config, **kwargs) -> "ProxyPool":
+        """
+        Build a pool from `PROXY_CONFIG`: None (direct connections), one
+        requests-style `{"http": ..., "https": ...}` mapping, or a list of
+        proxy URLs and/or such mappings.
+        """
+        if not config:
+            return cls([], **kwargs)
+        if isinstance(config, (str, Mapping)):
+            return cls([config], **kwargs)
+        return cls(list(config), **kwargs)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def healthy(self) -> int:
+        now = time.monotonic()
+        with self._lock:
+            return sum(1 for e in self._entries if e.evicted_until <= now)
+
+    def acquire(self) -> Optional[ProxyMap]:
+        """Next healthy proxy mapping, or None when the pool is empty (go direct)."""
+        if not self._entries:
+            return None
+        now = time.monotonic()
+        with self._lock:
+            n = len(self._entries)
+            for step in range(n):
+                entry = self._entries[(self._next + step) % n]
+                if entry.evicted_until <= now:
+                    self._next = (self._next + step + 1) % n
+                    return entry.proxies
+            entry = min(self._entries, key=lambda e: e.evicted_until)
+            logger.warning("All %d proxies are evicted; using the one recovering first", n)
+            return entry.proxies
+
+    def _entry(self, proxies: Optional[ProxyMap]) -> Optional[_ProxyHealth]:
+        for entry in self._entries:
+            if entry.proxies == proxies:
+                return entry
+        return None
+
+    def report(self, proxies: Optional[ProxyMap], ok: bool) -> None:
+        entry = self._entry(proxies)
+        if entry is None:
+            return
+        with self._lock:
+            if ok:
+                entry.failures = 0
+                entry.score = min(1.0, entry.score + 0.1)
+                return
+            entry.failures += 1
+            entry.score /= 2
+            if entry.failures >= self.max_failures:
+                delay = self.cooldown * 2 ** entry.evictions
+                entry.evicted_until = time.monotonic() + delay
+                entry.evictions += 1
+                entry.failures = 0
+                logger.warning("Evicting proxy %s for %.0fs after repeated failures", entry.proxies, delay)
+
+    def scores(self) -> List[float]:
+        with self._lock:
+            return [e.score for e in self._entries]
+
+def retry_after_seconds(value: Optional[str]) -> Optional[float]:
+    """Parse a `Retry-After` header (delta seconds or HTTP date)."""
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError, IndexError, OverflowError):
+        return None
+
+class HttpClient:
+    """
+    Shared HTTP layer for every fetch path.
+
+    One `requests.Session` keeps keep-alive connections pooled per host (up
+    to `pool_size` each), every request has a timeout, and connection errors
+    or `RETRY_STATUSES` answers are retried up to `retries` times with
+    exponential backoff and full jitter, honouring `Retry-After`. Requests
+    rotate across a `ProxyPool`; proxies that keep failing are evicted.
+
+    `get()` mirrors `Session.get` (so `CachedFetcher` can use the client as
+    its session) and raises the last `requests.RequestException` once
+    retries are exhausted; `fetch()`/calling the client returns the page
+    text or None, like the other fetch callables.
+
+    With a `metrics.Metrics`, each `get()` (retries included) is timed as the
+    `fetch` stage and status codes, bytes, retries and errors are counted.
+    """
+
+    def __init__(
+        self,
+        timeout: float = 20,
+        retries: int = 3,
+        backoff: float = 0.5,
+        max_backoff: float = 30.0,
+        proxies=None,
+        headers: Optional[Dict[str, str]] = None,
+        pool_size: int = 10,
+        retry_statuses=RETRY_STATUSES,
+        sleep: Callable[[float], None] = time.sleep,
+        metrics=NULL_METRICS,
+    ):
+        self.timeout = timeout
+        self.retries = max(0, retries)
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.proxy_pool = proxies if isinstance(proxies, ProxyPool) else ProxyPool.from_config(proxies)
+        self.retry_statuses = frozenset(retry_statuses)
+        self._sleep = sleep
+        self.metrics = metrics
+        self.session = requests.Session()
+        self.session.headers.update(headers or DEFAULT_HEADERS)
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        self.stats = {"requests": 0, "retries": 0, "failures": 0, "bytes": 0}
+        self._lock = threading.Lock()
+
+    def _count(self, key: str, n: int = 1) -> None:
+        with self._lock:
+            self.stats[key] += n
+
+    def _delay(self, attempt: int, resp: Optional[requests.Response]) -> float:
+        delay = random.uniform(0, min(self.max_backoff, self.backoff * 2 ** attempt))
+        if resp is not None:
+            hinted = retry_after_seconds(resp.headers.get("Retry-After"))
+            if hinted is not None:
+                delay = max(delay, min(hinted, self.max_backoff))
+        return delay
+
+    def get(
+        self,
+        url: str,
+        headers: Optional[Dict[str, str]] = None,
+        proxies: Optional[ProxyMap] = None,
+        timeout: Optional[float] = None,
+    ) -> requests.Response:
+        """GET with retries; explicit `proxies` bypass the pool."""
+        with self.metrics.timer("fetch"):
+            return self._get(url, headers, proxies, timeout)
+
+    def _get(self, url, headers, proxies, timeout) -> requests.Response:
+        attempt = 0
+        while True:
+            chosen = proxies if proxies is not None else self.proxy_pool.acquire()
+            self._count("requests")
+            try:
+                resp = self.session.get(url, headers=headers, proxies=chosen, timeout=timeout or self.timeout)
+            except requests.RequestException as e:
+                self.metrics.inc("http_errors_total", error=type(e).__name__)
+                if proxies is None:
+                    self.proxy_pool.report(chosen, ok=False)
+                if attempt >= self.retries:
+                    self._count("failures")
+                    raise
+                delay = self._delay(attempt, None)
+                logger.warning("Request failed for %s (%s); retry %d in %.1fs", url, e, attempt + 1, delay)
+            else:
+                self._count("bytes", len(resp.content))
+                self.metrics.inc("http_responses_total", status=resp.status_code)
+                self.metrics.inc("http_bytes_total", len(resp.content))
+                if proxies is None:
+                    # A 429 is usually aimed at the proxy's IP; 5xx are the site's
+                    self.proxy_pool.report(chosen, ok=resp.status_code != 429)
+                if resp.status_code not in self.retry_statuses or attempt >= self.retries:
+                    if resp.status_code in self.retry_statuses:
+                        self._count("failures")
+                    return resp
+                delay = self._delay(attempt, resp)
+                logger.warning("HTTP %s for %s; retry %d in %.1fs", resp.status_code, url, attempt + 1, delay)
+            self._count("retries")
+            self.metrics.inc("http_retries_total")
+            self._sleep(delay)
+            attempt += 1
+
+    def fetch(self, url: str) -> Optional[str]:
+        """Page text for a 200 answer, else None (errors are logged)."""
+        try:
+            resp = self.get(url)
+        except requests.RequestException as e:
+            logger.error("Request failed for %s: %s", url, e)
+            return None
+        if resp.status_code != 200:
+            logger.warning("Non-200 for %s: %s", url, resp.status_code)
+            return None
+        return resp.text
+
+    def __call__(self, url: str) -> Optional[str]:
+        return self.fetch(url)
+
+    def close(self) -> None:
+        self.session.close()
+
+    def __enter__(self) -> "HttpClient":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
@@ -0,0 +1,384 @@
+from __future__ import annotations
+
+from bisect import bisect_left
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Iterator, List, Optional, Tuple
+import cProfile
+import json
+import logging
+import os
+import threading
+import time
+import tracemalloc
+
+logger = logging.getLogger(__name__)
+
+# Upper bounds in seconds; the last bucket (+Inf) catches everything else
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+# Stage histograms recorded by the crawl paths
+STAGES = ("fetch", "parse_list", "parse_post", "normalize", "export")
+
+LabelKey = Tuple[str, Tuple[Tuple[str, str], ...]]
+
+def _key(name: str, labels: Dict) -> LabelKey:
+    return name, tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+def _render(name: str, labels, extra: Tuple[Tuple[str, str], ...] = ()) -> str:
+    pairs = tuple(labels) + extra
+    if not pairs:
+        return name
+    body = ",".join('{}="{}"'.format(k, v.replace("\\", "\\\\").replace('"', '\\"')) for k, v in pairs)
+    return f"{name}{{{body}}}"
+
+def _le(bound: float) -> str:
+    return "+Inf" if bound == float("inf") else repr(bound)
+
+def _sample(value: float) -> str:
+    """A sample value in full precision: integral values as ints, others as `repr(float)`."""
+    if isinstance(value, int):
+        return str(value)
+    value = float(value)
+    if value != value:
+        return "NaN"
+    if value in (float("inf"), float("-inf")):
+        return "+Inf" if value > 0 else "-Inf"
+    return str(int(value)) if value.is_integer() else repr(value)
+
+class Histogram:
+    """Fixed-bucket histogram (Prometheus style): per-bucket counts, sum, count and max."""
+
+    __slots__ = ("bounds", "counts", "sum", "count", "max")
+
+    def __init__(self, bounds=DEFAULT_BUCKETS):
+        self.bounds = tuple(bounds) + (float("inf"),)
+        self.counts = [0] * len(self.bounds)
+        self.sum = 0.0
+        self.count = 0
+        self.max = 0.0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect_left(self.bounds, value)] += 1
+        self.sum += value
+        self.count += 1
+        if value > self.max:
+            self.max = value
+
+    def quantile(self, q: float) -> float:
+        """Upper bound of the bucket holding the `q` quantile (capped at the observed max)."""
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        seen = 0
+        for bound, n in zip(self.bounds, self.counts):
+            seen += n
+            if seen >= rank:
+                return min(bound, self.max)
+        return self.max
+
+    def cumulative(self) -> List[Tuple[float, int]]:
+        out = []
+        seen = 0
+        for bound, n in zip(self.bounds, self.counts):
+            seen += n
+            out.append((bound, seen))
+        return out
+
+class _Timer:
+    __slots__ = ("_metrics", "_stage", "_started")
+
+    def __init__(self, metrics: "Metrics", stage: str):
+        self._metrics = metrics
+        self._stage = stage
+
+    def __enter__(self) -> "_Timer":
+        self._started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self._metrics.observe("stage_seconds", time.perf_counter() - self._started, stage=self._stage)
+
+class Metrics:
+    """
+    In-process counters, gauges and latency histograms for a crawl.
+
+    Names are snake_case and prefixed with `namespace` on export; labels are
+    keyword arguments (`inc("http_responses_total", status=200)`). Per-stage
+    latencies go into the `stage_seconds` histogram through `timer(stage)`.
+    Read the numbers with `snapshot()` (JSON-friendly), `to_prometheus()`
+    (text exposition format), `serve()` (an HTTP `/metrics` endpoint) or
+    `start_snapshots()` (a JSON file rewritten periodically). Thread-safe.
+
+    Pass `NULL_METRICS` (the default everywhere) to turn instrumentation off.
+    """
+
+    enabled = True
+
+    def __init__(self, namespace: str = "craigslist", buckets=DEFAULT_BUCKETS):
+        self.namespace = namespace
+        self.buckets = tuple(buckets)
+        self.started = time.time()
+        self._counters: Dict[LabelKey, float] = {}
+        self._gauges: Dict[LabelKey, float] = {}
+        self._histograms: Dict[LabelKey, Histogram] = {}
+        self._lock = threading.Lock()
+        self._server: Optional[ThreadingHTTPServer] = None
+        self._snapshot_stop: Optional[threading.Event] = None
+        self._snapshot_thread: Optional[threading.Thread] = None
+
+    def inc(self, name: str, n: float = 1, **labels) -> None:
+        key = _key(name, labels)
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + n
+
+    def set(self, name: str, value: float, **labels) -> None:
+        key = _key(name, labels)
+        with self._lock:
+            self._gauges[key] = value
+
+    def observe(self, name: str, value: float, **labels) -> None:
+        key = _key(name, labels)
+        with self._lock:
+            hist = self._histograms.get(key)
+            if hist is None:
+                hist = self._histograms[key] = Histogram(self.buckets)
+            hist.observe(value)
+
+    def timer(self, stage: str) -> _Timer:
+        """Context manager recording the block's wall time under `stage_seconds{stage=...}`."""
+        return _Timer(self, stage)
+
+    def summary(self) -> Dict[str, Dict[str, float]]:
+        """Per-stage totals: calls, seconds, mean, p95 and max (seconds)."""
+        out = {}
+        with self._lock:
+            for (name, labels), hist in self._histograms.items():
+                if name != "stage_seconds":
+                    continue
+                stage = dict(labels).get("stage", "")
+                out[stage] = {
+                    "count": hist.count,
+                    "seconds": hist.sum,
+                    "mean": hist.sum / hist.count if hist.count else 0.0,
+                    "p95": hist.quantile(0.95),
+                    "max": hist.max,
+                }
+        return out
+
+    def snapshot(self) -> Dict:
+        with self._lock:
+            return {
+                "timestamp": time.time(),
+                "uptimeSeconds": time.time() - self.started,
+                "counters": {_render(n, l): v for (n, l), v in self._counters.items()},
+                "gauges": {_render(n, l): v for (n, l), v in self._gauges.items()},
+                "histograms": {
+                    _render(n, l): {
+                        "count": h.count,
+                        "sum": h.sum,
+                        "max": h.max,
+                        "p50": h.quantile(0.5),
+                        "p95": h.quantile(0.95),
+                        "buckets": {_le(b): c for b, c in h.cumulative()},
+                    }
+                    for (n, l), h in self._histograms.items()
+                },
+            }
+
+    def to_prometheus(self) -> str:
+        ns = f"{self.namespace}_" if self.namespace else ""
+        lines = []
+        typed = set()
+
+        def declare(name, kind):
+            if name not in typed:
+                typed.add(name)
+                lines.append(f"# TYPE {name} {kind}")
+
+        with self._lock:
+            for (name, labels), value in sorted(self._counters.items()):
+                declare(ns + name, "counter")
+                lines.append(f"{_render(ns + name, labels)} {_sample(value)}")
+            for (name, labels), value in sorted(self._gauges.items()):
+                declare(ns + name, "gauge")
+                lines.append(f"{_render(ns + name, labels)} {_sample(value)}")
+            for (name, labels), hist in sorted(self._histograms.items()):
+                full = ns + name
+                declare(full, "histogram")
+                for bound, count in hist.cumulative():
+                    lines.append(f"{_render(full + '_bucket', labels, (('le', _le(bound)),))} {count}")
+                lines.append(f"{_render(full + '_sum', labels)} {_sample(hist.sum)}")
+                lines.append(f"{_render(full + '_count', labels)} {hist.count}")
+        return "\n".join(lines) + "\n"
+
+    def write_snapshot(self, path: str) -> None:
+        """Write `snapshot()` as JSON, atomically (readers never see a partial file)."""
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp = f"{path}.part"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(self.snapshot(), f, indent=2)
+        os.replace(tmp, path)
+
+    def start_snapshots(self, path: str, interval: float = 10.0) -> None:
+        """Rewrite `path` every `interval` seconds until `close()` (which writes a last one)."""
+        if self._snapshot_thread is not None:
+            raise RuntimeError("snapshots already running")
+        stop = threading.Event()
+
+        def loop():
+            while not stop.wait(interval):
+                try:
+                    self.write_snapshot(path)
+                except OSError as e:
+                    logger.warning("Could not write metrics snapshot %s: %s", path, e)
+            self.write_snapshot(path)
+
+        self._snapshot_stop = stop
+        self._snapshot_thread = threading.Thread(target=loop, name="metrics-snapshot", daemon=True)
+        self._snapshot_thread.start()
+
+    def serve(self, port: int = 9108, host: str = "127.0.0.1") -> ThreadingHTTPServer:
+        """Expose `to_prometheus()` at `http://host:port/metrics` (and JSON at `/metrics.json`)."""
+        metrics = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path == "/metrics":
+                    body, ctype = metrics.to_prometheus().encode(), "text/plain; version=0.0.4"
+                elif self.path == "/metrics.json":
+                    body, ctype = json.dumps(metrics.snapshot()).encode(), "application/json"
+                else:
+                    self.send_error(404)
+                    return
+                self.send_response(200)
+                self.send_header("Content-Type", ctype)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        self._server = ThreadingHTTPServer((host, port), Handler)
+        threading.Thread(target=self._server.serve_forever, name="metrics-http", daemon=True).start()
+        logger.info("Serving metrics on http://%s:%d/metrics", host, self._server.server_address[1])
+        return self._server
+
+    def close(self) -> None:
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+        if self._snapshot_thread is not None:
+            self._snapshot_stop.set()
+            self._snapshot_thread.join()
+            self._snapshot_thread = None
+
+    def __enter__(self) -> "Metrics":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+class _NullTimer:
+    __slots__ = ()
+
+    def __enter__(self) -> "_NullTimer":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        pass
+
+_NULL_TIMER = _NullTimer()
+
+class NullMetrics:
+    """Drop-in `Metrics` that records nothing; `timer()` hands back one shared no-op."""
+
+    enabled = False
+
+    def inc(self, name: str, n: float = 1, **labels) -> None:
+        pass
+
+    def set(self, name: str, value: float, **labels) -> None:
+        pass
+
+    def observe(self, name: str, value: float, **labels) -> None:
+        pass
+
+    def timer(self, stage: str) -> _NullTimer:
+        return _NULL_TIMER
+
+    def summary(self) -> Dict:
+        return {}
+
+    def snapshot(self) -> Dict:
+        return {}
+
+    def to_prometheus(self) -> str:
+        return ""
+
+    def close(self) -> None:
+        pass
+
+NULL_METRICS = NullMetrics()
+
+@contextmanager
+def profiling(prefix: str, cpu: bool = True, memory: bool = True, top: int = 30) -> Iterator[Dict[str, str]]:
+    """
+    Profile the enclosed block: cProfile stats go to `<prefix>.prof` (open
+    with `pstats` or snakeviz) and the `top` allocation sites by size plus
+    the peak traced memory to `<prefix>.mem.txt`. Yields the output paths.
+    """
+    if os.path.dirname(prefix):
+        os.makedirs(os.path.dirname(prefix), exist_ok=True)
+    paths = {}
+    profiler = cProfile.Profile() if cpu else None
+    started_tracing = memory and not tracemalloc.is_tracing()
+    if started_tracing:
+        tracemalloc.start()
+    if profiler is not None:
+        profiler.enable()
+    try:
+        yield paths
+    finally:
+        if profiler is not None:
+            profiler.disable()
+            paths["cpu"] = f"{prefix}.prof"
+            profiler.dump_stats(paths["cpu"])
+        if memory and tracemalloc.is_tracing():
+            stats = tracemalloc.take_snapshot().statistics("lineno")
+            _, peak = tracemalloc.get_traced_memory()
+            paths["memory"] = f"{prefix}.mem.txt"
+            with open(paths["memory"], "w", encoding="utf-8") as f:
+                f.write(f"peak traced memory: {peak / 2**20:.1f} MiB\n")
+                for stat in stats[:top]:
+                    f.write(f"{stat}\n")
+            if started_tracing:
+                tracemalloc.stop()
+        logger.info("Profile written to %s", ", ".join(paths.values()))
+
+def format_summary(summary: Dict[str, Dict[str, float]], wall_seconds: Optional[float] = None) -> str:
+    """
+    Render `Metrics.summary()` as a fixed-width table, crawl stages first.
+    Concurrent stages overlap, so their shares of the wall time can add up
+    to more than 100%.
+    """
+    header = f"{'stage':<12} {'calls':>8} {'total s':>9} {'mean ms':>9} {'p95 ms':>9} {'max ms':>9}"
+    if wall_seconds:
+        header += f" {'% wall':>7}"
+    lines = [header, "-" * len(header)]
+    for stage in sorted(summary, key=lambda s: (STAGES.index(s) if s in STAGES else len(STAGES), s)):
+        s = summary[stage]
+        line = (
+            f"{stage:<12} {s['count']:>8} {s['seconds']:>9.2f} {s['mean'] * 1e3:>9.2f} "
+            f"{s['p95'] * 1e3:>9.1f} {s['max'] * 1e3:>9.1f}"
+        )
+        if wall_seconds:
+            line += f" {100 * s['seconds'] / wall_seconds:>6.0f}%"
+        lines.append(line)
+    if wall_seconds is not None:
+        lines.append("-" * len(header))
+        lines.append(f"{'wall':<12} {'':>8} {wall_seconds:>9.2f}")
+    return "\n".join(lines)
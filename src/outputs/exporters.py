@@ -1,4 +1,4 @@
-thonimport json
+import json
 import csv
 
 def export_to_json(data, file_path):
@@ -9,4 +9,4 @@ def export_to_csv(data, file_path):
     with open(file_path, 'w', newline='', encoding='utf-8') as f:
         writer = csv.DictWriter(f, fieldnames=data[0].keys())
         writer.writeheader()
-        writer.writerows(data)
\ No newline at end of file
+        writer.writerows(data)
@@ -0,0 +1,147 @@
+from __future__ import annotations
+
+from typing import Dict, Iterable, List, Optional, Set
+import json
+import logging
+import os
+import time
+
+from .state_store import post_key
+
+logger = logging.getLogger(__name__)
+
+VERSION = 1
+
+def _write_atomic(path: str, data: bytes) -> None:
+    tmp = f"{path}.part"
+    with open(tmp, "wb") as f:
+        f.write(data)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
+
+class CheckpointMismatch(ValueError):
+    """The checkpoint on disk belongs to a different crawl (other search, format or output)."""
+
+class Checkpoint:
+    """
+    Durable progress of one crawl, so an interrupted run can resume.
+
+    The checkpoint is a small JSON file (rewritten atomically) holding the
+    next search page to fetch, the byte offset and record count of the
+    output's `.part` file, and the size of a sidecar `<path>.ids` file that
+    lists every emitted post id, one per line. The ids file is append-only,
+    so a commit costs the new ids rather than the whole set.
+
+    `commit()` must run after the output writer has been flushed: on resume
+    the output and the ids file are cut back to the committed sizes, so
+    anything written after the last commit is dropped and produced again,
+    never duplicated. `job` identifies the crawl; resuming with a different
+    one raises `CheckpointMismatch`.
+    """
+
+    def __init__(self, path: str, job: Dict):
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self.path = path
+        self.ids_path = f"{path}.ids"
+        self.job = dict(job)
+        self.next_page = 0
+        self.output_offset = 0
+        self.records = 0
+        self.emitted: Set[str] = set()
+        self._ids_size = 0
+        self._pending: List[str] = []
+        self._ids_out = None
+
+    @classmethod
+    def load(cls, path: str, job: Dict) -> "Checkpoint":
+        """Read a checkpoint written by `commit()`; the ids file is trimmed to the committed size."""
+        with open(path, encoding="utf-8") as f:
+            data = json.load(f)
+        if data.get("version") != VERSION:
+            raise CheckpointMismatch(f"{path}: unsupported checkpoint version {data.get('version')!r}")
+        if data["job"] != dict(job):
+            raise CheckpointMismatch(f"{path} was written for {data['job']}, not {dict(job)}")
+        ckpt = cls(path, job)
+        ckpt.next_page = data["nextPage"]
+        ckpt.output_offset = data["outputOffset"]
+        ckpt.records = data["records"]
+        ckpt._ids_size = data["idsSize"]
+        if ckpt._ids_size:
+            with open(ckpt.ids_path, "r+b") as f:
+                f.truncate(ckpt._ids_size)
+                ckpt.emitted = set(f.read().decode("utf-8").split())
+        return ckpt
+
+    @classmethod
+    def open(cls, path: str, job: Dict, resume: bool = False) -> "Checkpoint":
+        """Load `path` when resuming and it exists; otherwise start over (discarding any old one)."""
+        if resume and os.path.exists(path):
+            ckpt = cls.load(path, job)
+            logger.info("Resuming from %s: page %d, %d records", path, ckpt.next_page, ckpt.records)
+            return ckpt
+        ckpt = cls(path, job)
+        ckpt.remove()
+        return ckpt
+
+    @property
+    def resumed(self) -> bool:
+        return self.records > 0 or self.next_page > 0
+
+    def seen(self, post_id: Optional[str]) -> bool:
+        return post_id is not None and post_id in self.emitted
+
+    def emit(self, post_id: Optional[str]) -> None:
+        if post_id is not None and post_id not in self.emitted:
+            self.emitted.add(post_id)
+            self._pending.append(post_id)
+
+    def take_new(self, records: Iterable[Dict]) -> List[Dict]:
+        """Records whose post id was not emitted yet (first copy only), marking them emitted."""
+        fresh = []
+        for rec in records:
+            key = post_key(rec)
+            if not self.seen(key):
+                self.emit(key)
+                fresh.append(rec)
+        return fresh
+
+    def commit(self, output_offset: int, records: int, next_page: Optional[int] = None) -> None:
+        """Persist progress: new ids first (fsynced), then the checkpoint that points past them."""
+        if self._pending:
+            if self._ids_out is None:
+                self._ids_out = open(self.ids_path, "ab")
+                self._ids_out.truncate(self._ids_size)
+            data = ("\n".join(self._pending) + "\n").encode("utf-8")
+            self._ids_out.write(data)
+            self._ids_out.flush()
+            os.fsync(self._ids_out.fileno())
+            self._ids_size += len(data)
+            self._pending = []
+        if next_page is not None:
+            self.next_page = next_page
+        self.output_offset = output_offset
+        self.records = records
+        state = {
+            "version": VERSION,
+            "job": self.job,
+            "nextPage": self.next_page,
+            "outputOffset": self.output_offset,
+            "records": self.records,
+            "idsSize": self._ids_size,
+            "updated": time.time(),
+        }
+        _write_atomic(self.path, json.dumps(state, indent=2).encode("utf-8"))
+
+    def close(self) -> None:
+        if self._ids_out is not None:
+            self._ids_out.close()
+            self._ids_out = None
+
+    def remove(self) -> None:
+        """Delete the checkpoint (after the crawl finished, or to start over)."""
+        self.close()
+        for path in (self.path, self.ids_path):
+            if os.path.exists(path):
+                os.remove(path)
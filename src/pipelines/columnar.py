@@ -0,0 +1,84 @@
+from __future__ import annotations
+
+from typing import Dict, Iterable, List
+import os
+
+try:  # optional: only needed for Parquet/Arrow output
+    import pyarrow.parquet as pq
+except ImportError:  # pragma: no cover - depends on environment
+    pq = None
+
+# The typed schema and batch normalizer live next to `normalize_record`; re-exported here
+from .normalizers import (  # noqa: F401
+    EXTRA_FIELD, LIST_FIELDS, NUMERIC_FIELDS, PRICE_FIELDS, _require_pyarrow, normalize_batch, normalize_columns,
+    normalize_ndjson, record_schema, records_to_columns, to_number,
+)
+from .records import as_dict
+
+def records_to_table(records: Iterable[Dict]):
+    """Normalize records and build an Arrow table (see `normalize_batch`)."""
+    return normalize_batch(list(records))
+
+class ParquetWriter:
+    """
+    Streams records into a Parquet file, one row group per `row_group_size`
+    records. Like the NDJSON writer it writes `<file>.part` and renames it on
+    `close()`; only the current row group is held in memory.
+    """
+
+    def __init__(self, path: str, row_group_size: int = 10_000, compression: str = "zstd"):
+        _require_pyarrow()
+        self.path = path
+        self.row_group_size = max(1, row_group_size)
+        self.compression = compression
+        self.paths: List[str] = []
+        self.records_written = 0
+        self._schema = record_schema()
+        self._buffer: List[Dict] = []
+        self._part = path + ".part"
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._writer = pq.ParquetWriter(self._part, self._schema, compression=compression)
+
+    def write(self, record: Dict) -> None:
+        self._buffer.append(as_dict(record))
+        self.records_written += 1
+        if len(self._buffer) >= self.row_group_size:
+            self.flush()
+
+    def write_many(self, records: Iterable[Dict]) -> None:
+        for rec in records:
+            self.write(rec)
+
+    def flush(self) -> None:
+        if not self._buffer:
+            return
+        table = normalize_batch(self._buffer)
+        self._writer.write_table(table, row_group_size=self.row_group_size)
+        self._buffer = []
+
+    def close(self) -> None:
+        if self._writer is None:
+            return
+        self.flush()
+        self._writer.close()
+        self._writer = None
+        os.replace(self._part, self.path)
+        self.paths.append(self.path)
+
+    def __enter__(self) -> "ParquetWriter":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        if exc_type is None:
+            self.close()
+        elif self._writer is not None:
+            # Row groups written so far stay readable once the footer is written
+            self.flush()
+            self._writer.close()
+            self._writer = None
+
+def write_parquet(records: Iterable[Dict], path: str, **kwargs) -> List[str]:
+    with ParquetWriter(path, **kwargs) as writer:
+        writer.write_many(records)
+    return writer.paths
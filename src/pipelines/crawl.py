@@ -0,0 +1,311 @@
+from __future__ import annotations
+
+from collections import deque
+from concurrent.futures import Executor
+from typing import Callable, Collection, Deque, Dict, Iterable, Iterator, Optional
+import logging
+import queue
+import threading
+
+from extractors.backends import DEFAULT_BACKEND, parse_list_html, parse_post_html
+from extractors.text_rules import parse_total_count
+from metrics import NULL_METRICS
+from .dedup import DROP, FLAG, DedupIndex
+from .normalizers import detect_category_from_url
+from .parallel_parse import Page, ParallelParser
+from .records import Record
+from .state_store import SEEN, CrawlState, post_key
+
+logger = logging.getLogger(__name__)
+
+# Returns page HTML, or None when the page could not be fetched
+FetchFn = Callable[[str], Optional[str]]
+
+_DONE = object()
+
+def _put(q: queue.Queue, item, stop: threading.Event) -> bool:
+    """Blocking put that gives up once `stop` is set (consumer went away)."""
+    while not stop.is_set():
+        try:
+            q.put(item, timeout=0.1)
+            return True
+        except queue.Full:
+            continue
+    return False
+
+def _get(q: queue.Queue, stop: threading.Event):
+    while not stop.is_set():
+        try:
+            return q.get(timeout=0.1)
+        except queue.Empty:
+            continue
+    return _DONE
+
+class CrawlPipeline:
+    """
+    Streaming list -> detail crawl.
+
+    Stage 1 fetches list pages and feeds item URLs into a bounded queue,
+    skipping post ids it has already queued. Stage 2 is a pool of detail
+    workers that fetch and parse post pages; each record is merged with its
+    list row and normalized. Records are yielded as compact `Record`s (a
+    mapping; the writers turn them into README dicts). Both queues are bounded,
+    so a slow consumer stalls the workers and the list stage instead of
+    buffering the whole search in memory. Records are yielded in completion
+    order.
+
+    Paging stops early at the first list page without results, or once the
+    rows seen add up to the result total the search reports.
+
+    With a `CrawlState`, list rows whose post id was already stored with the
+    same `datetime`/`price` are skipped, and paging stops at the first list
+    page that holds nothing new or changed. A post is recorded in the state
+    only once the consumer has taken its record, i.e. when it asks `run()`
+    for the next one (write the record out before that), so a crash never
+    leaves a post marked seen that was not exported. Dropped reposts are
+    recorded when they are dropped.
+
+    Detail pages are parsed on the worker threads by default; pass a
+    `parse_executor` (e.g. a `ProcessPoolExecutor`) to move that CPU-bound
+    work onto other cores while the threads keep fetching. Fetched pages
+    then go to the pool `parse_batch_size` per task through a
+    `ParallelParser`, with several batches in flight, so no thread waits
+    on any single parse.
+
+    With a `DedupIndex`, posts whose title and body nearly match an earlier
+    post under another id (a re-listing) get `repostOf` set to that post's
+    id (`dedup_mode="flag"`) or are not emitted at all (`"drop"`).
+
+    Post ids in `exclude_ids` (e.g. those a resumed run already wrote out)
+    are skipped before their detail page is fetched.
+
+    With a `metrics.Metrics`, list parsing, post parsing (when it runs on
+    the worker threads) and normalization are timed as stages and both
+    queue depths are kept as gauges.
+    """
+
+    def __init__(
+        self,
+        fetch: FetchFn,
+        detail_workers: int = 4,
+        queue_size: int = 256,
+        category: Optional[str] = None,
+        state: Optional[CrawlState] = None,
+        backend: str = DEFAULT_BACKEND,
+        parse_executor: Optional[Executor] = None,
+        parse_batch_size: int = 16,
+        dedup: Optional[DedupIndex] = None,
+        dedup_mode: str = FLAG,
+        metrics=NULL_METRICS,
+        exclude_ids: Optional[Collection[str]] = None,
+    ):
+        if detail_workers < 1:
+            raise ValueError("detail_workers must be >= 1")
+        if dedup_mode not in (FLAG, DROP):
+            raise ValueError(f"dedup_mode must be {FLAG!r} or {DROP!r}")
+        self.fetch = fetch
+        self.detail_workers = detail_workers
+        self.queue_size = max(1, queue_size)
+        self.category = category
+        self.state = state
+        self.backend = backend
+        self.parse_executor = parse_executor
+        self.parse_batch_size = max(1, parse_batch_size)
+        self.dedup = dedup
+        self.dedup_mode = dedup_mode
+        self.metrics = metrics
+        self.exclude_ids = exclude_ids or ()
+        self.stats = {
+            "listPages": 0, "listItems": 0, "duplicates": 0, "unchanged": 0, "excluded": 0,
+            "detailPages": 0, "detailFailures": 0, "reposts": 0,
+        }
+        self._lock = threading.Lock()
+
+    def _count(self, key: str, n: int = 1) -> None:
+        with self._lock:
+            self.stats[key] += n
+
+    def _produce(self, list_urls: Iterable[str], items: queue.Queue, stop: threading.Event) -> None:
+        seen = set()
+        listed = 0
+        try:
+            for url in list_urls:
+                if stop.is_set():
+                    return
+                html = self.fetch(url)
+                if html is None:
+                    continue
+                self._count("listPages")
+                with self.metrics.timer("parse_list"):
+                    rows = parse_list_html(html, source_url=url, backend=self.backend)
+                if not rows:
+                    logger.info("No results on %s; stopping pagination", url)
+                    return
+                listed += len(rows)
+                total = parse_total_count(html)
+                fresh = 0
+                for item in rows:
+                    key = post_key(item)
+                    if key in seen:
+                        self._count("duplicates")
+                        continue
+                    seen.add(key)
+                    if key in self.exclude_ids:
+                        self._count("excluded")
+                        fresh += 1  # done in an earlier run, not unchanged: keep paging
+                        continue
+                    if self.state is not None and self.state.classify(item) == SEEN:
+                        self._count("unchanged")
+                        continue
+                    fresh += 1
+                    self._count("listItems")
+                    if not _put(items, item, stop):
+                        return
+                if self.state is not None and rows and not fresh:
+                    logger.info("No new or changed posts on %s; stopping pagination", url)
+                    return
+                if total is not None and listed >= total:
+                    logger.info("All %d results listed by %s; stopping pagination", total, url)
+                    return
+        except Exception:  # noqa: BLE001 - surface in logs, still release the workers
+            logger.exception("List stage failed")
+        finally:
+            for _ in range(self.detail_workers):
+                _put(items, _DONE, stop)
+
+    def _detail(self, item: Dict) -> Optional[Record]:
+        html = self.fetch(item["url"])
+        if html is None:
+            self._count("detailFailures")
+            return None
+        with self.metrics.timer("parse_post"):
+            rec = Record(parse_post_html(html, source_url=item["url"], backend=self.backend))
+        return self._finish(item, rec)
+
+    def _finish(self, item: Dict, rec: Record) -> Optional[Record]:
+        """Merge a parsed post with its list row, normalize it and check it for reposts."""
+        self._count("detailPages")
+        # The list row fills in anything the detail page did not yield
+        for k, v in item.items():
+            rec.setdefault(k, v)
+        rec["category"] = rec.get("category") or self.category or detect_category_from_url(item["url"])
+        with self.metrics.timer("normalize"):
+            rec.normalize()
+        if self.dedup is not None:
+            match = self.dedup.check(rec)
+            if match is not None:
+                self._count("reposts")
+                if self.dedup_mode == DROP:
+                    if self.state is not None:
+                        self.state.record(item)
+                    return None
+                rec["repostOf"] = match["id"]
+        return rec
+
+    def _work(self, items: queue.Queue, out: queue.Queue, stop: threading.Event) -> None:
+        """
+        Detail worker thread. Puts `(record, list row)` on `out`, or with a
+        `parse_executor` just fetches and puts `(list row, html)` for `_parse`.
+        """
+        try:
+            while True:
+                item = _get(items, stop)
+                if item is _DONE:
+                    return
+                self.metrics.set("queue_depth", items.qsize(), queue="items")
+                self.metrics.set("queue_depth", out.qsize(), queue="records")
+                if self.parse_executor is not None:
+                    html = self.fetch(item["url"])
+                    if html is None:
+                        self._count("detailFailures")
+                    elif not _put(out, (item, html), stop):
+                        return
+                    continue
+                try:
+                    rec = self._detail(item)
+                except Exception:  # noqa: BLE001 - one bad page must not stop the worker
+                    logger.exception("Failed to process %s", item.get("url"))
+                    self._count("detailFailures")
+                    continue
+                # The list row travels along so `run()` can record it once the record was taken
+                if rec is not None and not _put(out, (rec, item), stop):
+                    return
+        finally:
+            _put(out, _DONE, stop)
+
+    def _parse(self, fetched: queue.Queue, records: queue.Queue, stop: threading.Event) -> None:
+        """
+        Parse stage with a `parse_executor`: fetched pages go to the pool in
+        batches of `parse_batch_size` (see `ParallelParser`), several batches
+        in flight, and come back in fetch order to be finished here.
+        """
+        rows: Deque[Dict] = deque()
+
+        def pages() -> Iterator[Page]:
+            finished = 0
+            while finished < self.detail_workers:
+                got = _get(fetched, stop)
+                if got is _DONE:
+                    if stop.is_set():
+                        return
+                    finished += 1
+                    continue
+                item, html = got
+                rows.append(item)
+                yield item["url"], html
+
+        parser = ParallelParser(kind="post", backend=self.backend, batch_size=self.parse_batch_size,
+                                executor=self.parse_executor, compact=True, normalize=False, skip_errors=True)
+        try:
+            for parsed in parser.parse(pages()):
+                item = rows.popleft()
+                if parsed is None:
+                    self._count("detailFailures")
+                    continue
+                try:
+                    rec = self._finish(item, parsed)
+                except Exception:  # noqa: BLE001 - one bad page must not stop the stage
+                    logger.exception("Failed to process %s", item.get("url"))
+                    self._count("detailFailures")
+                    continue
+                if rec is not None and not _put(records, (rec, item), stop):
+                    return
+        except Exception:  # noqa: BLE001 - e.g. a broken pool; surface in logs, still release run()
+            logger.exception("Parse stage failed")
+        finally:
+            _put(records, _DONE, stop)
+
+    def run(self, list_urls: Iterable[str]) -> Iterator[Record]:
+        """Yield normalized detail records for every post found on `list_urls`."""
+        items: queue.Queue = queue.Queue(maxsize=self.queue_size)
+        records: queue.Queue = queue.Queue(maxsize=self.queue_size)
+        stop = threading.Event()
+        threads = [threading.Thread(target=self._produce, args=(list_urls, items, stop), daemon=True)]
+        if self.parse_executor is not None:
+            fetched: queue.Queue = queue.Queue(maxsize=self.queue_size)
+            threads.append(threading.Thread(target=self._parse, args=(fetched, records, stop), daemon=True))
+            out, senders = fetched, 1
+        else:
+            out, senders = records, self.detail_workers
+        threads += [
+            threading.Thread(target=self._work, args=(items, out, stop), daemon=True)
+            for _ in range(self.detail_workers)
+        ]
+        for t in threads:
+            t.start()
+        finished = 0
+        try:
+            while finished < senders:
+                done = records.get()
+                if done is _DONE:
+                    finished += 1
+                    continue
+                rec, item = done
+                yield rec
+                # Resumed: the consumer is done with `rec`
+                if self.state is not None:
+                    self.state.record(item)
+        finally:
+            stop.set()
+            for t in threads:
+                t.join()
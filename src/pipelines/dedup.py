@@ -0,0 +1,208 @@
+from __future__ import annotations
+
+from collections import Counter
+from typing import Dict, List, Optional, Tuple
+import hashlib
+import os
+import re
+import sqlite3
+import threading
+import time
+
+from config.settings import DATA_DIR
+from .state_store import post_key
+
+FLAG = "flag"
+DROP = "drop"
+
+BITS = 64
+
+_WORD_RE = re.compile(r"\w+")
+
+# For each of the 8 hash bytes: byte value -> its 8 bits spread into 20-bit
+# lanes at that byte's position. Summing the spread hashes counts every bit
+# position at once with big-int additions (8 lookups per token instead of 64
+# per-bit updates); a lane holds counts up to ~1M shingles.
+_LANE = 20
+_LANE_MASK = (1 << _LANE) - 1
+_SPREAD = tuple(
+    tuple(sum(((b >> i) & 1) << (_LANE * (8 * k + i)) for i in range(8)) for b in range(256))
+    for k in range(BITS // 8)
+)
+
+def _spread(d: bytes) -> int:
+    t0, t1, t2, t3, t4, t5, t6, t7 = _SPREAD
+    return t0[d[0]] | t1[d[1]] | t2[d[2]] | t3[d[3]] | t4[d[4]] | t5[d[5]] | t6[d[6]] | t7[d[7]]
+
+def _token_digest(token: str) -> bytes:
+    return hashlib.blake2b(token.encode("utf-8"), digest_size=8).digest()
+
+def shingles(text: str, size: int = 3) -> Counter:
+    """Word `size`-grams of the lowercased text (single words for very short texts)."""
+    words = _WORD_RE.findall(text.lower())
+    if len(words) < size:
+        return Counter(words)
+    return Counter(" ".join(words[i:i + size]) for i in range(len(words) - size + 1))
+
+def simhash(text: str) -> int:
+    """64-bit SimHash over word 3-gram shingles; near-identical texts differ in few bits."""
+    features = shingles(text)
+    total = 0
+    weight = 0
+    for token, count in features.items():
+        total += _spread(_token_digest(token)) * count
+        weight += count
+    sig = 0
+    for i in range(BITS):
+        if ((total >> (_LANE * i)) & _LANE_MASK) * 2 > weight:
+            sig |= 1 << i
+    return sig
+
+def record_signature(rec: Dict) -> Optional[int]:
+    """SimHash of a post's title and body, or None when it has no text."""
+    text = " ".join(t for t in (rec.get("title"), rec.get("post")) if t)
+    return simhash(text) if text.strip() else None
+
+def hamming(a: int, b: int) -> int:
+    return bin((a ^ b) & ((1 << BITS) - 1)).count("1")
+
+def _signed(v: int) -> int:
+    # SQLite integers are signed 64-bit
+    return v - (1 << 64) if v >= 1 << 63 else v
+
+class DedupIndex:
+    """
+    Persistent near-duplicate index over post SimHashes (SQLite).
+
+    Each signature is cut into `bands` equal bit ranges stored in an indexed
+    table. Two signatures within `max_distance` differing bits share at least
+    one band exactly (pigeonhole), so a lookup is one index probe per band
+    plus a Hamming check on the few candidates, whatever the index size.
+    `threshold` is the minimum similarity (1 - distance / 64) for a repost;
+    the band count is fixed when the index is created and bounds the usable
+    threshold. Safe to share between threads.
+    """
+
+    def __init__(
+        self,
+        path: str = os.path.join(DATA_DIR, "dedup.sqlite3"),
+        threshold: float = 0.95,
+        commit_every: int = 100,
+    ):
+        if not 0 < threshold <= 1:
+            raise ValueError(f"threshold must be in (0, 1], got {threshold}")
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self.path = path
+        self.max_distance = int((1 - threshold) * BITS + 1e-9)
+        self.commit_every = commit_every
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value INTEGER NOT NULL)")
+        self._conn.execute(
+            """CREATE TABLE IF NOT EXISTS signatures (
+                id TEXT PRIMARY KEY,
+                simhash INTEGER NOT NULL,
+                url TEXT,
+                first_seen REAL NOT NULL
+            )"""
+        )
+        self._conn.execute(
+            # simhash is repeated here so a lookup is a pure index range scan
+            """CREATE TABLE IF NOT EXISTS bands (
+                key INTEGER NOT NULL,
+                id TEXT NOT NULL,
+                simhash INTEGER NOT NULL,
+                PRIMARY KEY (key, id)
+            ) WITHOUT ROWID"""
+        )
+        self._conn.execute("INSERT OR IGNORE INTO meta (key, value) VALUES ('bands', ?)", (self.max_distance + 1,))
+        self._conn.commit()
+        self.bands = self._conn.execute("SELECT value FROM meta WHERE key = 'bands'").fetchone()[0]
+        if self.max_distance >= self.bands:
+            raise ValueError(
+                f"threshold {threshold} needs more than the {self.bands} bands this index was built with"
+            )
+        self._width = BITS // self.bands
+        self._lock = threading.RLock()
+        self._pending = 0
+
+    def _band_keys(self, sig: int) -> List[int]:
+        mask = (1 << self._width) - 1
+        # Band number in the high bits keeps keys from different bands apart; a
+        # single 64-bit band (threshold 1.0) is signed like the stored simhash
+        return [_signed((b << self._width) | ((sig >> (b * self._width)) & mask)) for b in range(self.bands)]
+
+    def _candidates(self, sig: int) -> List[Tuple[str, int]]:
+        keys = self._band_keys(sig)
+        return self._conn.execute(
+            f"SELECT id, simhash FROM bands WHERE key IN ({','.join('?' * len(keys))})", keys
+        ).fetchall()
+
+    def find(self, sig: int, exclude: Optional[str] = None) -> Optional[Dict]:
+        """Closest stored post within `max_distance` bits of `sig` (other than `exclude`)."""
+        best = None
+        best_dist = self.max_distance + 1
+        with self._lock:
+            candidates = self._candidates(sig)
+        signed = _signed(sig)
+        for pid, stored in candidates:
+            if pid == exclude:
+                continue
+            dist = hamming(signed, stored)
+            if dist < best_dist:
+                best, best_dist = pid, dist
+        if best is None:
+            return None
+        with self._lock:
+            url = self._conn.execute("SELECT url FROM signatures WHERE id = ?", (best,)).fetchone()[0]
+        return {"id": best, "url": url, "distance": best_dist, "similarity": 1 - best_dist / BITS}
+
+    def add(self, post_id: str, sig: int, url: Optional[str] = None) -> None:
+        with self._lock:
+            cur = self._conn.execute(
+                "INSERT OR IGNORE INTO signatures (id, simhash, url, first_seen) VALUES (?, ?, ?, ?)",
+                (post_id, _signed(sig), url, time.time()),
+            )
+            if cur.rowcount:
+                self._conn.executemany(
+                    "INSERT OR IGNORE INTO bands (key, id, simhash) VALUES (?, ?, ?)",
+                    [(key, post_id, _signed(sig)) for key in self._band_keys(sig)],
+                )
+            self._pending += 1
+            if self._pending >= self.commit_every:
+                self._conn.commit()
+                self._pending = 0
+
+    def check(self, rec: Dict) -> Optional[Dict]:
+        """
+        Look up a parsed post and add it to the index. Returns the earlier
+        post it repeats (`id`, `url`, `distance`, `similarity`), or None.
+        """
+        sig = record_signature(rec)
+        key = post_key(rec)
+        if sig is None or key is None:
+            return None
+        with self._lock:  # look up and insert atomically so concurrent copies still match
+            match = self.find(sig, exclude=key)
+            self.add(key, sig, rec.get("url"))
+        return match
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM signatures").fetchone()[0]
+
+    def flush(self) -> None:
+        with self._lock:
+            self._conn.commit()
+            self._pending = 0
+
+    def close(self) -> None:
+        self.flush()
+        self._conn.close()
+
+    def __enter__(self) -> "DedupIndex":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
@@ -1,11 +1,241 @@
 from __future__ import annotations
 
-from typing import Iterable, List, Dict
+from abc import ABC, abstractmethod
+from typing import IO, Dict, Iterable, List, Optional
+import gzip
 import json
 import os
 
+try:  # optional: only needed for compression="zstd"
+    import zstandard
+except ImportError:  # pragma: no cover - depends on environment
+    zstandard = None
+
+from .records import as_dict
+
+_SUFFIXES = {None: "", "gzip": ".gz", "zstd": ".zst"}
+
 def write_json_array(records: List[Dict], path: str) -> None:
     """Write records as a single JSON array to `path` (pretty, UTF-8)."""
     os.makedirs(os.path.dirname(path), exist_ok=True)
     with open(path, "w", encoding="utf-8") as f:
-        json.dump(records, f, ensure_ascii=False, indent=2)
\ No newline at end of file
+        json.dump([as_dict(rec) for rec in records], f, ensure_ascii=False, indent=2)
+
+class _StreamWriter(ABC):
+    """
+    Shared plumbing for streaming writers.
+
+    Output goes to `<file>.part` and is renamed into place on `close()`, so a
+    finished file is always complete. Data is flushed every `flush_every`
+    records; after a crash the `.part` file still holds every flushed record
+    (compressed streams are sync-flushed, so they decompress up to that point).
+    """
+
+    def __init__(self, path: str, compression: Optional[str] = None, flush_every: int = 100):
+        if compression not in _SUFFIXES:
+            raise ValueError(f"Unsupported compression: {compression!r}")
+        if compression == "zstd" and zstandard is None:
+            raise RuntimeError("compression='zstd' requires the 'zstandard' package")
+        suffix = _SUFFIXES[compression]
+        self.path = path if path.endswith(suffix) else path + suffix
+        self.compression = compression
+        self.flush_every = max(1, flush_every)
+        self.paths: List[str] = []  # finalized files, in write order
+        self.records_written = 0
+        self._raw: Optional[IO[bytes]] = None
+        self._out = None
+        self._part: Optional[str] = None
+        self._unflushed = 0
+        if os.path.dirname(self.path):
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+
+    def _open(self, path: str) -> None:
+        self._part = path + ".part"
+        self._raw = open(self._part, "wb")
+        if self.compression == "gzip":
+            self._out = gzip.GzipFile(fileobj=self._raw, mode="wb")
+        elif self.compression == "zstd":
+            self._out = zstandard.ZstdCompressor().stream_writer(self._raw)
+        else:
+            self._out = self._raw
+
+    def _write_bytes(self, data: bytes) -> None:
+        self._out.write(data)
+        self._unflushed += 1
+        if self._unflushed >= self.flush_every:
+            self.flush()
+
+    def flush(self) -> None:
+        if self._out is None:
+            return
+        if self.compression == "zstd":
+            self._out.flush(zstandard.FLUSH_BLOCK)
+        else:
+            self._out.flush()  # GzipFile.flush() is a zlib sync flush
+        if self._out is not self._raw:
+            self._raw.flush()
+        self._unflushed = 0
+
+    def _finalize(self, path: str) -> None:
+        if self._out is None:
+            return
+        if self.compression == "gzip":
+            self._out.close()  # writes the gzip trailer, leaves the raw file open
+        elif self.compression == "zstd":
+            self._out.flush(zstandard.FLUSH_FRAME)
+        self._raw.flush()
+        os.fsync(self._raw.fileno())
+        self._raw.close()
+        os.replace(self._part, path)
+        self.paths.append(path)
+        self._out = self._raw = self._part = None
+        self._unflushed = 0
+
+    def tell(self) -> int:
+        """Bytes written to the current `.part` file (call after `flush()`)."""
+        return self._raw.tell() if self._raw is not None else 0
+
+    def resume(self, offset: int, records: int) -> None:
+        """
+        Continue the `.part` file an interrupted run left behind (or the
+        finished file, for a run that completed but kept its checkpoint): it
+        is cut back to `offset` bytes, which must hold exactly `records`
+        records. Only uncompressed output can be cut at an arbitrary record
+        boundary.
+        """
+        if self.compression is not None:
+            raise ValueError("only uncompressed output can be resumed")
+        if not records:
+            return
+        self._part = self.path + ".part"
+        if not os.path.exists(self._part) and os.path.exists(self.path):
+            os.replace(self.path, self._part)
+        self._raw = open(self._part, "r+b")
+        self._raw.truncate(offset)
+        self._raw.seek(offset)
+        self._out = self._raw
+        self.records_written = records
+
+    def write_many(self, records: Iterable[Dict]) -> None:
+        for rec in records:
+            self.write(rec)
+
+    @abstractmethod
+    def write(self, record: Dict) -> None:
+        """Append one record."""
+
+    @abstractmethod
+    def close(self) -> None:
+        """Finish the output and rename the `.part` file into place."""
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        if exc_type is None:
+            self.close()
+        else:
+            # Leave the .part file behind as usable partial output
+            self.flush()
+
+class NDJSONWriter(_StreamWriter):
+    """
+    Newline-delimited JSON, one record per line, written as records arrive.
+
+    Set `max_records` and/or `max_bytes` (uncompressed) to rotate into
+    numbered files: `out.ndjson` becomes `out-00000.ndjson`, `out-00001.ndjson`, ...
+    """
+
+    def __init__(
+        self,
+        path: str,
+        max_records: Optional[int] = None,
+        max_bytes: Optional[int] = None,
+        compression: Optional[str] = None,
+        flush_every: int = 100,
+    ):
+        super().__init__(path, compression=compression, flush_every=flush_every)
+        self.max_records = max_records
+        self.max_bytes = max_bytes
+        self._index = 0
+        self._file_records = 0
+        self._file_bytes = 0
+
+    def _shard_path(self) -> str:
+        if not (self.max_records or self.max_bytes):
+            return self.path
+        base = self.path[: len(self.path) - len(_SUFFIXES[self.compression])]
+        stem, ext = os.path.splitext(base)
+        return f"{stem}-{self._index:05d}{ext}{_SUFFIXES[self.compression]}"
+
+    def _rotate_due(self) -> bool:
+        return bool(
+            (self.max_records and self._file_records >= self.max_records)
+            or (self.max_bytes and self._file_bytes >= self.max_bytes)
+        )
+
+    def write(self, record: Dict) -> None:
+        if self._out is not None and self._rotate_due():
+            self._finalize(self._shard_path())
+            self._index += 1
+        if self._out is None:
+            self._open(self._shard_path())
+            self._file_records = self._file_bytes = 0
+        line = (json.dumps(as_dict(record), ensure_ascii=False) + "\n").encode("utf-8")
+        self._write_bytes(line)
+        self._file_records += 1
+        self._file_bytes += len(line)
+        self.records_written += 1
+
+    def resume(self, offset: int, records: int) -> None:
+        if self.max_records or self.max_bytes:
+            raise ValueError("rotated output cannot be resumed")
+        super().resume(offset, records)
+        self._file_records, self._file_bytes = records, offset
+
+    def close(self) -> None:
+        if self._out is None and not self.paths:
+            self._open(self._shard_path())  # an empty run still yields a (empty) file
+        self._finalize(self._shard_path())
+
+class JSONArrayWriter(_StreamWriter):
+    """A single pretty-printed JSON array, streamed one element at a time."""
+
+    def __init__(self, path: str, indent: int = 2, compression: Optional[str] = None, flush_every: int = 100):
+        super().__init__(path, compression=compression, flush_every=flush_every)
+        self.indent = indent
+
+    def write(self, record: Dict) -> None:
+        if self._out is None:
+            self._open(self.path)
+            self._out.write(b"[")
+        body = json.dumps(as_dict(record), ensure_ascii=False, indent=self.indent)
+        pad = " " * self.indent
+        sep = "," if self.records_written else ""
+        self._write_bytes((sep + "\n" + pad + body.replace("\n", "\n" + pad)).encode("utf-8"))
+        self.records_written += 1
+
+    def close(self) -> None:
+        if self._out is None:
+            self._open(self.path)
+            self._out.write(b"[")
+        self._out.write(b"\n]\n" if self.records_written else b"]\n")
+        self._finalize(self.path)
+
+def open_writer(path: str, fmt: str = "ndjson", **kwargs):
+    """Return a streaming writer for `fmt` ("ndjson", "json" or "parquet")."""
+    if fmt == "ndjson":
+        return NDJSONWriter(path, **kwargs)
+    if fmt == "json":
+        return JSONArrayWriter(path, **kwargs)
+    if fmt == "parquet":
+        from .columnar import ParquetWriter  # pyarrow is optional
+
+        return ParquetWriter(path, **kwargs)
+    raise ValueError(f"Unsupported streaming format: {fmt!r}")
+
+def write_ndjson(records: Iterable[Dict], path: str, **kwargs) -> List[str]:
+    """Stream `records` to NDJSON at `path`; returns the finalized file paths."""
+    with NDJSONWriter(path, **kwargs) as writer:
+        writer.write_many(records)
+    return writer.paths
@@ -0,0 +1,346 @@
+from __future__ import annotations
+
+from array import array
+from bisect import bisect_left
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+import gzip
+import json
+import math
+import mmap
+import os
+import struct
+
+try:  # optional: only needed to read .zst exports
+    import zstandard
+except ImportError:  # pragma: no cover - depends on environment
+    zstandard = None
+
+EARTH_RADIUS_KM = 6371.0088
+KM_PER_DEGREE = math.pi * EARTH_RADIUS_KM / 180
+
+_MAGIC = b"CLGEO\x00\x00\x01"
+# magic, cell size in degrees, points, cells; padded to 64 bytes. The arrays
+# that follow are 8-byte values in native (in practice little-endian) order.
+_HEADER = struct.Struct("<8sdqq")
+_HEADER_SIZE = 64
+
+def haversine_km(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
+    p1, p2 = math.radians(lat1), math.radians(lat2)
+    dp, dl = p2 - p1, math.radians(lon2 - lon1)
+    a = math.sin(dp / 2) ** 2 + math.cos(p1) * math.cos(p2) * math.sin(dl / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * math.asin(min(1.0, math.sqrt(a)))
+
+def _coord(value) -> Optional[float]:
+    if value is None or value == "":
+        return None
+    try:
+        f = float(value)
+    except (TypeError, ValueError):
+        return None
+    return f if math.isfinite(f) else None
+
+def record_point(rec: Dict) -> Optional[Tuple[str, float, float, float]]:
+    """(id, latitude, longitude, accuracy or NaN) for a record with valid coordinates."""
+    lat, lon = _coord(rec.get("latitude")), _coord(rec.get("longitude"))
+    if lat is None or lon is None or not (-90 <= lat <= 90 and -180 <= lon <= 180) or rec.get("id") is None:
+        return None
+    acc = _coord(rec.get("mapAccuracy"))
+    return str(rec["id"]), lat, lon, acc if acc is not None else math.nan
+
+def _lon_spans(latitude: float, longitude: float, dlat: float) -> List[Tuple[float, float]]:
+    """
+    (west, east) longitude ranges covering a circle of `dlat` degrees around
+    the point: the whole circle of latitude when the circle holds a pole, else
+    the exact half-width asin(sin r / cos lat), split in two where the window
+    crosses the antimeridian.
+    """
+    if abs(latitude) + dlat >= 90:
+        return [(-180.0, 180.0)]
+    dlon = math.degrees(math.asin(min(1.0, math.sin(math.radians(dlat)) / math.cos(math.radians(latitude)))))
+    west, east = longitude - dlon, longitude + dlon
+    if east - west >= 360:
+        return [(-180.0, 180.0)]
+    if west < -180:
+        return [(west + 360, 180.0), (-180.0, east)]
+    if east > 180:
+        return [(west, 180.0), (-180.0, east - 360)]
+    return [(west, east)]
+
+class _Grid:
+    """Fixed lat/lon grid; cells are numbered row-major from (-90, -180)."""
+
+    def __init__(self, cell_deg: float):
+        if not 0 < cell_deg <= 180:
+            raise ValueError("cell_deg must be in (0, 180]")
+        self.cell_deg = cell_deg
+        self.rows = math.ceil(180 / cell_deg)
+        self.cols = math.ceil(360 / cell_deg)
+
+    def row(self, lat: float) -> int:
+        return min(self.rows - 1, max(0, int((lat + 90) // self.cell_deg)))
+
+    def col(self, lon: float) -> int:
+        return min(self.cols - 1, max(0, int((lon + 180) // self.cell_deg)))
+
+    def key(self, lat: float, lon: float) -> int:
+        return self.row(lat) * self.cols + self.col(lon)
+
+    def corner(self, key: int) -> Tuple[float, float]:
+        """(south, west) edge of a cell."""
+        row, col = divmod(key, self.cols)
+        return row * self.cell_deg - 90, col * self.cell_deg - 180
+
+class GeoIndexBuilder:
+    """
+    Collects post coordinates (e.g. while records are exported) and writes
+    a `GeoIndex` file on `close()`. Records without usable coordinates are
+    skipped. Points are bucketed into `cell_deg`-degree grid cells (0.01
+    degrees is ~1.1 km of latitude) and stored sorted by cell, so each cell
+    is one contiguous run in the file. The file is written to `<path>.part`
+    and renamed into place.
+    """
+
+    def __init__(self, path: str, cell_deg: float = 0.01):
+        self.path = path
+        self.grid = _Grid(cell_deg)
+        self._keys = array("q")
+        self._lat = array("d")
+        self._lon = array("d")
+        self._acc = array("d")
+        self._ids: List[str] = []
+
+    def add(self, rec: Dict) -> bool:
+        point = record_point(rec)
+        if point is None:
+            return False
+        pid, lat, lon, acc = point
+        self._keys.append(self.grid.key(lat, lon))
+        self._lat.append(lat)
+        self._lon.append(lon)
+        self._acc.append(acc)
+        self._ids.append(pid)
+        return True
+
+    def add_many(self, records: Iterable[Dict]) -> None:
+        for rec in records:
+            self.add(rec)
+
+    def tee(self, records: Iterable[Dict]) -> Iterator[Dict]:
+        """Pass records through unchanged, indexing each one on the way."""
+        for rec in records:
+            self.add(rec)
+            yield rec
+
+    def __len__(self) -> int:
+        return len(self._ids)
+
+    def close(self) -> str:
+        order = sorted(range(len(self._ids)), key=self._keys.__getitem__)
+        cell_keys = array("q")
+        cell_offsets = array("q")
+        for pos, i in enumerate(order):
+            key = self._keys[i]
+            if not cell_keys or cell_keys[-1] != key:
+                cell_keys.append(key)
+                cell_offsets.append(pos)
+        cell_offsets.append(len(order))
+
+        blob = bytearray()
+        id_offsets = array("q", [0])
+        for i in order:
+            blob += self._ids[i].encode("utf-8")
+            id_offsets.append(len(blob))
+
+        if os.path.dirname(self.path):
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        part = self.path + ".part"
+        with open(part, "wb") as f:
+            f.write(_HEADER.pack(_MAGIC, self.grid.cell_deg, len(order), len(cell_keys)).ljust(_HEADER_SIZE, b"\0"))
+            for arr in (
+                cell_keys, cell_offsets,
+                array("d", (self._lat[i] for i in order)),
+                array("d", (self._lon[i] for i in order)),
+                array("d", (self._acc[i] for i in order)),
+                id_offsets,
+            ):
+                arr.tofile(f)
+            f.write(blob)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(part, self.path)
+        return self.path
+
+    def __enter__(self) -> "GeoIndexBuilder":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        if exc_type is None:
+            self.close()
+
+class GeoIndex:
+    """
+    Read-only, memory-mapped grid index built by `GeoIndexBuilder`.
+
+    Opening the file maps it without reading it; queries binary-search the
+    sorted cell keys, so they only touch the cells around the query and
+    their points. Interior cells of a bounding box are taken whole, without
+    per-point checks. Longitudes do not wrap around the antimeridian.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._file = open(path, "rb")
+        self._mm = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, cell_deg, n, m = _HEADER.unpack_from(self._mm, 0)
+        if magic != _MAGIC:
+            raise ValueError(f"{path} is not a geo index file")
+        self.grid = _Grid(cell_deg)
+        view = memoryview(self._mm)
+        pos = _HEADER_SIZE
+
+        def take(count: int, fmt: str):
+            nonlocal pos
+            arr = view[pos:pos + 8 * count].cast(fmt)
+            pos += 8 * count
+            return arr
+
+        self._cell_keys = take(m, "q")
+        self._cell_offsets = take(m + 1, "q")
+        self._lat = take(n, "d")
+        self._lon = take(n, "d")
+        self._acc = take(n, "d")
+        self._id_offsets = take(n + 1, "q")
+        self._blob = view[pos:]
+        self._views = [self._cell_keys, self._cell_offsets, self._lat, self._lon, self._acc, self._id_offsets, self._blob, view]
+
+    def __len__(self) -> int:
+        return len(self._lat)
+
+    def post_id(self, i: int) -> str:
+        return bytes(self._blob[self._id_offsets[i]:self._id_offsets[i + 1]]).decode("utf-8")
+
+    def point(self, i: int) -> Dict:
+        acc = self._acc[i]
+        return {
+            "id": self.post_id(i),
+            "latitude": self._lat[i],
+            "longitude": self._lon[i],
+            "mapAccuracy": None if math.isnan(acc) else acc,
+        }
+
+    def _row_spans(self, south: float, west: float, north: float, east: float) -> Iterator[Tuple[int, int, int, int, bool]]:
+        """
+        For each grid row overlapping the box: (first cell, end cell) index
+        range in the cell arrays, the columns of the box's edge cells, and
+        whether the row lies inside the box's latitude range.
+        """
+        g = self.grid
+        col0, col1 = g.col(west), g.col(east)
+        row0, row1 = g.row(south), g.row(north)
+        for row in range(row0, row1 + 1):
+            base = row * g.cols
+            lo = bisect_left(self._cell_keys, base + col0)
+            hi = bisect_left(self._cell_keys, base + col1 + 1, lo)
+            if lo < hi:
+                inside = row0 < row < row1
+                yield lo, hi, base + col0, base + col1, inside
+
+    def _bbox_indices(self, south: float, west: float, north: float, east: float) -> Iterator[int]:
+        keys, offsets, lat, lon = self._cell_keys, self._cell_offsets, self._lat, self._lon
+        for lo, hi, edge0, edge1, row_inside in self._row_spans(south, west, north, east):
+            for c in range(lo, hi):
+                start, end = offsets[c], offsets[c + 1]
+                if row_inside and edge0 < keys[c] < edge1:
+                    yield from range(start, end)
+                    continue
+                for i in range(start, end):
+                    if south <= lat[i] <= north and west <= lon[i] <= east:
+                        yield i
+
+    def bbox(self, south: float, west: float, north: float, east: float) -> List[str]:
+        """Post ids inside the box (edges inclusive)."""
+        return [self.post_id(i) for i in self._bbox_indices(south, west, north, east)]
+
+    def count_bbox(self, south: float, west: float, north: float, east: float) -> int:
+        total = 0
+        keys, offsets, lat, lon = self._cell_keys, self._cell_offsets, self._lat, self._lon
+        for lo, hi, edge0, edge1, row_inside in self._row_spans(south, west, north, east):
+            for c in range(lo, hi):
+                if row_inside and edge0 < keys[c] < edge1:
+                    total += offsets[c + 1] - offsets[c]
+                    continue
+                for i in range(offsets[c], offsets[c + 1]):
+                    if south <= lat[i] <= north and west <= lon[i] <= east:
+                        total += 1
+        return total
+
+    def within(self, latitude: float, longitude: float, radius_km: float) -> List[Tuple[str, float]]:
+        """(post id, distance in km) for posts within `radius_km`, nearest first."""
+        dlat = radius_km / KM_PER_DEGREE
+        south, north = max(-90.0, latitude - dlat), min(90.0, latitude + dlat)
+        # Compare haversine terms (monotonic in distance) and convert hits only
+        sin, cos = math.sin, math.cos
+        rad = math.pi / 180
+        cos0 = math.cos(latitude * rad)
+        limit = math.sin(min(math.pi / 2, radius_km / (2 * EARTH_RADIUS_KM))) ** 2
+        hits = []
+        lat, lon = self._lat, self._lon
+        candidates = (
+            i for west, east in _lon_spans(latitude, longitude, dlat)
+            for i in self._bbox_indices(south, west, north, east)
+        )
+        for i in candidates:
+            la = lat[i]
+            a = sin((la - latitude) * rad / 2) ** 2 + cos0 * cos(la * rad) * sin((lon[i] - longitude) * rad / 2) ** 2
+            if a <= limit:
+                hits.append((a, i))
+        hits.sort()
+        return [(self.post_id(i), 2 * EARTH_RADIUS_KM * math.asin(min(1.0, math.sqrt(a)))) for a, i in hits]
+
+    def cell_counts(self, south: float = -90, west: float = -180, north: float = 90, east: float = 180) -> Dict[Tuple[float, float], int]:
+        """Posts per grid cell, keyed by the cell's (south, west) corner, for cells overlapping the box."""
+        counts = {}
+        for lo, hi, _, _, _ in self._row_spans(south, west, north, east):
+            for c in range(lo, hi):
+                counts[self.grid.corner(self._cell_keys[c])] = self._cell_offsets[c + 1] - self._cell_offsets[c]
+        return counts
+
+    def close(self) -> None:
+        for v in self._views:
+            v.release()
+        self._mm.close()
+        self._file.close()
+
+    def __enter__(self) -> "GeoIndex":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+def iter_exported_records(path: str) -> Iterator[Dict]:
+    """Records from an exported .ndjson/.json file (optionally .gz or .zst)."""
+    if path.endswith(".gz"):
+        f = gzip.open(path, "rt", encoding="utf-8")
+    elif path.endswith(".zst"):
+        if zstandard is None:
+            raise RuntimeError("Reading .zst exports requires the 'zstandard' package")
+        import io
+
+        f = io.TextIOWrapper(zstandard.ZstdDecompressor().stream_reader(open(path, "rb")), encoding="utf-8")
+    else:
+        f = open(path, encoding="utf-8")
+    with f:
+        base = path[:-3] if path.endswith(".gz") else path[:-4] if path.endswith(".zst") else path
+        if base.endswith(".json"):
+            yield from json.load(f)
+            return
+        for line in f:
+            if line.strip():
+                yield json.loads(line)
+
+def build_geo_index(export_paths: Iterable[str], path: str, cell_deg: float = 0.01) -> str:
+    """Build a geo index file from exported NDJSON/JSON files; returns its path."""
+    with GeoIndexBuilder(path, cell_deg=cell_deg) as builder:
+        for export in export_paths:
+            builder.add_many(iter_exported_records(export))
+    return path
@@ -1,9 +1,75 @@
 from __future__ import annotations
 
-from typing import Dict, Optional
+from typing import Dict, Iterable, List, Optional, Sequence
+import json
 import re
 from urllib.parse import urlparse
 
+try:  # optional: only needed for the batch normalizer and Parquet/Arrow output
+    import pyarrow as pa
+    import pyarrow.compute as pc
+except ImportError:  # pragma: no cover - depends on environment
+    pa = pc = None
+
+# Keep consistent key ordering when exporting (not required but nice).
+# Columnar exports use the same order for their schema.
+FIELD_ORDER = (
+    "id", "url", "title", "datetime", "dates", "location", "category", "label",
+    "price", "longitude", "latitude", "mapAccuracy", "post", "notices",
+    "phoneNumbers", "compensation", "employmentType", "jobTitle", "pics",
+    "amenities", "availableFrom", "manufacturer", "model", "condition",
+    "attributes",
+)
+
+# "$1,800", "$25/hr", "$75-$90k", "$20 - 25 per hour". Kept RE2-compatible
+# (no lookarounds) so `normalize_batch` below can run the same pattern
+# through pyarrow.compute; ASCII mode makes `\b` mean the same in both engines.
+PRICE_PATTERN = (
+    r"(?P<lo>\d[\d,]*(?:\.\d+)?)(?:(?P<lok>[kK])\b)?"
+    r"(?:\s*(?:-|–|to)\s*\$?\s*(?P<hi>\d[\d,]*(?:\.\d+)?)(?:(?P<hik>[kK])\b)?)?"
+    r"(?:\s*(?:/|per\s)\s*(?P<unit>[A-Za-z]+))?"
+)
+_PRICE_RE = re.compile(PRICE_PATTERN, re.ASCII)
+
+# Unit spellings -> canonical unit; anything else is kept lowercased
+PRICE_UNITS = {
+    "hr": "hour", "hrs": "hour", "hour": "hour", "hourly": "hour", "h": "hour",
+    "day": "day", "daily": "day", "night": "night",
+    "wk": "week", "week": "week", "weekly": "week",
+    "mo": "month", "mon": "month", "month": "month", "monthly": "month",
+    "yr": "year", "year": "year", "annum": "year", "annual": "year",
+}
+
+def _price_number(digits: str, k: Optional[str]) -> Optional[float]:
+    try:
+        value = float(digits.replace(",", ""))
+    except ValueError:
+        return None
+    return value * 1000 if k else value
+
+def parse_price(text: Optional[str]) -> Dict[str, Optional[object]]:
+    """
+    Split a price string into typed parts:
+      "$1800"    -> amount 1800.0, min 1800.0, max 1800.0, unit None
+      "$25/hr"   -> amount 25.0, min 25.0, max 25.0, unit "hour"
+      "$75-$90k" -> amount 75000.0, min 75000.0, max 90000.0, unit None
+    `amount` is the single price or the low end of a range; a "k" on the
+    upper bound of a range applies to both ends. Unparseable text gives Nones.
+    """
+    out = {"amount": None, "min": None, "max": None, "unit": None}
+    m = _PRICE_RE.search(text or "")
+    if not m:
+        return out
+    hi_k = m.group("hik")
+    lo = _price_number(m.group("lo"), m.group("lok") or (hi_k if m.group("hi") else None))
+    hi = _price_number(m.group("hi"), hi_k) if m.group("hi") else lo
+    unit = m.group("unit")
+    if unit:
+        unit = unit.lower()
+        unit = PRICE_UNITS.get(unit, unit)
+    out.update(amount=lo, min=lo, max=hi, unit=unit)
+    return out
+
 def _strip_dollar(s: Optional[str]) -> Optional[str]:
     if not s:
         return None
@@ -64,21 +130,234 @@ def normalize_record(rec: Dict) -> Dict:
     # Ensure label is 'post'
     out["label"] = "post"
 
-    # Keep consistent key ordering when exporting (not required but nice)
-    preferred = [
-        "id", "url", "title", "datetime", "dates", "location", "category", "label",
-        "price", "longitude", "latitude", "mapAccuracy", "post", "notices",
-        "phoneNumbers", "compensation", "employmentType", "jobTitle", "pics",
-        "amenities", "availableFrom", "manufacturer", "model", "condition",
-        "attributes",
-    ]
     # Build ordered dict-like (plain dict in 3.7+ preserves insertion order)
     ordered = {}
-    for k in preferred:
+    for k in FIELD_ORDER:
         if k in out and out[k] not in (None, [], {}):
             ordered[k] = out[k]
     # Append any remaining keys
     for k, v in out.items():
         if k not in ordered and v not in (None, [], {}):
             ordered[k] = v
-    return ordered
\ No newline at end of file
+    return ordered
+
+# README fields that hold arrays of strings
+LIST_FIELDS = ("notices", "phoneNumbers", "pics", "amenities", "attributes")
+
+# Raw string field -> typed float64 column stored next to it
+NUMERIC_FIELDS = {
+    "price": "priceValue",
+    "latitude": "latitudeValue",
+    "longitude": "longitudeValue",
+    "mapAccuracy": "mapAccuracyValue",
+}
+
+# Typed price columns -> `parse_price` key; priceValue is the amount
+PRICE_FIELDS = {"priceValue": "amount", "priceMin": "min", "priceMax": "max", "priceUnit": "unit"}
+
+# Keys outside FIELD_ORDER are kept as one JSON object per row
+EXTRA_FIELD = "extra"
+
+_NUMBER_PATTERN = r"-?\d[\d,]*(?:\.\d+)?|-?\.\d+"
+_NUMBER_RE = re.compile(_NUMBER_PATTERN, re.ASCII)
+_KNOWN_FIELDS = frozenset(FIELD_ORDER)
+
+def _require_pyarrow() -> None:
+    if pa is None:
+        raise RuntimeError("Batch normalization and Parquet export require the 'pyarrow' package")
+
+def to_number(value) -> Optional[float]:
+    """First number in a price/coordinate string ("$1,800" -> 1800.0), else None."""
+    if value is None:
+        return None
+    if isinstance(value, (int, float)):
+        return float(value)
+    m = _NUMBER_RE.search(str(value))
+    if not m:
+        return None
+    try:
+        return float(m.group(0).replace(",", ""))
+    except ValueError:
+        return None
+
+def record_schema():
+    """Arrow schema in `normalize_record` key order, with typed numeric columns."""
+    _require_pyarrow()
+    fields = []
+    for name in FIELD_ORDER:
+        if name in LIST_FIELDS:
+            fields.append(pa.field(name, pa.list_(pa.string())))
+        else:
+            fields.append(pa.field(name, pa.string()))
+        if name == "price":
+            fields.extend(pa.field(col, pa.string() if key == "unit" else pa.float64()) for col, key in PRICE_FIELDS.items())
+        elif name in NUMERIC_FIELDS:
+            fields.append(pa.field(NUMERIC_FIELDS[name], pa.float64()))
+    fields.append(pa.field(EXTRA_FIELD, pa.string()))
+    return pa.schema(fields)
+
+def _as_text(value) -> Optional[str]:
+    if value is None or isinstance(value, str):
+        return value
+    return json.dumps(value, ensure_ascii=False)
+
+def _as_list(value) -> Optional[List[str]]:
+    if value is None:
+        return None
+    if isinstance(value, (list, tuple)):
+        return [str(v) for v in value]
+    return [str(value)]
+
+def records_to_columns(records: Iterable[Dict]) -> Dict[str, list]:
+    """Pivot normalized records into column lists matching `record_schema()`."""
+    columns: Dict[str, list] = {name: [] for name in FIELD_ORDER}
+    for name in list(NUMERIC_FIELDS.values()) + list(PRICE_FIELDS):
+        columns[name] = []
+    columns[EXTRA_FIELD] = []
+    for rec in records:
+        for name in FIELD_ORDER:
+            value = rec.get(name)
+            columns[name].append(_as_list(value) if name in LIST_FIELDS else _as_text(value))
+        price = rec.get("price")
+        parts = parse_price(price if isinstance(price, str) else _as_text(price))
+        for col, key in PRICE_FIELDS.items():
+            columns[col].append(parts[key])
+        for raw, typed in NUMERIC_FIELDS.items():
+            if raw != "price":
+                columns[typed].append(to_number(rec.get(raw)))
+        extra = {k: v for k, v in rec.items() if k not in _KNOWN_FIELDS}
+        columns[EXTRA_FIELD].append(json.dumps(extra, ensure_ascii=False) if extra else None)
+    return columns
+
+def _nullify(arr, mask):
+    return pc.if_else(mask, pa.scalar(None, arr.type), arr)
+
+def _regex_number(strings, k=None):
+    """Cast regex-captured digits ("1,800") to float64; "" (group not matched) -> null."""
+    digits = _nullify(strings, pc.equal(strings, ""))
+    values = pc.cast(pc.replace_substring(digits, ",", ""), pa.float64())
+    if k is not None:
+        values = pc.if_else(k, pc.multiply(values, 1000.0), values)
+    return values
+
+def _price_columns(price) -> Dict[str, object]:
+    """Vectorized `parse_price` over a string array."""
+    parts = pc.extract_regex(price, PRICE_PATTERN)
+    lo, lok, hi, hik, unit = (pc.struct_field(parts, name) for name in ("lo", "lok", "hi", "hik", "unit"))
+    has_hik = pc.not_equal(hik, "")
+    low = _regex_number(lo, pc.or_(pc.not_equal(lok, ""), has_hik))
+    high = pc.coalesce(_regex_number(hi, has_hik), low)
+    unit = pc.utf8_lower(_nullify(unit, pc.equal(unit, "")))
+    aliases = pa.array(list(PRICE_UNITS), pa.string())
+    canonical = pc.take(pa.array(list(PRICE_UNITS.values()), pa.string()), pc.index_in(unit, value_set=aliases))
+    return {"priceValue": low, "priceMin": low, "priceMax": high, "priceUnit": pc.coalesce(canonical, unit)}
+
+def _number_column(strings):
+    """Vectorized `to_number` over a string array."""
+    # Scraped coordinates are almost always plain decimals, which a cast handles
+    plain = pc.match_substring_regex(strings, r"^-?\d+(?:\.\d+)?$")
+    if pc.all(pc.or_kleene(plain, pc.is_null(strings))).as_py() is not False:
+        return pc.cast(strings, pa.float64())
+    found = pc.extract_regex(strings, f"(?P<n>{_NUMBER_PATTERN})")
+    return _regex_number(pc.struct_field(found, "n"))
+
+def _text_schema():
+    return pa.schema([field for field in record_schema() if field.name in _KNOWN_FIELDS])
+
+def normalize_columns(text_columns: Dict[str, object], extra) -> "pa.Table":
+    """
+    Vectorized `normalize_record` over raw text columns (`FIELD_ORDER` names
+    -> string or list<string> arrays of equal length; missing names are all
+    null). Returns a table with `record_schema()`, including the typed
+    price and coordinate columns.
+    """
+    _require_pyarrow()
+    schema = record_schema()
+    rows = len(extra)
+    columns: Dict[str, object] = {}
+    for name in FIELD_ORDER:
+        col = text_columns.get(name)
+        if col is None:
+            col = pa.nulls(rows, schema.field(name).type)
+        if name == "price":
+            # normalize_record: "" -> None, otherwise stripped
+            col = _nullify(pc.utf8_trim_whitespace(col), pc.equal(col, ""))
+            columns.update(_price_columns(col))
+        elif name == "label":
+            col = pa.repeat(pa.scalar("post"), rows)
+        elif name in LIST_FIELDS:
+            col = _nullify(col, pc.equal(pc.list_value_length(col), 0))
+        elif name in NUMERIC_FIELDS:
+            columns[NUMERIC_FIELDS[name]] = _number_column(col)
+        columns[name] = col
+    columns[EXTRA_FIELD] = extra
+    return pa.Table.from_arrays([columns[name] for name in schema.names], schema=schema)
+
+def _rowwise_table(records: Iterable[Dict]):
+    return pa.Table.from_pydict(records_to_columns(map(normalize_record, records)), schema=record_schema())
+
+def normalize_batch(records: Sequence[Dict]):
+    """
+    Batch counterpart of `normalize_record` for large reprocessing runs:
+    normalizes a list of parsed records and returns a `pa.Table` with
+    `record_schema()`. Text columns hold what `normalize_record` would
+    produce; priceValue/priceMin/priceMax/priceUnit hold `parse_price` and the
+    coordinate columns `to_number`, computed with Arrow kernels
+    (`table.column("latitudeValue").to_numpy()` for NumPy arrays).
+
+    Only records with keys outside the schema go through `normalize_record`
+    (for the `extra` column). List fields must hold lists, as the parsers
+    produce; a batch holding values of other types falls back to the
+    row-wise conversion.
+
+    Measured (benchmarks/bench_batch_normalize.py, 200k records, one core)
+    against `normalize_record` plus re-parsing price and coordinates: about
+    2.7-2.8x in memory and 3.2-3.6x for `normalize_ndjson`, short of 10x.
+    The kernels take ~0.35s; the rest is getting data into Arrow.
+    Converting the Python dicts (`pa.array`) is over half of this function
+    and caps it below 5x however fast the kernels get. `normalize_ndjson` is bound by
+    Arrow's JSON reader, which is multi-threaded and so scales with cores
+    where the Python loop cannot.
+    """
+    _require_pyarrow()
+    if not isinstance(records, list):
+        records = list(records)
+    odd = [i for i, rec in enumerate(records) if not _KNOWN_FIELDS.issuperset(rec)]
+    extra: List[Optional[str]] = [None] * len(records)
+    if odd:
+        records = list(records)
+        for i in odd:
+            rec = records[i] = normalize_record(records[i])
+            leftover = {k: v for k, v in rec.items() if k not in _KNOWN_FIELDS}
+            extra[i] = json.dumps(leftover, ensure_ascii=False) if leftover else None
+    try:
+        raw = pa.array(records, type=pa.struct(list(_text_schema())))
+    except (pa.ArrowInvalid, pa.ArrowTypeError, TypeError):
+        return _rowwise_table(records)
+    return normalize_columns(dict(zip(FIELD_ORDER, raw.flatten())), pa.array(extra, pa.string()))
+
+def normalize_ndjson(path: str, block_size: int = 16 * 2**20):
+    """
+    `normalize_batch` for an NDJSON export (plain or .gz/.zst), parsed by
+    Arrow's multi-threaded JSON reader so no Python dicts are built.
+    Falls back to line-by-line parsing if the file does not fit the schema.
+    """
+    _require_pyarrow()
+    import pyarrow.json as pj
+
+    read = pj.ReadOptions(block_size=block_size)
+    parse = pj.ParseOptions(explicit_schema=_text_schema(), unexpected_field_behavior="infer")
+    try:
+        with pa.input_stream(path, compression="detect") as stream:
+            table = pj.read_json(stream, read_options=read, parse_options=parse)
+    except (pa.ArrowInvalid, pa.ArrowTypeError):
+        with pa.input_stream(path, compression="detect") as stream:
+            lines = stream.read().decode("utf-8").splitlines()
+        return normalize_batch([json.loads(line) for line in lines if line.strip()])
+
+    others = [name for name in table.column_names if name not in _KNOWN_FIELDS]
+    if not others and table.num_rows:
+        return normalize_columns({name: table.column(name) for name in table.column_names}, pa.nulls(table.num_rows, pa.string()))
+    # Rare: keys outside the schema (or a misspelt "attirbutes"); normalize those rows in Python
+    records = [{k: v for k, v in rec.items() if v is not None} for rec in table.to_pylist()]
+    return normalize_batch(records)
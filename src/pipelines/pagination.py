@@ -0,0 +1,140 @@
+from __future__ import annotations
+
+from typing import Optional
+import math
+import os
+import sqlite3
+import threading
+import time
+
+from config.settings import DATA_DIR
+
+# Results per search page (the `s=` offset step)
+PAGE_SIZE = 120
+
+def pages_for(total: int, page_size: int = PAGE_SIZE) -> int:
+    return math.ceil(total / page_size) if total > 0 else 0
+
+class Paginator:
+    """
+    Decides which search pages to request, learning where the results end.
+
+    The end is the first of: `max_pages`, the page count implied by a
+    reported total (see `text_rules.parse_total_count`), and the first page
+    that came back empty. `observe()` each fetched page; failed fetches are
+    simply not observed, so they never end the crawl. `next_page()` walks
+    the pages one at a time.
+
+    For concurrent fetching, `first_batch()` covers the pages the search is
+    expected to have (its depth in earlier runs, else `batch`) and
+    `next_batch()` the rest: every remaining page at once when the total is
+    known, else a batch twice the size of the last one.
+    """
+
+    def __init__(self, max_pages: int, expected: Optional[int] = None, batch: int = 1, page_size: int = PAGE_SIZE):
+        self.max_pages = max_pages
+        self.expected = expected
+        self.batch = max(1, batch)
+        self.page_size = page_size
+        self.total: Optional[int] = None
+        self.depth = 0  # pages seen with results: 1 + the last non-empty page
+        self._empty_at: Optional[int] = None
+        self._next = 0
+
+    @property
+    def limit(self) -> int:
+        """Pages worth requesting, given what has been observed so far."""
+        limit = self.max_pages
+        if self.total is not None:
+            limit = min(limit, pages_for(self.total, self.page_size))
+        if self._empty_at is not None:
+            limit = min(limit, self._empty_at)
+        return limit
+
+    @property
+    def done(self) -> bool:
+        return self._next >= self.limit
+
+    def observe(self, page: int, count: int, total: Optional[int] = None) -> None:
+        """Record a fetched page: how many results it held and the total it reported."""
+        if total is not None:
+            self.total = total
+        if count:
+            self.depth = max(self.depth, page + 1)
+        elif self._empty_at is None or page < self._empty_at:
+            self._empty_at = page
+
+    def next_page(self, start: int = 0) -> Optional[int]:
+        """For one-at-a-time fetching: the next page to request (from `start`), or None at the end."""
+        page = max(self._next, start)
+        if page >= self.limit:
+            return None
+        self._next = page + 1
+        return page
+
+    def first_batch(self, start: int = 0) -> range:
+        self._next = start
+        return self._take(self.expected - start if self.expected else self.batch)
+
+    def next_batch(self) -> range:
+        if self.total is not None:
+            return self._take(self.limit - self._next)
+        self.batch *= 2
+        return self._take(self.batch)
+
+    def _take(self, size: int) -> range:
+        pages = range(self._next, min(self.limit, self._next + max(1, size)))
+        self._next = max(self._next, pages.stop)
+        return pages
+
+class SearchHistory:
+    """
+    How deep each search went in earlier crawls (SQLite), keyed by the
+    search URL without its offset. The expected depth is an exponentially
+    weighted average of recent runs, so it follows a search that grows or
+    shrinks without overreacting to one odd run.
+    """
+
+    def __init__(self, path: str = os.path.join(DATA_DIR, "search_history.sqlite3"), weight: float = 0.5):
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self.path = path
+        self.weight = weight
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute(
+            """CREATE TABLE IF NOT EXISTS searches (
+                key TEXT PRIMARY KEY,
+                depth REAL NOT NULL,
+                total INTEGER,
+                runs INTEGER NOT NULL,
+                updated REAL NOT NULL
+            )"""
+        )
+        self._conn.commit()
+        self._lock = threading.Lock()
+
+    def expected_pages(self, key: str) -> Optional[int]:
+        with self._lock:
+            row = self._conn.execute("SELECT depth FROM searches WHERE key = ?", (key,)).fetchone()
+        return max(1, math.ceil(row[0])) if row else None
+
+    def record(self, key: str, depth: int, total: Optional[int] = None) -> None:
+        with self._lock:
+            row = self._conn.execute("SELECT depth FROM searches WHERE key = ?", (key,)).fetchone()
+            smoothed = depth if row is None else self.weight * depth + (1 - self.weight) * row[0]
+            self._conn.execute(
+                """INSERT INTO searches (key, depth, total, runs, updated) VALUES (?, ?, ?, 1, ?)
+                   ON CONFLICT(key) DO UPDATE SET depth = excluded.depth, total = excluded.total,
+                   runs = runs + 1, updated = excluded.updated""",
+                (key, smoothed, total, time.time()),
+            )
+            self._conn.commit()
+
+    def close(self) -> None:
+        self._conn.close()
+
+    def __enter__(self) -> "SearchHistory":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
@@ -0,0 +1,137 @@
+from __future__ import annotations
+
+from collections import deque
+from concurrent.futures import Executor, ProcessPoolExecutor
+from typing import Deque, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple, Union
+import logging
+import os
+
+from extractors.backends import DEFAULT_BACKEND, parse_list_html, parse_post_html
+from .normalizers import detect_category_from_url, normalize_record
+from .records import Record
+
+logger = logging.getLogger(__name__)
+
+# (source_url, raw HTML as fetched)
+Page = Tuple[str, Union[str, bytes]]
+
+def _normalize(rec: Dict, url: str, compact: bool, normalize: bool = True) -> Union[Dict, Record]:
+    if not normalize:
+        return Record(rec) if compact else rec
+    rec["category"] = rec.get("category") or detect_category_from_url(url)
+    return Record(rec).normalize() if compact else normalize_record(rec)
+
+def _parse_post(url: str, markup: Union[str, bytes], backend: str, compact: bool = False,
+                normalize: bool = True) -> Union[Dict, Record]:
+    return _normalize(parse_post_html(markup, source_url=url, backend=backend), url, compact, normalize)
+
+def _parse_list(url: str, markup: Union[str, bytes], backend: str, compact: bool = False,
+                normalize: bool = True) -> List:
+    return [_normalize(item, url, compact, normalize) for item in parse_list_html(markup, source_url=url, backend=backend)]
+
+def _parse_post_or_none(url: str, markup: Union[str, bytes], backend: str, compact: bool,
+                        normalize: bool) -> Optional[Union[Dict, Record]]:
+    try:
+        return _parse_post(url, markup, backend, compact, normalize)
+    except Exception:  # noqa: BLE001 - one bad page must not fail its whole batch
+        logger.exception("Failed to parse %s", url)
+        return None
+
+def parse_batch(kind: str, backend: str, pages: Sequence[Page], compact: bool = False, normalize: bool = True,
+                skip_errors: bool = False) -> List:
+    """
+    Worker entry point: parse and normalize a batch of pages, preserving
+    order. With `compact`, records come back as `Record`s, which also
+    pickle smaller on the way back from the worker. With `normalize=False`
+    they come back as parsed, for callers that merge in more fields first.
+    With `skip_errors`, a post page that fails to parse comes back as None
+    instead of failing the batch.
+    """
+    if kind == "post":
+        if skip_errors:
+            return [_parse_post_or_none(url, markup, backend, compact, normalize) for url, markup in pages]
+        return [_parse_post(url, markup, backend, compact, normalize) for url, markup in pages]
+    records: List = []
+    for url, markup in pages:
+        records.extend(_parse_list(url, markup, backend, compact, normalize))
+    return records
+
+class ParallelParser:
+    """
+    Parses raw pages on a process pool so HTML parsing scales past one core.
+
+    Pages are grouped into batches of `batch_size` per task to amortize
+    pickling, and at most `max_pending` batches are in flight, so input is
+    consumed lazily. Records are yielded in input order whatever order the
+    workers finish in. Pass an existing `executor` to share one pool across
+    runs; otherwise a `ProcessPoolExecutor(workers)` is created and owned.
+    Set `compact` to get `Record`s instead of dicts; see `parse_batch` for
+    `normalize` and `skip_errors`. `backend` defaults to the serial path's
+    `DEFAULT_BACKEND`, so both return the same records; pass "lxml" to opt
+    into the faster parser.
+    """
+
+    def __init__(
+        self,
+        workers: Optional[int] = None,
+        batch_size: int = 16,
+        kind: str = "post",
+        backend: str = DEFAULT_BACKEND,
+        max_pending: Optional[int] = None,
+        executor: Optional[Executor] = None,
+        compact: bool = False,
+        normalize: bool = True,
+        skip_errors: bool = False,
+    ):
+        if kind not in ("post", "list"):
+            raise ValueError("kind must be 'post' or 'list'")
+        self.workers = workers or os.cpu_count() or 1
+        self.batch_size = max(1, batch_size)
+        self.kind = kind
+        self.backend = backend
+        self.max_pending = max_pending or self.workers * 2
+        self._executor = executor
+        self._owns_executor = executor is None
+        self.compact = compact
+        self.normalize = normalize
+        self.skip_errors = skip_errors
+
+    @property
+    def executor(self) -> Executor:
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(max_workers=self.workers)
+        return self._executor
+
+    def _batches(self, pages: Iterable[Page]) -> Iterator[List[Page]]:
+        batch: List[Page] = []
+        for page in pages:
+            batch.append(page)
+            if len(batch) >= self.batch_size:
+                yield batch
+                batch = []
+        if batch:
+            yield batch
+
+    def parse(self, pages: Iterable[Page]) -> Iterator[Union[Dict, Record]]:
+        pending: Deque = deque()
+        for batch in self._batches(pages):
+            pending.append(self.executor.submit(parse_batch, self.kind, self.backend, batch, self.compact,
+                                                self.normalize, self.skip_errors))
+            if len(pending) >= self.max_pending:
+                yield from pending.popleft().result()
+            # Hand out finished batches right away rather than only once the pool is full
+            while pending and pending[0].done():
+                yield from pending.popleft().result()
+        while pending:
+            yield from pending.popleft().result()
+
+    def close(self) -> None:
+        if self._owns_executor and self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+
+    def __enter__(self) -> "ParallelParser":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
@@ -0,0 +1,150 @@
+from __future__ import annotations
+
+from collections.abc import MutableMapping
+from typing import Dict, Iterator, Mapping, Optional
+import operator
+import sys
+
+from .normalizers import FIELD_ORDER, _strip_dollar
+
+_FIELDS = frozenset(FIELD_ORDER)
+# Few distinct values across millions of records: share one string object each
+_INTERNED = frozenset(("category", "location"))
+_EMPTY = ([], {})
+# Every slot value at once, in FIELD_ORDER (one C call)
+_values = operator.attrgetter(*FIELD_ORDER)
+
+def _rebuild(values, extra) -> "Record":
+    rec = Record()
+    for name, value in zip(FIELD_ORDER, values):
+        setattr(rec, name, value)
+    rec._extra = extra
+    return rec
+
+class Record(MutableMapping):
+    """
+    Compact in-flight listing: one slot per README field (`FIELD_ORDER`)
+    instead of a per-post dict, with `category`/`location` strings interned.
+    Keys outside the schema (e.g. `repostOf`) go to a small overflow dict.
+
+    A `Record` is a mapping, so code written for record dicts (`.get`,
+    `rec["url"]`, `post_key`) works unchanged. `None` means absent, as in the
+    exported schema. Convert with `to_dict()` (or `as_dict`) at the edge:
+    the dict has the key order `normalize_record` produces.
+    """
+
+    __slots__ = FIELD_ORDER + ("_extra",)
+
+    def __init__(self, data: Optional[Mapping] = None):
+        for name in FIELD_ORDER:
+            setattr(self, name, None)
+        extra = None
+        if data:
+            for key, value in data.items():
+                if key in _FIELDS:
+                    setattr(self, key, value)
+                elif value is not None:
+                    if extra is None:
+                        extra = {}
+                    extra[key] = value
+            if type(self.category) is str:
+                self.category = sys.intern(self.category)
+            if type(self.location) is str:
+                self.location = sys.intern(self.location)
+        self._extra: Optional[Dict] = extra
+
+    @classmethod
+    def from_dict(cls, data: Mapping) -> "Record":
+        return cls(data)
+
+    def __getitem__(self, key):
+        if key in _FIELDS:
+            value = getattr(self, key)
+            if value is not None:
+                return value
+        elif self._extra is not None and key in self._extra:
+            return self._extra[key]
+        raise KeyError(key)
+
+    def __setitem__(self, key, value) -> None:
+        if key in _FIELDS:
+            if key in _INTERNED and type(value) is str:
+                value = sys.intern(value)
+            setattr(self, key, value)
+        elif value is None:
+            if self._extra is not None:
+                self._extra.pop(key, None)
+        elif self._extra is None:
+            self._extra = {key: value}
+        else:
+            self._extra[key] = value
+
+    def __delitem__(self, key) -> None:
+        if key not in self:
+            raise KeyError(key)
+        if key in _FIELDS:
+            setattr(self, key, None)
+        else:
+            del self._extra[key]
+
+    def __contains__(self, key) -> bool:
+        if key in _FIELDS:
+            return getattr(self, key) is not None
+        return self._extra is not None and key in self._extra
+
+    def __iter__(self) -> Iterator[str]:
+        for name, value in zip(FIELD_ORDER, _values(self)):
+            if value is not None:
+                yield name
+        if self._extra:
+            yield from list(self._extra)
+
+    def __len__(self) -> int:
+        return sum(1 for _ in self)
+
+    def get(self, key, default=None):
+        if key in _FIELDS:
+            value = getattr(self, key)
+            return default if value is None else value
+        return self._extra.get(key, default) if self._extra is not None else default
+
+    def setdefault(self, key, default=None):
+        value = self.get(key)
+        if value is None:
+            self[key] = value = default
+        return value
+
+    def to_dict(self) -> Dict:
+        out = {name: value for name, value in zip(FIELD_ORDER, _values(self)) if value is not None}
+        if self._extra:
+            out.update(self._extra)
+        return out
+
+    def copy(self) -> "Record":
+        return _rebuild(_values(self), dict(self._extra) if self._extra else None)
+
+    def normalize(self) -> "Record":
+        """In-place `normalize_record`: same values, no copies."""
+        self.price = _strip_dollar(self.price)
+        extra = self._extra
+        if extra:
+            if "attirbutes" in extra and self.attributes is None:
+                self.attributes = extra.pop("attirbutes")
+            for key in [k for k, v in extra.items() if v in _EMPTY]:
+                del extra[key]
+        self.label = "post"
+        for name, value in zip(FIELD_ORDER, _values(self)):
+            if (type(value) is list or type(value) is dict) and not value:
+                setattr(self, name, None)
+        return self
+
+    def __reduce__(self):
+        # A tuple of slot values pickles smaller than the slot-state dict
+        return _rebuild, (_values(self), self._extra)
+
+    def __repr__(self) -> str:
+        return f"Record({self.to_dict()!r})"
+
+def as_dict(record: Mapping) -> Dict:
+    """The README-schema dict for a `Record`; dicts pass through unchanged."""
+    return record if isinstance(record, dict) else record.to_dict()
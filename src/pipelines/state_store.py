@@ -0,0 +1,115 @@
+from __future__ import annotations
+
+from typing import Dict, Iterable, Optional
+import os
+import re
+import sqlite3
+import threading
+import time
+
+from config.settings import DATA_DIR
+
+NEW = "new"
+CHANGED = "changed"
+SEEN = "seen"
+
+_ID_FROM_URL = re.compile(r"/(\d+)\.html")
+
+def post_key(item: Dict) -> Optional[str]:
+    """Stable key for a listing: its post id, else the id embedded in the URL."""
+    if item.get("id"):
+        return str(item["id"])
+    m = _ID_FROM_URL.search(item.get("url") or "")
+    return m.group(1) if m else item.get("url")
+
+class CrawlState:
+    """
+    Persistent record of posts seen by earlier crawls (SQLite).
+
+    A list row is `seen` when its post id is stored with the same `datetime`
+    and `price`, `changed` when either differs (a repost or price edit), and
+    `new` otherwise. Writes are committed every `commit_every` rows and on
+    `flush()`/`close()`; the store is safe to share between threads.
+    """
+
+    def __init__(self, path: str = os.path.join(DATA_DIR, "crawl_state.sqlite3"), commit_every: int = 100):
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self.path = path
+        self.commit_every = commit_every
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            """CREATE TABLE IF NOT EXISTS posts (
+                id TEXT PRIMARY KEY,
+                datetime TEXT,
+                price TEXT,
+                url TEXT,
+                first_seen REAL NOT NULL,
+                last_seen REAL NOT NULL
+            )"""
+        )
+        self._conn.commit()
+        self._lock = threading.Lock()
+        self._pending = 0
+
+    def classify(self, item: Dict) -> str:
+        key = post_key(item)
+        if key is None:
+            return NEW
+        with self._lock:
+            row = self._conn.execute("SELECT datetime, price FROM posts WHERE id = ?", (key,)).fetchone()
+        if row is None:
+            return NEW
+        if (row[0], row[1]) != (item.get("datetime"), item.get("price")):
+            return CHANGED
+        return SEEN
+
+    def record(self, item: Dict) -> None:
+        """Store the item's current change signal (`datetime`, `price`)."""
+        key = post_key(item)
+        if key is None:
+            return
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                """INSERT INTO posts (id, datetime, price, url, first_seen, last_seen)
+                   VALUES (?, ?, ?, ?, ?, ?)
+                   ON CONFLICT(id) DO UPDATE SET
+                     datetime = excluded.datetime,
+                     price = excluded.price,
+                     url = excluded.url,
+                     last_seen = excluded.last_seen""",
+                (key, item.get("datetime"), item.get("price"), item.get("url"), now, now),
+            )
+            self._pending += 1
+            if self._pending >= self.commit_every:
+                self._conn.commit()
+                self._pending = 0
+
+    def record_many(self, items: Iterable[Dict]) -> None:
+        for item in items:
+            self.record(item)
+
+    def __contains__(self, post_id: str) -> bool:
+        with self._lock:
+            return self._conn.execute("SELECT 1 FROM posts WHERE id = ?", (str(post_id),)).fetchone() is not None
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM posts").fetchone()[0]
+
+    def flush(self) -> None:
+        with self._lock:
+            self._conn.commit()
+            self._pending = 0
+
+    def close(self) -> None:
+        self.flush()
+        self._conn.close()
+
+    def __enter__(self) -> "CrawlState":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
@@ -0,0 +1,321 @@
+from __future__ import annotations
+
+from abc import ABC, abstractmethod
+from dataclasses import dataclass, replace
+from typing import Dict, Iterable, List, Optional
+import os
+import secrets
+import sqlite3
+import threading
+import time
+
+from config.settings import DATA_DIR
+from .pagination import pages_for
+
+PENDING = "pending"
+LEASED = "leased"
+DONE = "done"
+FAILED = "failed"
+
+# Matches a unit only while `lease` still holds it
+_HELD = "location = ? AND category = ? AND page = ? AND state = 'leased' AND token = ?"
+
+@dataclass(frozen=True)
+class WorkUnit:
+    """One search page of one site/category; `max_pages` caps how deep that search is followed."""
+    location: str
+    category: str
+    page: int
+    max_pages: int = 1
+
+    @property
+    def key(self) -> str:
+        return f"{self.location}/{self.category}/{self.page}"
+
+@dataclass(frozen=True)
+class Lease:
+    """A claimed unit. `token` fences it: once the lease expired and was re-claimed, it no longer completes."""
+    unit: WorkUnit
+    worker: str
+    token: str
+    expires: float
+    attempt: int
+
+def next_units(unit: WorkUnit, listings: int, total: Optional[int] = None) -> List[WorkUnit]:
+    """
+    Pages to queue after `unit` came back with `listings` results: none
+    after an empty page, every remaining page once the search reported its
+    total, else just the next one.
+    """
+    if not listings:
+        return []
+    last = unit.max_pages if total is None else min(unit.max_pages, pages_for(total))
+    stop = min(last, unit.page + 2) if total is None else last
+    return [replace(unit, page=page) for page in range(unit.page + 1, stop)]
+
+def _held_args(lease: Lease):
+    return lease.unit.location, lease.unit.category, lease.unit.page, lease.token
+
+class WorkQueue(ABC):
+    """
+    Shared queue of crawl work units, claimed under time-limited leases.
+
+    A worker `claim()`s a unit, `renew()`s the lease while a unit runs long,
+    and then calls `complete()` or `fail()`. A unit whose lease runs out
+    (its worker died or hung) goes back to pending on the next `claim()` or
+    `requeue_expired()`. A unit that fails or expires `max_attempts` times
+    is marked failed. Completing or failing with a lease that was already
+    taken over returns False and changes nothing.
+
+    `reserve(host, interval)` books the next request slot for a host across
+    every worker sharing the queue, and returns the seconds to wait for it.
+    That keeps the per-host rate global however many workers run.
+
+    Subclasses implement the storage; see `SQLiteWorkQueue` and `open_queue`.
+    """
+
+    @abstractmethod
+    def add(self, units: Iterable[WorkUnit]) -> int:
+        """Queue units not queued before (in any state); returns how many were new."""
+
+    @abstractmethod
+    def claim(self, worker: str) -> Optional[Lease]:
+        """Lease the next pending unit to `worker`; None when nothing is pending."""
+
+    @abstractmethod
+    def renew(self, lease: Lease) -> Optional[Lease]:
+        """Extend a held lease; None if it was lost."""
+
+    @abstractmethod
+    def complete(self, lease: Lease, listings: int, total: Optional[int] = None,
+                 follow_ups: Iterable[WorkUnit] = ()) -> bool:
+        """Mark the unit done and queue `follow_ups` in the same step."""
+
+    @abstractmethod
+    def fail(self, lease: Lease, error: str) -> bool:
+        """Put the unit back to pending, or mark it failed after `max_attempts`."""
+
+    @abstractmethod
+    def requeue_expired(self) -> int:
+        """Return units with expired leases to pending (or failed); returns how many."""
+
+    @abstractmethod
+    def reserve(self, host: str, interval: float) -> float:
+        """Book the next request slot for `host`; returns the seconds to wait for it."""
+
+    @abstractmethod
+    def counts(self) -> Dict[str, int]:
+        """Units per state."""
+
+    @abstractmethod
+    def failures(self) -> List[Dict]:
+        """Failed units (location, category, page, attempts, error)."""
+
+    def drained(self) -> bool:
+        """Nothing pending or leased: every unit is done or failed."""
+        counts = self.counts()
+        return not counts.get(PENDING) and not counts.get(LEASED)
+
+    def close(self) -> None:
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+class SQLiteWorkQueue(WorkQueue):
+    """
+    `WorkQueue` in one SQLite file (WAL mode), so any number of worker
+    processes on the machine can share it with no outside service. Every
+    state change is a short `BEGIN IMMEDIATE` transaction. Lease times are
+    wall-clock (`time.time()`), so workers on other hosts sharing the file
+    need roughly synchronized clocks and a filesystem with working locks.
+    """
+
+    def __init__(
+        self,
+        path: str = os.path.join(DATA_DIR, "crawl_queue.sqlite3"),
+        lease_seconds: float = 120.0,
+        max_attempts: int = 3,
+    ):
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self.path = path
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max(1, max_attempts)
+        # Autocommit mode: transactions are opened explicitly with BEGIN IMMEDIATE
+        self._conn = sqlite3.connect(path, timeout=60, isolation_level=None, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(
+            """CREATE TABLE IF NOT EXISTS units (
+                location TEXT NOT NULL,
+                category TEXT NOT NULL,
+                page INTEGER NOT NULL,
+                max_pages INTEGER NOT NULL,
+                state TEXT NOT NULL,
+                worker TEXT,
+                token TEXT,
+                lease_until REAL,
+                attempts INTEGER NOT NULL DEFAULT 0,
+                listings INTEGER,
+                total INTEGER,
+                error TEXT,
+                updated REAL NOT NULL,
+                PRIMARY KEY (location, category, page)
+            );
+            CREATE INDEX IF NOT EXISTS units_by_state ON units (state, page);
+            CREATE TABLE IF NOT EXISTS hosts (
+                host TEXT PRIMARY KEY,
+                next_at REAL NOT NULL
+            );"""
+        )
+        self._lock = threading.Lock()
+
+    def _transaction(self):
+        return _Transaction(self._conn, self._lock)
+
+    def _insert(self, units: Iterable[WorkUnit], now: float) -> int:
+        before = self._conn.total_changes
+        self._conn.executemany(
+            "INSERT OR IGNORE INTO units (location, category, page, max_pages, state, updated) VALUES (?, ?, ?, ?, ?, ?)",
+            [(u.location, u.category, u.page, u.max_pages, PENDING, now) for u in units],
+        )
+        return self._conn.total_changes - before
+
+    def add(self, units: Iterable[WorkUnit]) -> int:
+        with self._transaction():
+            return self._insert(units, time.time())
+
+    def _expire(self, now: float) -> int:
+        give_up = self._conn.execute(
+            "UPDATE units SET state = ?, error = 'lease expired', token = NULL, updated = ? "
+            "WHERE state = ? AND lease_until < ? AND attempts >= ?",
+            (FAILED, now, LEASED, now, self.max_attempts),
+        ).rowcount
+        retry = self._conn.execute(
+            "UPDATE units SET state = ?, error = 'lease expired', token = NULL, updated = ? "
+            "WHERE state = ? AND lease_until < ?",
+            (PENDING, now, LEASED, now),
+        ).rowcount
+        return give_up + retry
+
+    def requeue_expired(self) -> int:
+        with self._transaction():
+            return self._expire(time.time())
+
+    def claim(self, worker: str) -> Optional[Lease]:
+        with self._transaction():
+            now = time.time()
+            self._expire(now)
+            # Shallow pages first, so every search gets started before any is followed deep
+            row = self._conn.execute(
+                "SELECT location, category, page, max_pages, attempts FROM units WHERE state = ? "
+                "ORDER BY page, rowid LIMIT 1",
+                (PENDING,),
+            ).fetchone()
+            if row is None:
+                return None
+            location, category, page, max_pages, attempts = row
+            token = secrets.token_hex(8)
+            expires = now + self.lease_seconds
+            self._conn.execute(
+                "UPDATE units SET state = ?, worker = ?, token = ?, lease_until = ?, attempts = ?, updated = ? "
+                "WHERE location = ? AND category = ? AND page = ?",
+                (LEASED, worker, token, expires, attempts + 1, now, location, category, page),
+            )
+        return Lease(WorkUnit(location, category, page, max_pages), worker, token, expires, attempts + 1)
+
+    def renew(self, lease: Lease) -> Optional[Lease]:
+        with self._transaction():
+            now = time.time()
+            expires = now + self.lease_seconds
+            changed = self._conn.execute(
+                f"UPDATE units SET lease_until = ?, updated = ? WHERE {_HELD} AND lease_until >= ?",
+                (expires, now) + _held_args(lease) + (now,),
+            ).rowcount
+        return replace(lease, expires=expires) if changed else None
+
+    def complete(self, lease: Lease, listings: int, total: Optional[int] = None,
+                 follow_ups: Iterable[WorkUnit] = ()) -> bool:
+        with self._transaction():
+            now = time.time()
+            changed = self._conn.execute(
+                f"UPDATE units SET state = ?, token = NULL, listings = ?, total = ?, error = NULL, updated = ? "
+                f"WHERE {_HELD}",
+                (DONE, listings, total, now) + _held_args(lease),
+            ).rowcount
+            if changed:
+                self._insert(follow_ups, now)
+        return bool(changed)
+
+    def fail(self, lease: Lease, error: str) -> bool:
+        state = FAILED if lease.attempt >= self.max_attempts else PENDING
+        with self._transaction():
+            changed = self._conn.execute(
+                f"UPDATE units SET state = ?, token = NULL, error = ?, updated = ? WHERE {_HELD}",
+                (state, error, time.time()) + _held_args(lease),
+            ).rowcount
+        return bool(changed)
+
+    def reserve(self, host: str, interval: float) -> float:
+        with self._transaction():
+            now = time.time()
+            row = self._conn.execute("SELECT next_at FROM hosts WHERE host = ?", (host,)).fetchone()
+            slot = max(now, row[0]) if row else now
+            self._conn.execute(
+                "INSERT INTO hosts (host, next_at) VALUES (?, ?) ON CONFLICT(host) DO UPDATE SET next_at = excluded.next_at",
+                (host, slot + interval),
+            )
+        return slot - now
+
+    def counts(self) -> Dict[str, int]:
+        with self._lock:
+            rows = self._conn.execute("SELECT state, COUNT(*) FROM units GROUP BY state").fetchall()
+        return dict(rows)
+
+    def failures(self) -> List[Dict]:
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT location, category, page, attempts, error FROM units WHERE state = ? ORDER BY location, category, page",
+                (FAILED,),
+            ).fetchall()
+        return [dict(zip(("location", "category", "page", "attempts", "error"), row)) for row in rows]
+
+    def close(self) -> None:
+        self._conn.close()
+
+class _Transaction:
+    """BEGIN IMMEDIATE ... COMMIT (ROLLBACK on error) under the connection's thread lock."""
+
+    def __init__(self, conn: sqlite3.Connection, lock: threading.Lock):
+        self._conn = conn
+        self._lock = lock
+
+    def __enter__(self):
+        self._lock.acquire()
+        try:
+            self._conn.execute("BEGIN IMMEDIATE")
+        except BaseException:
+            self._lock.release()
+            raise
+        return self._conn
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        try:
+            self._conn.execute("ROLLBACK" if exc_type else "COMMIT")
+        finally:
+            self._lock.release()
+
+# Queue backends by name; register others (e.g. one on a network service) here
+QUEUE_BACKENDS = {"sqlite": SQLiteWorkQueue}
+
+def open_queue(path: str, backend: str = "sqlite", **kwargs) -> WorkQueue:
+    """Open the shared queue at `path` with a registered backend (SQLite by default)."""
+    try:
+        cls = QUEUE_BACKENDS[backend]
+    except KeyError:
+        raise ValueError(f"Unknown queue backend: {backend!r}") from None
+    return cls(path, **kwargs)
@@ -1,34 +1,388 @@
-thonimport requests
-import json
+import requests
 import os
+import logging
+import sys
+import threading
+from contextlib import nullcontext
+from concurrent.futures import ProcessPoolExecutor
 from extractors.craigslist_parser import CraigslistParser
-from outputs.exporters import export_to_json
-from config.settings import PROXY_CONFIG
+from extractors.text_rules import parse_total_count
+from fetchers.async_fetcher import AsyncFetcher
+from fetchers.cache import CachedFetcher, ResponseCache
+from fetchers.http_client import HttpClient
+from metrics import NULL_METRICS, profiling
+from pipelines.checkpoint import Checkpoint
+from pipelines.crawl import CrawlPipeline
+from pipelines.dedup import DedupIndex
+from pipelines.exporters import open_writer
+from pipelines.geo_index import GeoIndexBuilder, build_geo_index
+from pipelines.pagination import Paginator, SearchHistory
+from pipelines.state_store import SEEN, CrawlState, post_key
+from config.settings import DATA_DIR, PROXY_CONFIG
+
+logger = logging.getLogger(__name__)
+
+_FAILED = object()
+
+def _cached_size(html):
+    # A page from the response cache counts as its encoded size, as a network read would
+    return len(html.encode('utf-8'))
 
 class CraigslistScraper:
-    def __init__(self, category, location, output_format='json'):
+    def __init__(self, category, location, output_format='json', concurrency=None, rate_per_host=1.0, base_url=None,
+                 state_path=None, compression=None, rotate_records=None, rotate_bytes=None, backend='bs4',
+                 parse_workers=None, cache_path=None, cache_ttl=3600, cache_max_bytes=512 * 2**20, replay=False,
+                 dedup_path=None, dedup_mode='flag', dedup_threshold=0.95, geo_index_path=None, metrics=None,
+                 profile_path=None, checkpoint_path=None, checkpoint_every=100, history_path=None, output_dir=None,
+                 retries=3):
         self.category = category
         self.location = location
         self.output_format = output_format
+        # Created on first write if missing
+        self.output_dir = output_dir or DATA_DIR
+        # Streaming output options; rotation applies to ndjson only
+        self.compression = compression
+        self.rotate_records = rotate_records
+        self.rotate_bytes = rotate_bytes
         self.parser = CraigslistParser()
-    
+        # Parser backend for the detail crawl: 'bs4', the faster 'lxml', or 'partial'
+        # (bs4 on just the parts of the post page it reads)
+        self.backend = backend
+        # Processes for detail-page parsing; None parses on the fetch threads
+        self.parse_workers = parse_workers
+        # concurrency=None keeps the original one-page-at-a-time behaviour
+        self.concurrency = concurrency
+        self.rate_per_host = rate_per_host
+        self.base_url = base_url or f"https://{location}.craigslist.org"
+        # 'bytes' counts page bodies read, whether from the network or the response cache
+        self.stats = {'pages': 0, 'listings': 0, 'bytes': 0}
+        self._stats_lock = threading.Lock()
+        # Stage timings and HTTP counters (metrics.Metrics); off unless one is passed in
+        self.metrics = metrics or NULL_METRICS
+        # cProfile/tracemalloc output prefix for scrape(), e.g. 'data/profile/run1'
+        self.profile_path = profile_path
+        # One pooled client (retries, backoff, proxy rotation) shared by every fetch path;
+        # retries=0 leaves retrying to the caller (the sharded crawl's work queue does)
+        self.http = HttpClient(proxies=PROXY_CONFIG, retries=retries, pool_size=max(10, concurrency or 0),
+                               metrics=self.metrics)
+        self.stats['http'] = self.http.stats
+        # With a state store, repeat runs only keep posts that are new or changed since the last run
+        self.state = CrawlState(state_path) if state_path else None
+        # Raw HTML cache; replay=True serves everything from it with no network access
+        self.cache = None
+        if cache_path or replay:
+            cache_path = cache_path or os.path.join(DATA_DIR, 'http_cache.sqlite3')
+            cache = ResponseCache(cache_path, ttl=cache_ttl, max_bytes=cache_max_bytes)
+            self.cache = CachedFetcher(cache, session=self.http, offline=replay)
+            self.stats['cache'] = self.cache.stats
+        # Near-duplicate index for the detail crawl: reposts are flagged ('repostOf') or dropped
+        self.dedup = DedupIndex(dedup_path, threshold=dedup_threshold) if dedup_path else None
+        self.dedup_mode = dedup_mode
+        # Grid index over exported coordinates, written next to the output (see pipelines.geo_index)
+        self.geo_index_path = geo_index_path
+        # Progress file for scrape(resume=True); committed after every list page, or every
+        # `checkpoint_every` records of a detail crawl
+        self.checkpoint_path = checkpoint_path
+        self.checkpoint_every = checkpoint_every
+        # Search depths from earlier runs, so concurrent mode requests the expected pages up front
+        self.history = SearchHistory(history_path) if history_path else None
+        # page -> result total the fetched page reported (None if it did not say)
+        self._list_totals = {}
+        # Concurrent mode's AsyncFetcher, created on first use
+        self._fetcher = None
+        self._closed = False
+
+    def page_url(self, page):
+        return f"{self.base_url}/search/{self.category}?s={page * 120}"
+
     def fetch_listings(self, page=1):
-        url = f"https://{self.location}.craigslist.org/search/{self.category}?s={page * 120}"
-        response = requests.get(url, proxies=PROXY_CONFIG)
-        listings = self.parser.parse_listing_page(response.text)
+        url = self.page_url(page)
+        if self.cache is not None:
+            html = self.cache(url)
+            if html is None:
+                self._count_page(0, [])
+                return []
+            listings = self._parse_listing_page(html)
+            self._list_totals[page] = parse_total_count(html)
+            self._count_page(_cached_size(html), listings)
+            return listings
+        try:
+            response = self.http.get(url)
+        except requests.RequestException as e:
+            logger.error("Request failed for %s: %s", url, e)
+            return []
+        if response.status_code != 200:
+            logger.warning("Non-200 for %s: %s", url, response.status_code)
+            return []
+        listings = self._parse_listing_page(response.text)
+        self._list_totals[page] = parse_total_count(response.text)
+        self._count_page(len(response.content), listings)
+        return listings
+
+    def fetch_search_page(self, page):
+        """One search page as (listings, reported total), or None when it could not be fetched."""
+        html = self._fetch_html(self.page_url(page))
+        if html is None:
+            return None
+        listings = self._parse_listing_page(html)
+        self._count_page(0, listings)
+        return listings, parse_total_count(html)
+
+    def fetch_pages_concurrently(self, pages):
+        """Fetch search pages concurrently; yields each page's listings in page order."""
+        urls = [self.page_url(page) for page in pages]
+        results = self._async_fetcher().run(urls)
+        for page, result in zip(pages, results):
+            if result.text is None:
+                logger.error("Skipping %s: %s", result.url, result.error)
+                yield []  # keep one item per page, as the sequential path does
+                continue
+            page_listings = self._parse_listing_page(result.text)
+            self._list_totals[page] = parse_total_count(result.text)
+            # Through the cache the fetcher reports no size
+            size = result.size if self.cache is None else _cached_size(result.text)
+            self._count_page(size, page_listings)
+            yield page_listings
+
+    def _async_fetcher(self):
+        # One fetcher for the scraper's lifetime: its per-host token buckets span every batch
+        if self._fetcher is None:
+            self._fetcher = AsyncFetcher(max_in_flight=self.concurrency or 4, rate_per_host=self.rate_per_host,
+                                         client=self.http, fetch=self.cache)
+        return self._fetcher
+
+    def _parse_listing_page(self, html):
+        with self.metrics.timer('parse_list'):
+            return self.parser.parse_listing_page(html)
+
+    def fetch_listings_concurrently(self, pages):
+        listings = []
+        for page_listings in self.fetch_pages_concurrently(pages):
+            listings.extend(page_listings)
         return listings
-    
+
+    def _count_page(self, size, listings):
+        with self._stats_lock:
+            self.stats['pages'] += 1
+            self.stats['listings'] += len(listings)
+            self.stats['bytes'] += size
+
+    def _fetch_html(self, url):
+        if self.cache is not None:
+            html = self.cache(url)
+            if html is not None:
+                with self._stats_lock:
+                    self.stats['bytes'] += _cached_size(html)
+            return html
+        try:
+            response = self.http.get(url)
+        except requests.RequestException as e:
+            logger.error("Request failed for %s: %s", url, e)
+            return None
+        with self._stats_lock:
+            self.stats['bytes'] += len(response.content)
+        if response.status_code != 200:
+            logger.warning("Non-200 for %s: %s", url, response.status_code)
+            return None
+        return response.text
+
+    def _fetch_throttled(self, url):
+        # Detail workers book the concurrent fetcher's per-host buckets, so rate_per_host bounds the whole crawl
+        if self.cache is None or not self.cache.offline:
+            self._async_fetcher().throttle(url)
+        return self._fetch_html(url)
+
+    def crawl_details(self, num_pages=5, detail_workers=4, queue_size=256, exclude_ids=None):
+        """Stream normalized detail-page records for the first `num_pages` search pages."""
+        parse_pool = ProcessPoolExecutor(self.parse_workers) if self.parse_workers else None
+        pipeline = CrawlPipeline(self._fetch_throttled, detail_workers=detail_workers, queue_size=queue_size, state=self.state,
+                                 backend=self.backend, parse_executor=parse_pool, dedup=self.dedup,
+                                 dedup_mode=self.dedup_mode, metrics=self.metrics, exclude_ids=exclude_ids)
+        try:
+            for record in pipeline.run(self.page_url(page) for page in range(num_pages)):
+                yield record
+        finally:
+            if parse_pool is not None:
+                parse_pool.shutdown()
+        with self._stats_lock:
+            self.stats['pages'] += pipeline.stats['listPages']
+            self.stats['listings'] += pipeline.stats['detailPages']
+            self.stats['reposts'] = self.stats.get('reposts', 0) + pipeline.stats['reposts']
+        if self.state is not None:
+            self.state.flush()
+        if self.dedup is not None:
+            self.dedup.flush()
+
+    def output_path(self):
+        return os.path.join(self.output_dir, f"{self.category}_{self.location}_scrape.{self.output_format}")
+
+    def open_writer(self):
+        if self.output_format == 'ndjson':
+            return open_writer(self.output_path(), 'ndjson', compression=self.compression,
+                               max_records=self.rotate_records, max_bytes=self.rotate_bytes)
+        if self.output_format == 'json':
+            return open_writer(self.output_path(), 'json', indent=4, compression=self.compression)
+        if self.output_format == 'parquet':
+            return open_writer(self.output_path(), 'parquet')
+        raise ValueError(f"Unsupported output format: {self.output_format}")
+
     def save_data(self, data):
-        output_path = os.path.join('data', f"{self.category}_{self.location}_scrape.{self.output_format}")
-        export_to_json(data, output_path)
+        with self.open_writer() as writer:
+            writer.write_many(data)
+        return writer.paths
+
+    def search_key(self):
+        return f"{self.base_url}/search/{self.category}"
+
+    def _observe(self, paginator, page, listings):
+        """Feed a page to the paginator; returns its listings, or None when the fetch failed."""
+        total = self._list_totals.pop(page, _FAILED)
+        if total is _FAILED:  # a failed fetch says nothing about where the results end
+            return None
+        paginator.observe(page, len(listings), total)
+        return listings
+
+    def _list_pages(self, paginator, start):
+        if not self.concurrency:
+            while True:
+                page = paginator.next_page(start)
+                if page is None:
+                    return
+                yield self._observe(paginator, page, self.fetch_listings(page))
+        batch = paginator.first_batch(start)
+        while batch:
+            for page, listings in zip(batch, self.fetch_pages_concurrently(batch)):
+                yield self._observe(paginator, page, listings)
+            batch = paginator.next_batch()
+
+    def iter_list_pages(self, num_pages, start=0):
+        """
+        Yield each search page's listings (new or changed ones only, with a state store), one item per
+        page from `start`, or None for a page that could not be fetched. Paging ends at `num_pages`, at
+        the page count implied by the total the search reports, or at the first empty page, whichever
+        comes first; with a state store, sequential paging also ends at the first page that held
+        listings but nothing new or changed. A failed page never ends it.
+        """
+        expected = self.history.expected_pages(self.search_key()) if self.history is not None else None
+        paginator = Paginator(num_pages, expected=expected, batch=self.concurrency or 1)
+        for listings in self._list_pages(paginator, start):
+            if listings and self.state is not None:
+                listings = [l for l in listings if self.state.classify(l) != SEEN]
+                if not listings and not self.concurrency:
+                    break
+            yield listings
+        else:
+            if self.history is not None and paginator.depth:
+                self.history.record(self.search_key(), paginator.depth, paginator.total)
+
+    def _export(self, writer, records):
+        for record in records:
+            with self.metrics.timer('export'):
+                writer.write(record)
+
+    def _export_checkpointed(self, writer, records, checkpoint):
+        for n, record in enumerate(records, 1):
+            with self.metrics.timer('export'):
+                writer.write(record)
+            checkpoint.emit(post_key(record))
+            if n % self.checkpoint_every == 0:
+                self._commit(writer, checkpoint)
+        self._commit(writer, checkpoint)
+
+    def _commit(self, writer, checkpoint, next_page=None):
+        writer.flush()
+        checkpoint.commit(writer.tell(), writer.records_written, next_page=next_page)
+
+    def open_checkpoint(self, details=False, resume=False):
+        """The crawl's Checkpoint: the saved one when resuming, else a fresh one."""
+        if self.output_format not in ('ndjson', 'json') or self.compression or self.rotate_records or self.rotate_bytes:
+            raise ValueError('Checkpoints need uncompressed, unrotated ndjson or json output')
+        job = {'category': self.category, 'location': self.location, 'baseUrl': self.base_url,
+               'format': self.output_format, 'output': self.output_path(), 'details': details}
+        return Checkpoint.open(self.checkpoint_path, job, resume=resume)
+
+    def scrape(self, num_pages=5, details=False, resume=False):
+        """
+        Crawl and stream records to the output file as they are produced; returns the written paths.
+
+        With a checkpoint_path, resume=True continues an interrupted crawl: the partial output is cut
+        back to the last checkpoint, list mode carries on from the next page, and a detail crawl
+        re-reads the search pages but skips posts it already wrote. Records are not duplicated.
+        A finished crawl removes its checkpoint, unless a search page could not be fetched: then it
+        keeps it, and resume=True continues the output from that page.
+        """
+        with profiling(self.profile_path) if self.profile_path else nullcontext():
+            return self._scrape(num_pages, details, resume)
+
+    def _scrape(self, num_pages, details, resume=False):
+        checkpoint = self.open_checkpoint(details, resume) if self.checkpoint_path else None
+        resumed = checkpoint is not None and checkpoint.resumed
+        # A resumed run's geo index must cover the earlier output too; it is rebuilt from the file instead
+        geo = GeoIndexBuilder(self.geo_index_path) if self.geo_index_path and not resumed else None
+        # First list page whose fetch failed: a resumed run starts over from there
+        retry_from = None
+        try:
+            with self.open_writer() as writer:
+                if resumed:
+                    writer.resume(checkpoint.output_offset, checkpoint.records)
+                if details:
+                    records = self.crawl_details(num_pages, detail_workers=self.concurrency or 4,
+                                                 exclude_ids=checkpoint.emitted if checkpoint else None)
+                    records = geo.tee(records) if geo is not None else records
+                    if checkpoint is not None:
+                        self._export_checkpointed(writer, records, checkpoint)
+                    else:
+                        self._export(writer, records)
+                else:
+                    start = checkpoint.next_page if checkpoint is not None else 0
+                    for page, listings in enumerate(self.iter_list_pages(num_pages, start), start):
+                        if listings is None:
+                            retry_from = page if retry_from is None else retry_from
+                            continue
+                        if checkpoint is not None:
+                            listings = checkpoint.take_new(listings)
+                        self._export(writer, listings)
+                        if geo is not None:
+                            geo.add_many(listings)
+                        if checkpoint is not None:
+                            self._commit(writer, checkpoint, next_page=page + 1 if retry_from is None else retry_from)
+                        if self.state is not None:
+                            self.state.record_many(listings)
+        finally:
+            if checkpoint is not None:
+                checkpoint.close()
+        if checkpoint is not None:
+            if retry_from is None:
+                checkpoint.remove()
+            else:
+                logger.warning('List page %d failed; keeping %s so resume=True retries it',
+                               retry_from, self.checkpoint_path)
+        if self.state is not None:
+            self.state.flush()
+        if geo is not None:
+            geo.close()
+        elif resumed and self.geo_index_path:
+            build_geo_index(writer.paths, self.geo_index_path)
+        return writer.paths
+
+    def close(self):
+        """Release the HTTP session, the fetcher's threads and every store this scraper opened."""
+        if self._closed:
+            return
+        self._closed = True
+        if self._fetcher is not None:
+            self._fetcher.close()
+        for store in (self.state, self.dedup, self.history, self.cache.cache if self.cache else None):
+            if store is not None:
+                store.close()
+        self.http.close()
+
+    def __enter__(self):
+        return self
 
-    def scrape(self, num_pages=5):
-        all_listings = []
-        for page in range(num_pages):
-            listings = self.fetch_listings(page)
-            all_listings.extend(listings)
-        self.save_data(all_listings)
+    def __exit__(self, *exc):
+        self.close()
 
 if __name__ == "__main__":
-    scraper = CraigslistScraper(category='jobs', location='newyork')
-    scraper.scrape()
\ No newline at end of file
+    from cli import main
+    main(['scrape'] + sys.argv[1:])
\ No newline at end of file
@@ -0,0 +1,29 @@
+from __future__ import annotations
+
+import json
+import sys
+from pathlib import Path
+
+import pytest
+
+# Ensure src is importable
+ROOT = Path(__file__).resolve().parents[1]
+SRC = ROOT / "src"
+sys.path.insert(0, str(ROOT))
+sys.path.insert(0, str(SRC))
+
+from cli import main  # noqa: E402
+
+def test_cli_parse_then_export(tmp_path, capsys):
+    page = ROOT / "tests" / "fixtures" / "sample_pages" / "list_page.html"
+    ndjson = tmp_path / "rows.ndjson"
+    with pytest.raises(SystemExit) as exit_info:
+        main(["parse", "--input", str(page), "--backend", "lxml", "--output", str(ndjson)])
+    assert exit_info.value.code == 0
+    rows = [json.loads(line) for line in ndjson.read_text(encoding="utf-8").splitlines()]
+    assert rows and all(r["id"] for r in rows)
+
+    with pytest.raises(SystemExit):
+        main(["export", "--input", str(ndjson), "--format", "json"])
+    assert capsys.readouterr().out.strip() == str(tmp_path / "rows.json")
+    assert json.loads((tmp_path / "rows.json").read_text(encoding="utf-8")) == rows
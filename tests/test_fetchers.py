@@ -0,0 +1,457 @@
+from __future__ import annotations
+
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from urllib.parse import parse_qs, urlsplit
+
+import pytest
+
+# Ensure src is importable
+ROOT = Path(__file__).resolve().parents[1]
+SRC = ROOT / "src"
+sys.path.insert(0, str(ROOT))
+sys.path.insert(0, str(SRC))
+
+from src.fetchers.async_fetcher import AsyncFetcher  # noqa: E402
+from runner import CraigslistScraper  # noqa: E402
+
+LIST_ROW = """
+<html><body><ul class="rows">
+  <li class="result-row" data-id="{offset}">
+    <a href="https://example.org/nyc/jjj/{offset}.html">Listing at {offset}</a>
+    <time datetime="2024-01-01T12:00:00-0500"></time>
+  </li>
+</ul></body></html>
+"""
+
+class _ListHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        offset = int(parse_qs(urlsplit(self.path).query).get("s", ["0"])[0])
+        # Later pages answer faster, so completions arrive out of order
+        time.sleep(max(0.0, 0.2 - offset / 1200))
+        body = LIST_ROW.format(offset=offset).encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/html; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+@pytest.fixture
+def list_server():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _ListHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_address[1]}"
+    server.shutdown()
+    server.server_close()
+
+def test_async_fetcher_keeps_input_order(list_server):
+    urls = [f"{list_server}/search/jobs?s={page * 120}" for page in range(5)]
+    with AsyncFetcher(max_in_flight=5, rate_per_host=100, burst=5) as fetcher:
+        results = fetcher.run(urls)
+    assert [r.url for r in results] == urls
+    assert all(r.ok for r in results)
+    assert "Listing at 480" in results[4].text
+
+def test_async_fetcher_rate_limits_per_host(list_server):
+    urls = [f"{list_server}/search/jobs?s=1200" for _ in range(4)]
+    started = time.monotonic()
+    with AsyncFetcher(max_in_flight=4, rate_per_host=10, burst=1) as fetcher:
+        fetcher.run(urls)
+    # One token up front, then three more at 10/s
+    assert time.monotonic() - started >= 0.28
+
+def test_async_fetcher_rate_limit_spans_runs(list_server):
+    urls = [f"{list_server}/search/jobs?s=1200" for _ in range(2)]
+    started = time.monotonic()
+    with AsyncFetcher(max_in_flight=2, rate_per_host=10, burst=1) as fetcher:
+        fetcher.run(urls)
+        fetcher.run(urls)  # no fresh burst for the second batch
+    assert time.monotonic() - started >= 0.28
+
+def test_scraper_concurrent_mode_matches_page_order(list_server):
+    scraper = CraigslistScraper("jobs", "newyork", concurrency=4, rate_per_host=100, base_url=list_server)
+    listings = scraper.fetch_listings_concurrently(range(4))
+    assert [l["id"] for l in listings] == ["0", "120", "240", "360"]
+
+def test_detail_crawl_is_held_to_rate_per_host(tmp_path):
+    from src.fetchers.cache import ResponseCache
+
+    ids = range(7000001, 7000015)
+    rows = "".join(f'<li class="result-row"><a href="https://example.org/nyc/apa/{i}.html">Post {i}</a></li>'
+                   for i in ids)
+    cache = ResponseCache(str(tmp_path / "cache.sqlite3"))
+    cache.put("https://example.org/search/apa?s=0", f'<ul class="rows">{rows}</ul>')
+    for i in ids:
+        cache.put(f"https://example.org/nyc/apa/{i}.html", f'<h1 id="titletextonly">Detail {i}</h1>')
+    cache.close()
+    scraper = CraigslistScraper("apa", "newyork", base_url="https://example.org", rate_per_host=10, concurrency=4,
+                                cache_path=str(tmp_path / "cache.sqlite3"))
+    started = time.monotonic()
+    records = list(scraper.crawl_details(num_pages=1, detail_workers=4))
+    # 15 requests to one host: a burst of 10, then five more at 10/s
+    assert len(records) == 14
+    assert time.monotonic() - started >= 0.45
+
+def test_scraper_counts_bytes_of_cached_pages(list_server, tmp_path):
+    cache = str(tmp_path / "cache.sqlite3")
+    live = CraigslistScraper("jobs", "newyork", base_url=list_server, cache_path=cache)
+    for page in range(3):
+        live.fetch_listings(page)
+    assert live.stats["bytes"] == live.stats["cache"]["bytes"] > 0
+
+    replay = CraigslistScraper("jobs", "newyork", base_url=list_server, cache_path=cache, replay=True)
+    for page in range(3):
+        replay.fetch_listings(page)
+    assert replay.stats["bytes"] == live.stats["bytes"]
+    replay = CraigslistScraper("jobs", "newyork", concurrency=3, rate_per_host=100, base_url=list_server,
+                               cache_path=cache, replay=True)
+    replay.fetch_listings_concurrently(range(3))
+    assert replay.stats["bytes"] == live.stats["bytes"]
+    assert replay.stats["cache"]["hits"] == 3
+
+class _ETagHandler(BaseHTTPRequestHandler):
+    hits = []
+
+    def do_GET(self):
+        type(self).hits.append((self.path, self.headers.get("If-None-Match")))
+        etag = f'"v-{self.path}"'
+        if self.headers.get("If-None-Match") == etag:
+            self.send_response(304)
+            self.end_headers()
+            return
+        body = f"<html><body>page {self.path}</body></html>".encode("utf-8")
+        self.send_response(200)
+        self.send_header("ETag", etag)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+@pytest.fixture
+def etag_server():
+    _ETagHandler.hits = []
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _ETagHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield f"http://127.0.0.1:{server.server_address[1]}"
+    server.shutdown()
+    server.server_close()
+
+def test_cached_fetcher_revalidates_and_replays(tmp_path, etag_server):
+    from src.fetchers.cache import CachedFetcher, ResponseCache
+
+    cache = ResponseCache(str(tmp_path / "cache.sqlite3"), ttl=0)
+    fetcher = CachedFetcher(cache)
+    url = f"{etag_server}/a"
+    assert "page /a" in fetcher(url)
+    assert "page /a" in fetcher(url)  # ttl=0: stale, revalidated with a conditional GET
+    assert _ETagHandler.hits == [("/a", None), ("/a", '"v-/a"')]
+    assert fetcher.stats["revalidated"] == 1
+
+    replay = CachedFetcher(cache, offline=True)
+    assert "page /a" in replay(url)
+    assert replay(f"{etag_server}/never-fetched") is None
+    assert len(_ETagHandler.hits) == 2  # replay never touched the network
+
+def test_response_cache_evicts_least_recently_used(tmp_path):
+    import random
+    from src.fetchers.cache import ResponseCache
+
+    rnd = random.Random(1)
+    page = lambda: "".join(rnd.choice("abcdefghij") for _ in range(4000))  # noqa: E731
+    cache = ResponseCache(str(tmp_path / "cache.sqlite3"), max_bytes=None, access_interval=0)
+    cache.put("u1", page())
+    cache.max_bytes = int(cache.size() * 2.5)  # room for two compressed pages
+    cache.put("u2", page())
+    cache.get("u1")  # u2 is now the least recently used
+    cache.put("u3", page())
+    assert cache.get("u2") is None
+    assert cache.get("u1") is not None and cache.get("u3") is not None
+    assert cache.size() <= cache.max_bytes
+
+    # Writes keep a running byte total instead of summing the table
+    statements = []
+    cache._conn.set_trace_callback(statements.append)
+    cache.put("u3", page())  # replaces an entry
+    cache.put("u4", page())  # evicts one
+    cache._conn.set_trace_callback(None)
+    assert not any("SUM(" in sql for sql in statements)
+    assert cache._bytes == cache.size() <= cache.max_bytes
+    cache.close()
+    reopened = ResponseCache(str(tmp_path / "cache.sqlite3"), max_bytes=None)
+    assert reopened._bytes == reopened.size()
+
+def test_response_cache_reads_only_restamp_stale_access_times(tmp_path):
+    from src.fetchers.cache import ResponseCache
+
+    cache = ResponseCache(str(tmp_path / "cache.sqlite3"), ttl=600)
+    assert cache.access_interval == 300
+    cache.put("u1", "<html>one</html>")
+    writes = cache._conn.total_changes
+    for _ in range(50):
+        assert cache.get("u1")["fresh"]
+    assert cache._conn.total_changes == writes  # hot reads neither write nor commit
+    cache._conn.execute("UPDATE responses SET last_access = last_access - 301")
+    writes = cache._conn.total_changes
+    cache.get("u1")
+    cache.get("u1")
+    assert cache._conn.total_changes == writes + 1
+
+class _FlakyHandler(BaseHTTPRequestHandler):
+    hits = []
+
+    def do_GET(self):
+        type(self).hits.append(self.path)
+        if len(type(self).hits) <= 2:
+            self.send_response(429)
+            self.send_header("Retry-After", "1")
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+        body = b"<html><body>ok</body></html>"
+        self.send_response(200)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+@pytest.fixture
+def flaky_server():
+    _FlakyHandler.hits = []
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _FlakyHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield f"http://127.0.0.1:{server.server_address[1]}"
+    server.shutdown()
+    server.server_close()
+
+def test_http_client_retries_429_honouring_retry_after(flaky_server):
+    from src.fetchers.http_client import HttpClient
+
+    sleeps = []
+    with HttpClient(retries=3, backoff=0.01, sleep=sleeps.append) as client:
+        assert client.fetch(f"{flaky_server}/a") == "<html><body>ok</body></html>"
+        assert len(_FlakyHandler.hits) == 3
+        assert sleeps == [1.0, 1.0]  # Retry-After outweighs the tiny backoff
+        assert client.stats["retries"] == 2 and client.stats["failures"] == 0
+
+def test_http_client_evicts_failing_proxy(list_server):
+    from src.fetchers.http_client import HttpClient, ProxyPool
+
+    # The test server answers absolute-URI requests, so it doubles as a forward proxy
+    pool = ProxyPool(["http://127.0.0.1:9", list_server], max_failures=1, cooldown=60)
+    with HttpClient(proxies=pool, retries=2, sleep=lambda s: None) as client:
+        texts = [client.fetch(f"http://listings.invalid/search/jobs?s={1200 + i}") for i in range(4)]
+    assert all(t and "Listing at" in t for t in texts)
+    assert pool.healthy() == 1 and client.stats["requests"] == 5  # one failed attempt, then the bad proxy is out
+
+def test_scraper_resumes_interrupted_crawl_without_duplicates(list_server, tmp_path):
+    import json
+
+    ckpt = str(tmp_path / "crawl.ckpt")
+    out = str(tmp_path / "data")
+    scraper = CraigslistScraper("jobs", "newyork", output_format="ndjson", base_url=list_server, checkpoint_path=ckpt,
+                                output_dir=out)
+    fetch = scraper.fetch_listings
+
+    def crash_on_page_3(page=1):
+        if page == 3:
+            raise ConnectionError("killed")
+        return fetch(page)
+
+    scraper.fetch_listings = crash_on_page_3
+    with pytest.raises(ConnectionError):
+        scraper.scrape(num_pages=5)
+    part = tmp_path / "data" / "jobs_newyork_scrape.ndjson.part"
+    with open(part, "ab") as f:
+        f.write(b'{"id": "torn wri')  # a record cut off mid-write, after the last commit
+    assert json.loads((tmp_path / "crawl.ckpt").read_text())["nextPage"] == 3
+
+    resumed = CraigslistScraper("jobs", "newyork", output_format="ndjson", base_url=list_server, checkpoint_path=ckpt,
+                                output_dir=out)
+    fetched = []
+    resumed_fetch = resumed.fetch_listings
+    resumed.fetch_listings = lambda page=1: fetched.append(page) or resumed_fetch(page)
+    [path] = resumed.scrape(num_pages=5, resume=True)
+
+    assert fetched == [3, 4]
+    with open(path, encoding="utf-8") as f:
+        assert [json.loads(line)["id"] for line in f] == ["0", "120", "240", "360", "480"]
+    assert not (tmp_path / "crawl.ckpt").exists() and not part.exists()
+
+class _SearchHandler(BaseHTTPRequestHandler):
+    total = 250
+    show_total = True
+    hits = []
+    busy = 0  # answer this many requests with 503 first
+
+    def do_GET(self):
+        offset = int(parse_qs(urlsplit(self.path).query).get("s", ["0"])[0])
+        type(self).hits.append(offset)
+        if type(self).busy:
+            type(self).busy -= 1
+            self.send_response(503)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+        rows = "".join(
+            f'<li class="result-row" data-id="{i}"><a href="https://example.org/nyc/jjj/{i}.html">Post {i}</a>'
+            f'<time datetime="2024-01-01T12:00:00-0500"></time></li>'
+            for i in range(offset, min(offset + 120, self.total))
+        )
+        count = f'<span class="totalcount">{self.total}</span>' if self.show_total else ""
+        body = f'<html><body>{count}<ul class="rows">{rows}</ul></body></html>'.encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+@pytest.fixture
+def search_server():
+    _SearchHandler.hits = []
+    _SearchHandler.show_total = True
+    _SearchHandler.busy = 0
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _SearchHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield f"http://127.0.0.1:{server.server_address[1]}"
+    server.shutdown()
+    server.server_close()
+
+def test_pagination_stops_at_reported_total_or_empty_page(search_server, tmp_path):
+    from src.pipelines.pagination import SearchHistory
+
+    scraper = CraigslistScraper("jobs", "newyork", base_url=search_server)
+    assert sum(len(p) for p in scraper.iter_list_pages(10)) == 250
+    assert _SearchHandler.hits == [0, 120, 240]  # 250 results fill three pages
+
+    _SearchHandler.hits, _SearchHandler.show_total = [], False
+    assert sum(len(p) for p in scraper.iter_list_pages(10)) == 250
+    assert _SearchHandler.hits == [0, 120, 240, 360]  # no count: the first empty page ends it
+
+    # Concurrent mode learns the depth, then requests exactly those pages up front
+    history = str(tmp_path / "history.sqlite3")
+    _SearchHandler.hits, _SearchHandler.show_total = [], True
+    for _ in range(2):
+        scraper = CraigslistScraper("jobs", "newyork", concurrency=2, rate_per_host=100, base_url=search_server,
+                                    history_path=history)
+        assert [len(p) for p in scraper.iter_list_pages(10)] == [120, 120, 10]
+    assert sorted(_SearchHandler.hits) == [0, 0, 120, 120, 240, 240]
+    assert SearchHistory(history).expected_pages(f"{search_server}/search/jobs") == 3
+
+def test_failed_list_page_neither_ends_crawl_nor_is_checkpointed_done(search_server, tmp_path):
+    import json
+
+    ckpt = str(tmp_path / "crawl.ckpt")
+    options = dict(output_format="ndjson", base_url=search_server, checkpoint_path=ckpt, output_dir=str(tmp_path),
+                   state_path=str(tmp_path / "state.sqlite3"))
+    scraper = CraigslistScraper("jobs", "newyork", **options)
+    fetch = scraper.fetch_listings
+
+    def flaky(page=1):
+        if page == 1:
+            return []  # what fetch_listings returns when the request fails
+        if page == 2:
+            raise ConnectionError("killed")
+        return fetch(page)
+
+    scraper.fetch_listings = flaky
+    with pytest.raises(ConnectionError):
+        scraper.scrape(num_pages=10)
+    scraper.state.close()
+    assert json.loads((tmp_path / "crawl.ckpt").read_text())["nextPage"] == 1  # page 1 is still to do
+
+    resumed = CraigslistScraper("jobs", "newyork", **options)
+    fetched = []
+    resumed_fetch = resumed.fetch_listings
+    resumed.fetch_listings = lambda page=1: fetched.append(page) or resumed_fetch(page)
+    [path] = resumed.scrape(num_pages=10, resume=True)
+    assert fetched == [1, 2]
+    with open(path, encoding="utf-8") as f:
+        assert len({json.loads(line)["url"] for line in f}) == 250
+
+def test_crawl_that_ends_with_a_failed_page_keeps_its_checkpoint(search_server, tmp_path):
+    import json
+
+    ckpt = tmp_path / "crawl.ckpt"
+    options = dict(output_format="json", base_url=search_server, checkpoint_path=str(ckpt), output_dir=str(tmp_path),
+                   retries=0)
+    _SearchHandler.busy = 1  # the first page fails; the crawl carries on and finishes
+    [path] = CraigslistScraper("jobs", "newyork", **options).scrape(num_pages=10)
+    with open(path, encoding="utf-8") as f:
+        assert len(json.load(f)) == 130
+    assert json.loads(ckpt.read_text())["nextPage"] == 0
+
+    _SearchHandler.hits = []
+    [path] = CraigslistScraper("jobs", "newyork", **options).scrape(num_pages=10, resume=True)
+    assert _SearchHandler.hits == [0, 120, 240]
+    with open(path, encoding="utf-8") as f:
+        urls = [r["url"] for r in json.load(f)]
+    assert len(urls) == len(set(urls)) == 250
+    assert not ckpt.exists()
+
+def test_crawl_workers_share_queue_and_pick_up_dead_workers_units(search_server, tmp_path):
+    import json
+
+    from coordinator import CrawlWorker, seed, unit_path
+    from pipelines.work_queue import SQLiteWorkQueue, WorkUnit
+
+    path = str(tmp_path / "queue.sqlite3")
+    with SQLiteWorkQueue(path, lease_seconds=0.3) as queue:
+        assert seed(queue, [("jobs", "newyork")], num_pages=10) == 1
+        dead = queue.claim("dead")  # claims page 0, then never reports back
+
+    stats = []
+
+    def work(name):
+        with SQLiteWorkQueue(path, lease_seconds=0.3) as queue:
+            worker = CrawlWorker(queue, worker_id=name, output_dir=str(tmp_path / "out"), rate_per_host=10,
+                                 poll_seconds=0.05, scraper_kwargs={"base_url": search_server})
+            stats.append(worker.run())
+
+    started = time.monotonic()
+    threads = [threading.Thread(target=work, args=(f"w{i}",)) for i in range(2)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert sorted(_SearchHandler.hits) == [0, 120, 240]  # 250 results: three pages, each fetched once
+    assert time.monotonic() - started >= 0.3 + 0.2  # lease timeout, then two more requests at 10/s overall
+    ids = []
+    for page in range(3):
+        with open(unit_path(str(tmp_path / "out"), WorkUnit("newyork", "jobs", page)), encoding="utf-8") as f:
+            ids.extend(json.loads(line)["id"] for line in f)
+    assert ids == [str(i) for i in range(250)]
+    assert sum(s["units"] for s in stats) == 3 and sum(s["listings"] for s in stats) == 250
+    with SQLiteWorkQueue(path) as queue:
+        assert queue.counts() == {"done": 3} and not queue.complete(dead, 120)
+
+def test_crawl_worker_retries_through_the_queue_budget(search_server, tmp_path):
+    from coordinator import CrawlWorker, seed
+    from pipelines.work_queue import SQLiteWorkQueue
+
+    _SearchHandler.busy = 2
+    with SQLiteWorkQueue(str(tmp_path / "queue.sqlite3"), max_attempts=3) as queue:
+        seed(queue, [("jobs", "newyork")], num_pages=10)
+        worker = CrawlWorker(queue, output_dir=str(tmp_path / "out"), rate_per_host=10, poll_seconds=0.05,
+                             scraper_kwargs={"base_url": search_server})
+        started = time.monotonic()
+        stats = worker.run()
+        elapsed = time.monotonic() - started
+        assert queue.counts() == {"done": 3}
+    # Each 503 failed its attempt (no client-side retry); every attempt took a slot at 10/s
+    assert _SearchHandler.hits == [0, 0, 0, 120, 240]
+    assert stats["failures"] == 2 and elapsed >= 0.38
+    assert all(s.http.retries == 0 for s in worker._scrapers.values())
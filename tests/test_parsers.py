@@ -9,13 +9,13 @@ SRC = ROOT / "src"
 sys.path.insert(0, str(ROOT))
 sys.path.insert(0, str(SRC))
 
-from bs4 import BeautifulSoup  # noqa: E402
+import pytest  # noqa: E402
 
-from src.extractors.craigslist_list_parser import parse_list_page  # noqa: E402
-from src.extractors.craigslist_post_parser import parse_post_page  # noqa: E402
+from src.extractors.backends import BACKENDS, parse_list_html, parse_post_html  # noqa: E402
 from src.pipelines.normalizers import normalize_record  # noqa: E402
 
-def test_parse_list_page_minimal():
+@pytest.mark.parametrize("backend", BACKENDS)
+def test_parse_list_page_minimal(backend):
     html = """
     <html><body>
       <ul class="rows">
@@ -34,8 +34,7 @@ def test_parse_list_page_minimal():
       </ul>
     </body></html>
     """
-    soup = BeautifulSoup(html, "lxml")
-    items = parse_list_page(soup, source_url="https://example.org/search/apa")
+    items = parse_list_html(html, source_url="https://example.org/search/apa", backend=backend)
     assert len(items) == 2
     a = items[0]
     assert a["id"] == "111"
@@ -46,7 +45,8 @@ def test_parse_list_page_minimal():
     assert "phoneNumbers" in b
     assert any("646" in p for p in b["phoneNumbers"])
 
-def test_parse_post_page_full():
+@pytest.mark.parametrize("backend", BACKENDS)
+def test_parse_post_page_full(backend):
     html = """
     <html><head>
       <meta property="og:updated_time" content="2024-02-10T10:30:00-0500" />
@@ -71,8 +71,7 @@ def test_parse_post_page_full():
       </section>
     </body></html>
     """
-    soup = BeautifulSoup(html, "lxml")
-    rec = parse_post_page(soup, source_url="https://example.org/mnh/fbh/333444555.html")
+    rec = parse_post_html(html, source_url="https://example.org/mnh/fbh/333444555.html", backend=backend)
     assert rec["id"] == "333444555"
     assert rec["latitude"] == "40.759908"
     assert "909-9909-3322" in " ".join(rec.get("phoneNumbers", []))
@@ -82,4 +81,177 @@ def test_parse_post_page_full():
 
     normalized = normalize_record(rec)
     assert normalized["label"] == "post"
-    assert "jobTitle" in normalized
\ No newline at end of file
+    assert "jobTitle" in normalized
+
+LIST_VARIANTS_HTML = """
+<html><body>
+  <ol class="cl-static-search-results">
+    <li class="cl-search-result" data-pid="7600000001">
+      <a class="cl-app-anchor" href="https://example.org/brk/sub/7600000001.html">Room <b>in</b> Bushwick</a>
+      <span class="result-date">Mar 5</span>
+      <span class="price">$950</span>
+      <span class="nearby">(Bushwick)</span>
+      <span data-cat="sub"></span>
+      <p class="snippet">Text 917.555.0101 <!-- hidden --> or 9175550102</p>
+    </li>
+    <li class="cl-search-result">
+      <a href="https://example.org/brk/sub/7600000002.html">No date <script>var x = 1;</script>row</a>
+      <span class="price">call</span>
+    </li>
+    <li class="cl-search-result"><a class="cl-app-anchor">no href</a></li>
+  </ol>
+</body></html>
+"""
+
+POST_VARIANTS_HTML = """
+<html><head>
+  <meta property="article:published_time" content="2024-04-01T08:00:00-0400" />
+  <script>window.__post = {"latitude": "37.7749", "longitude": -122.4194, "accuracy": 10};</script>
+</head><body>
+  <h1 class="postingtitle"><span class="postingtitletext"><span id="titletextonly">[Studio] ~Sunny~ flat</span>
+    <span class="price">$2,400</span><small> (Mission District)</small></span></h1>
+  <p>Reference: post id <!-- x --> 7611112222 shown below</p>
+  <section class="userbody">
+    <div class="attrgroup"><span><b>1BR</b> / 1Ba</span><span>furnished</span><span>laundry in bldg</span>
+      <span>available on: May 1</span><span>furnished</span></div>
+    <section id="postingbody">
+      <div class="print-information">QR Code Link to This Post</div>
+      Part-time superintendent wanted. Salary - negotiable
+      Text (415) 555-0188.
+    </section>
+  </section>
+  <img src="https://images.craigslist.org/x_1.jpg"><img src="/static/logo.png">
+  <img src="https://images.craigslist.org/x_1.jpg"><img src="https://images.craigslist.org/x_2.jpg">
+</body></html>
+"""
+
+def test_backends_agree_on_layout_variants():
+    url = "https://example.org/search/sub"
+    assert parse_list_html(LIST_VARIANTS_HTML, source_url=url, backend="lxml") == parse_list_html(
+        LIST_VARIANTS_HTML, source_url=url, backend="bs4"
+    )
+    post_url = "https://example.org/sfc/apa/7611112222.html"
+    fast = parse_post_html(POST_VARIANTS_HTML, source_url=post_url, backend="lxml")
+    assert fast == parse_post_html(POST_VARIANTS_HTML, source_url=post_url, backend="bs4")
+    assert fast["latitude"] == "37.7749" and fast["mapAccuracy"] == "10"
+    assert fast["availableFrom"] == "May 1"
+    assert parse_post_html(POST_VARIANTS_HTML, source_url=post_url, backend="partial") == fast
+
+def test_backends_agree_on_empty_documents():
+    for backend in BACKENDS:
+        assert parse_list_html("", source_url="https://example.org/search/sss", backend=backend) == []
+    assert parse_post_html("", source_url="https://example.org/x/sss/1234567.html", backend="lxml") == parse_post_html(
+        "", source_url="https://example.org/x/sss/1234567.html", backend="bs4"
+    )
+
+FIXTURES = ROOT / "tests" / "fixtures" / "sample_pages"
+
+@pytest.mark.parametrize("name", ["list_page.html", "list_page_modern.html"])
+def test_fixture_list_pages_parse_identically(name):
+    markup = (FIXTURES / name).read_text(encoding="utf-8")
+    url = "https://newyork.craigslist.org/search/apa"
+    items = parse_list_html(markup, source_url=url, backend="bs4")
+    assert len(items) == 120
+    assert items == parse_list_html(markup, source_url=url, backend="lxml")
+
+@pytest.mark.parametrize("name", ["post_page.html", "post_page_map_script.html"])
+def test_fixture_post_pages_parse_identically(name):
+    markup = (FIXTURES / name).read_text(encoding="utf-8")
+    url = "https://newyork.craigslist.org/que/apa/7600000000.html"
+    rec = parse_post_html(markup, source_url=url, backend="bs4")
+    assert rec["latitude"] and rec["pics"] and rec["attributes"]
+    assert rec == parse_post_html(markup, source_url=url, backend="lxml")
+    assert rec == parse_post_html(markup.encode("utf-8"), source_url=url, backend="partial")
+
+@pytest.mark.parametrize("markup", [
+    # No #postingbody: the body comes from .userbody, which the partial tree skips by default
+    POST_VARIANTS_HTML.replace('id="postingbody"', 'id="body"') + "<!-- postingbody -->",
+    POST_VARIANTS_HTML.replace('id="postingbody"', 'class="description"'),
+    # A commented-out map div must not hide the coordinates in the script
+    POST_VARIANTS_HTML + '<!-- <div id="map" data-latitude="1"> -->',
+    '<div class="userbody">Body only</div><p>post id: 7611112222</p><img src="/logo.png">',
+])
+def test_partial_backend_handles_fallbacks(markup):
+    url = "https://example.org/sfc/apa/7611112222.html"
+    assert parse_post_html(markup, source_url=url, backend="partial") == parse_post_html(
+        markup, source_url=url, backend="bs4"
+    )
+
+@pytest.mark.parametrize("markup", [
+    # Elements inside a template (or script/style) have no page text in bs4
+    '<template><span class="price">$5</span></template><span class="price">$900</span>'
+    '<section id="postingbody">Nice flat</section>',
+    '<template><div><span class="price">$5</span></div></template><span class="price">$900</span>',
+    '<template class="price">$5</template><span class="price">$900</span>',
+    '<template><section id="postingbody">hidden</section></template><div class="userbody">Shown</div>',
+    '<template><p class="attrgroup"><span>cats are OK</span></p></template>'
+    '<p class="attrgroup"><span>dogs are OK</span></p>',
+])
+def test_backends_skip_text_inside_templates(markup):
+    url = "https://example.org/sfc/apa/7611112222.html"
+    rec = parse_post_html(markup, source_url=url, backend="bs4")
+    assert rec == parse_post_html(markup, source_url=url, backend="lxml")
+    assert rec == parse_post_html(markup, source_url=url, backend="partial")
+
+@pytest.mark.parametrize("markup", [
+    # No charset declared: bs4 sniffs UTF-8, lxml alone would read it as latin-1
+    "<html><body><h1>Café à Montréal</h1><span class=\"price\">€900</span>"
+    "<section id=\"postingbody\">Naïve piñata — 2 chambres</section></body></html>".encode("utf-8"),
+    '<?xml version="1.0" encoding="utf-8"?><html><body><h1>Café</h1></body></html>'.encode("utf-8"),
+    '<html><head><meta charset="windows-1252"></head><body><h1>Café</h1>'
+    '<section id="postingbody">Prix: 5 €</section></body></html>'.encode("windows-1252"),
+])
+def test_backends_agree_on_non_ascii_bytes(markup):
+    url = "https://example.org/sfc/apa/7611112222.html"
+    rec = parse_post_html(markup, source_url=url, backend="bs4")
+    assert rec["title"].startswith("Café")
+    for backend in ("lxml", "partial"):
+        assert parse_post_html(markup, source_url=url, backend=backend) == rec, backend
+
+def test_list_backends_agree_on_non_ascii_bytes():
+    markup = '<ul class="rows"><li class="result-row" data-pid="1">' \
+             '<a class="result-title" href="/apa/1.html">Café crème</a></li></ul>'.encode("utf-8")
+    url = "https://example.org/search/apa"
+    items = parse_list_html(markup, source_url=url, backend="bs4")
+    assert items[0]["title"] == "Café crème"
+    assert parse_list_html(markup, source_url=url, backend="lxml") == items
+
+TRICKY_BODIES = [
+    "",
+    "Pay:\n$20/hr, call 555-123-4567 or (212) 555-0000",
+    "Compensation - DOE\nsalary: 90k\nFULL-TIME and Part-Time roles",
+    "repay: 100 later; payroll, salaries, pay 20",
+    "pay\n:\nnext line\r\nwork full-time/part-time. +1 917.555.1234, 917.555.1234",
+    "Salary -   \n  $50,000 (negotiable) 5551234",
+]
+
+def _legacy_body_rules(body):
+    import re
+    from src.extractors.geo_utils import find_phone_numbers
+
+    comp = re.search(r"(?:compensation|pay|salary)\s*[:\-]\s*([^\n\r]+)", body, flags=re.I)
+    return {
+        "phones": sorted(find_phone_numbers(body)),
+        "compensation": comp.group(1) if comp else None,
+        "fullTime": "full-time" in body.lower(),
+        "partTime": "part-time" in body.lower(),
+    }
+
+@pytest.mark.parametrize("body", TRICKY_BODIES)
+def test_single_pass_body_scan_matches_separate_rules(body):
+    from src.extractors.text_rules import scan_post_body
+
+    facts = scan_post_body(body)
+    facts["phones"] = sorted(facts["phones"])
+    assert facts == _legacy_body_rules(body)
+
+@pytest.mark.parametrize("html, total", [
+    ('<span class="rangeFrom">1</span> <span class="totalcount">3000</span>', 3000),
+    ('<div class="cl-page-number">121 - 240 of 3,456</div>', 3456),
+    ("<p>no results here</p>", None),
+])
+def test_parse_total_count(html, total):
+    from src.extractors.text_rules import parse_total_count
+
+    assert parse_total_count(html) == total
+    assert parse_total_count(html.encode("utf-8")) == total
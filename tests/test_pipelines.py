@@ -0,0 +1,443 @@
+from __future__ import annotations
+
+import sys
+from pathlib import Path
+
+import pytest
+
+# Ensure src is importable
+ROOT = Path(__file__).resolve().parents[1]
+SRC = ROOT / "src"
+sys.path.insert(0, str(ROOT))
+sys.path.insert(0, str(SRC))
+
+from src.pipelines.crawl import CrawlPipeline  # noqa: E402
+
+def _list_html(*pids):
+    rows = "".join(
+        f'<li class="result-row" data-pid="{pid}">'
+        f'<a class="result-title" href="https://example.org/nyc/apa/{pid}.html">Row {pid}</a>'
+        f'<time datetime="2024-01-0{pid % 9 + 1}T12:00:00-0500"></time>'
+        f'<span class="result-price">${pid}</span></li>'
+        for pid in pids
+    )
+    return f'<html><body><ul class="rows">{rows}</ul></body></html>'
+
+def _post_html(pid):
+    return (
+        f'<html><body><div class="postinginfos"><span class="postinginfo">post id: {pid}</span></div>'
+        f'<h1 id="titletextonly">Detail {pid}</h1>'
+        f'<section id="postingbody">Spacious place number {pid}.</section></body></html>'
+    )
+
+def _site(list_pages):
+    pages = {}
+    for i, pids in enumerate(list_pages):
+        pages[f"https://example.org/search/apa?s={i * 120}"] = _list_html(*pids)
+        for pid in pids:
+            pages[f"https://example.org/nyc/apa/{pid}.html"] = _post_html(pid)
+    return pages
+
+def test_crawl_pipeline_dedupes_and_normalizes():
+    pages = _site([[1000001, 1000002], [1000002, 1000003]])
+    fetched = []
+
+    def fetch(url):
+        fetched.append(url)
+        return pages.get(url)
+
+    pipeline = CrawlPipeline(fetch, detail_workers=2, queue_size=1)
+    records = list(pipeline.run([f"https://example.org/search/apa?s={i * 120}" for i in range(2)]))
+
+    assert sorted(r["id"] for r in records) == ["1000001", "1000002", "1000003"]
+    assert fetched.count("https://example.org/nyc/apa/1000002.html") == 1
+    rec = next(r for r in records if r["id"] == "1000003")
+    assert rec["title"] == "Detail 1000003"
+    assert rec["price"] == "$1000003"  # carried over from the list row
+    assert rec["category"] == "housing"
+    assert pipeline.stats["duplicates"] == 1
+
+def test_crawl_pipeline_stops_when_consumer_stops():
+    pages = _site([list(range(1000001, 1000041))])
+    pipeline = CrawlPipeline(pages.get, detail_workers=2, queue_size=2)
+    stream = pipeline.run(["https://example.org/search/apa?s=0"])
+    first = next(stream)
+    stream.close()
+    assert first["id"].startswith("10000")
+    assert pipeline.stats["detailPages"] < 40
+
+def test_crawl_pipeline_parses_on_pool_in_batches():
+    from concurrent.futures import ProcessPoolExecutor
+
+    pages = _site([list(range(1000001, 1000031)), list(range(1000031, 1000041))])
+    list_urls = [f"https://example.org/search/apa?s={i * 120}" for i in range(2)]
+    expected = sorted((dict(r) for r in CrawlPipeline(pages.get, detail_workers=2).run(list_urls)), key=lambda r: r["id"])
+
+    class CountingPool(ProcessPoolExecutor):
+        tasks = 0
+
+        def submit(self, *args, **kwargs):
+            CountingPool.tasks += 1
+            return super().submit(*args, **kwargs)
+
+    with CountingPool(2) as pool:
+        pipeline = CrawlPipeline(pages.get, detail_workers=3, parse_executor=pool, parse_batch_size=8)
+        records = sorted((dict(r) for r in pipeline.run(list_urls)), key=lambda r: r["id"])
+    assert records == expected and len(records) == 40
+    assert CountingPool.tasks == 5  # 40 pages, 8 per task
+    assert pipeline.stats["detailPages"] == 40 and pipeline.stats["detailFailures"] == 0
+
+def test_crawl_state_skips_seen_posts_and_stops_paging(tmp_path):
+    from src.pipelines.state_store import CHANGED, NEW, SEEN, CrawlState
+
+    pages = _site([[1000001, 1000002], [1000003]])
+    list_urls = [f"https://example.org/search/apa?s={i * 120}" for i in range(2)]
+    with CrawlState(str(tmp_path / "state.sqlite3")) as state:
+        first = list(CrawlPipeline(pages.get, detail_workers=2, state=state).run(list_urls))
+        assert len(first) == 3 and len(state) == 3
+
+        fetched = []
+
+        def fetch(url):
+            fetched.append(url)
+            return pages.get(url)
+
+        second = list(CrawlPipeline(fetch, detail_workers=2, state=state).run(list_urls))
+        assert second == []
+        assert fetched == [list_urls[0]]  # stopped after a page with nothing new
+
+        row = {"id": "1000001", "datetime": "2024-01-01T12:00:00-0500", "price": "$1"}
+        assert state.classify(row) == CHANGED
+        assert state.classify({"url": "https://example.org/nyc/apa/42.html"}) == NEW
+        assert state.classify({"url": "https://example.org/nyc/apa/1000003.html",
+                               "datetime": "2024-01-05T12:00:00-0500", "price": "$1000003"}) == SEEN
+
+def test_crawl_state_records_posts_only_once_taken(tmp_path):
+    from src.pipelines.state_store import CrawlState
+
+    pages = _site([[1000001, 1000002, 1000003]])
+    with CrawlState(str(tmp_path / "state.sqlite3"), commit_every=1) as state:
+        stream = CrawlPipeline(pages.get, detail_workers=2, state=state).run(["https://example.org/search/apa?s=0"])
+        first = next(stream)
+        # Handed out but not yet written: a crash here must not leave it marked seen
+        assert len(state) == 0
+        second = next(stream)
+        stream.close()
+        assert len(state) == 1
+        assert state.classify({"id": first["id"], "datetime": first["datetime"], "price": f"${first['id']}"}) == "seen"
+        assert state.classify({"id": second["id"]}) == "new"
+
+def test_ndjson_writer_rotates_and_finalizes(tmp_path):
+    import gzip
+    import json
+
+    from src.pipelines.exporters import NDJSONWriter
+
+    out = tmp_path / "out" / "jobs.ndjson"
+    with NDJSONWriter(str(out), max_records=2, compression="gzip", flush_every=1) as writer:
+        for i in range(5):
+            writer.write({"id": str(i), "title": f"Post {i}"})
+        assert list((tmp_path / "out").glob("*.part"))  # in-progress shard not yet visible
+    assert [Path(p).name for p in writer.paths] == [
+        "jobs-00000.ndjson.gz", "jobs-00001.ndjson.gz", "jobs-00002.ndjson.gz",
+    ]
+    assert not list((tmp_path / "out").glob("*.part"))
+    ids = [json.loads(line)["id"] for p in writer.paths for line in gzip.open(p, "rt", encoding="utf-8")]
+    assert ids == ["0", "1", "2", "3", "4"]
+
+def test_streaming_writers_leave_partial_output_on_crash(tmp_path):
+    import json
+
+    from src.pipelines.exporters import JSONArrayWriter, NDJSONWriter
+
+    try:
+        with NDJSONWriter(str(tmp_path / "a.ndjson"), flush_every=1) as writer:
+            writer.write({"id": "1"})
+            writer.write({"id": "2"})
+            raise RuntimeError("crawl died")
+    except RuntimeError:
+        pass
+    part = (tmp_path / "a.ndjson.part").read_text(encoding="utf-8").splitlines()
+    assert [json.loads(l)["id"] for l in part] == ["1", "2"]
+
+    with JSONArrayWriter(str(tmp_path / "b.json")) as writer:
+        writer.write({"id": "1", "pics": ["x"]})
+        writer.write({"id": "2"})
+    assert json.loads((tmp_path / "b.json").read_text(encoding="utf-8")) == [{"id": "1", "pics": ["x"]}, {"id": "2"}]
+
+def test_parquet_writer_types_numeric_and_list_columns(tmp_path):
+    pq = pytest.importorskip("pyarrow.parquet")
+    from src.pipelines.columnar import ParquetWriter
+    from src.pipelines.normalizers import normalize_record
+
+    rec = normalize_record({
+        "id": "7536953147", "title": "Deli grill men", "price": "$1,800", "latitude": "40.759908",
+        "longitude": "-73.937645", "mapAccuracy": "5", "pics": ["https://images.craigslist.org/a.jpg"],
+        "phoneNumbers": ["646-744-6519"], "source": "list",
+    })
+    path = tmp_path / "out.parquet"
+    with ParquetWriter(str(path), row_group_size=2) as writer:
+        writer.write_many([rec, {"id": "2"}, {"id": "3"}])
+    pf = pq.ParquetFile(str(path))
+    assert pf.metadata.num_row_groups == 2
+    row = pf.read().to_pylist()[0]
+    assert row["price"] == "$1,800" and row["priceValue"] == 1800.0
+    assert row["latitudeValue"] == 40.759908 and row["mapAccuracyValue"] == 5.0
+    assert row["pics"] == ["https://images.craigslist.org/a.jpg"]
+    assert row["extra"] == '{"source": "list"}'
+
+def test_parallel_parser_keeps_input_order():
+    from src.pipelines.parallel_parse import ParallelParser, parse_batch
+
+    fixtures = ROOT / "tests" / "fixtures" / "sample_pages"
+    posts = [(fixtures / n).read_bytes() for n in ("post_page.html", "post_page_map_script.html")]
+    pages = [(f"https://example.org/que/apa/{7000000 + i}.html", posts[i % 2]) for i in range(7)]
+
+    with ParallelParser(workers=2, batch_size=2, backend="lxml") as parser:
+        records = list(parser.parse(pages))
+    assert records == parse_batch("post", "lxml", pages)
+    assert [r["url"] for r in records] == [url for url, _ in pages]
+    assert all(r["category"] == "housing" for r in records)
+    assert parse_batch("post", "lxml", pages, compact=True) == records
+
+    # By default the pool parses with the serial path's backend
+    from src.extractors.backends import DEFAULT_BACKEND
+
+    with ParallelParser(workers=1) as parser:
+        assert parser.backend == DEFAULT_BACKEND
+        assert list(parser.parse(pages[:2])) == parse_batch("post", DEFAULT_BACKEND, pages[:2])
+
+def test_compact_record_normalizes_like_dicts(tmp_path):
+    import json
+    import pickle
+    from src.pipelines.exporters import NDJSONWriter
+    from src.pipelines.normalizers import normalize_record
+    from src.pipelines.records import Record
+
+    raw = [
+        {"title": "Loft", "id": "7611112222", "price": " $1,800 ", "category": "hou" + "sing", "pics": [],
+         "attirbutes": ["furnished"], "repostOf": "7600000000", "source": None, "notes": {}},
+        {"url": "https://example.org/x/sss/1.html", "price": "", "label": "item", "datetime": None, "title": ""},
+    ]
+    records = [Record(rec).normalize() for rec in raw]
+    for rec, expected in zip(records, map(normalize_record, raw)):
+        assert list(rec.to_dict().items()) == list(expected.items())  # same keys, values and order
+        assert rec == expected and rec.get("pics") is None and "source" not in rec
+    assert records[0]["category"] is Record({"category": "housing"})["category"]  # interned
+    assert pickle.loads(pickle.dumps(records[0])) == records[0]
+
+    rec = records[1].copy()
+    rec.setdefault("price", "$5")
+    rec["repostOf"] = "2"
+    del rec["title"]
+    assert rec.to_dict() == {"url": "https://example.org/x/sss/1.html", "label": "post", "price": "$5", "repostOf": "2"}
+
+    with NDJSONWriter(str(tmp_path / "out.ndjson")) as writer:
+        writer.write_many(records)
+    lines = (tmp_path / "out.ndjson").read_text(encoding="utf-8").splitlines()
+    assert [json.loads(line) for line in lines] == [normalize_record(rec) for rec in raw]
+
+def test_parse_price_amount_unit_and_range():
+    from src.pipelines.normalizers import parse_price
+
+    assert parse_price("$1800") == {"amount": 1800.0, "min": 1800.0, "max": 1800.0, "unit": None}
+    assert parse_price("$25/hr") == {"amount": 25.0, "min": 25.0, "max": 25.0, "unit": "hour"}
+    assert parse_price("$75-$90k") == {"amount": 75000.0, "min": 75000.0, "max": 90000.0, "unit": None}
+    assert parse_price("$20 - 25 per Hour")["max"] == 25.0
+    assert parse_price("free") == {"amount": None, "min": None, "max": None, "unit": None}
+
+def test_normalize_batch_matches_row_by_row(tmp_path):
+    import json
+    pa = pytest.importorskip("pyarrow")
+    from src.pipelines.normalizers import (
+        normalize_batch, normalize_ndjson, normalize_record, record_schema, records_to_columns,
+    )
+
+    records = [
+        {"id": "1", "price": "$75-$90k", "latitude": "40.1", "longitude": "-73.9", "pics": []},
+        {"id": "2", "price": "", "label": "list", "mapAccuracy": "~1,000 m"},
+        {"id": "3", "price": " $25/Hr ", "attirbutes": ["a"], "source": "list", "phoneNumbers": ["555-1234"]},
+        {"price": "$3k / MO", "longitude": "-.5"},
+        {},
+    ]
+    expected = pa.Table.from_pydict(records_to_columns(map(normalize_record, records)), schema=record_schema()).to_pylist()
+    table = normalize_batch(records)
+    assert table.to_pylist() == expected
+    assert table.column("priceMax").to_pylist()[:4] == [90000.0, None, 25.0, 3000.0]
+
+    path = tmp_path / "records.ndjson"
+    path.write_text("".join(json.dumps(r) + "\n" for r in records), encoding="utf-8")
+    assert normalize_ndjson(str(path)).to_pylist() == expected
+
+def test_dedup_index_flags_and_drops_reposts(tmp_path):
+    from src.pipelines.dedup import DedupIndex, hamming, simhash
+
+    ad = " ".join(f"sunny room {i % 7} near the park, utilities included, block {i}" for i in range(30))
+    other = ad.replace("sunny", "dark")
+    assert hamming(simhash(ad), simhash(ad + " call now")) <= 3
+    assert hamming(simhash(ad), simhash(other)) > 3
+
+    def site(bodies):
+        pages = {"https://example.org/search/apa?s=0": _list_html(*bodies)}
+        for pid, body in bodies.items():
+            pages[f"https://example.org/nyc/apa/{pid}.html"] = (
+                f'<html><body><h1 id="titletextonly">Sunny room</h1><section id="postingbody">{body}</section></body></html>'
+            )
+        return pages
+
+    list_urls = ["https://example.org/search/apa?s=0"]
+    path = str(tmp_path / "dedup.sqlite3")
+    with DedupIndex(path) as index:
+        pipeline = CrawlPipeline(site({1000001: ad, 1000002: ad + " call now", 1000003: other}).get, detail_workers=1, dedup=index)
+        records = list(pipeline.run(list_urls))
+    reposts = [r for r in records if "repostOf" in r]
+    assert len(records) == 3 and len(reposts) == 1
+    assert {reposts[0]["id"], reposts[0]["repostOf"]} == {"1000001", "1000002"}
+
+    # A later crawl sees the same ads under new ids; the index persisted
+    with DedupIndex(path) as index:
+        pipeline = CrawlPipeline(site({2000001: ad, 2000003: other}).get, detail_workers=1, dedup=index, dedup_mode="drop")
+        assert list(pipeline.run(list_urls)) == []
+        assert pipeline.stats["reposts"] == 2 and len(index) == 5
+
+def test_dedup_index_exact_threshold(tmp_path):
+    from src.pipelines.dedup import DedupIndex, simhash
+
+    ad = "sunny room near the park, utilities included"
+    with DedupIndex(str(tmp_path / "exact.sqlite3"), threshold=1.0) as index:
+        assert index.bands == 1
+        # Signatures with the top bit set made the single 64-bit band key overflow SQLite
+        sig = simhash(ad) | 1 << 63
+        index.add("1", sig, "https://example.org/1.html")
+        assert index.find(sig)["id"] == "1"
+        assert index.find(sig ^ 1) is None
+        assert index.check({"id": "2", "title": "Sunny", "post": ad}) is None
+        assert index.check({"id": "3", "title": "Sunny", "post": ad})["id"] == "2"
+    for threshold in (0, -0.5, 1.5):
+        with pytest.raises(ValueError):
+            DedupIndex(str(tmp_path / "bad.sqlite3"), threshold=threshold)
+
+def test_geo_index_matches_brute_force(tmp_path):
+    import random
+    from src.pipelines.exporters import write_ndjson
+    from src.pipelines.geo_index import GeoIndex, build_geo_index, haversine_km
+
+    rnd = random.Random(4)
+    records = [
+        {"id": str(7000000 + i), "latitude": f"{40.6 + rnd.random() * 0.3:.6f}", "longitude": f"{-74.1 + rnd.random() * 0.3:.6f}"}
+        for i in range(2000)
+    ]
+    # Either side of the antimeridian, and around the north pole
+    records += [
+        {"id": str(8000000 + i), "latitude": f"{50.5 + rnd.random():.6f}", "longitude": f"{rnd.choice((-1, 1)) * (179.5 + rnd.random() * 0.5):.6f}"}
+        for i in range(300)
+    ]
+    records += [
+        {"id": str(9000000 + i), "latitude": f"{88.5 + rnd.random() * 1.5:.6f}", "longitude": f"{-180 + rnd.random() * 360:.6f}"}
+        for i in range(300)
+    ]
+    records.append({"id": "1", "title": "no map"})
+    paths = write_ndjson(records, str(tmp_path / "out.ndjson.gz"), compression="gzip")
+    path = build_geo_index(paths, str(tmp_path / "posts.geoidx"), cell_deg=0.02)
+
+    points = [(r["id"], float(r["latitude"]), float(r["longitude"])) for r in records if "latitude" in r]
+    with GeoIndex(path) as index:
+        assert len(index) == 2600
+        for query in [(40.75, -73.95, 2.5), (51, 179.95, 50), (51, -179.99, 20), (89.5, 10, 120), (88, -170, 400),
+                      (45, 0, 5000)]:
+            near = index.within(*query)
+            expected = sorted((haversine_km(query[0], query[1], la, lo), pid) for pid, la, lo in points)
+            assert [pid for pid, _ in near] == [pid for d, pid in expected if d <= query[2]], query
+            assert all(a[1] <= b[1] for a, b in zip(near, near[1:]))
+        assert any(pid.startswith("8") for pid, _ in index.within(51, 179.95, 50))
+
+        box = (40.65, -74.05, 40.81, -73.9)
+        inside = sorted(pid for pid, la, lo in points if box[0] <= la <= box[2] and box[1] <= lo <= box[3])
+        assert sorted(index.bbox(*box)) == inside
+        assert index.count_bbox(*box) == len(inside)
+        assert sum(index.cell_counts().values()) == 2600
+
+def test_metrics_record_pipeline_stages_and_export_prometheus(tmp_path):
+    import json
+
+    from src.metrics import NULL_METRICS, Metrics
+
+    pages = _site([[1000001, 1000002], [1000003]])
+    metrics = Metrics()
+    pipeline = CrawlPipeline(pages.get, detail_workers=2, metrics=metrics)
+    records = list(pipeline.run([f"https://example.org/search/apa?s={i * 120}" for i in range(2)]))
+
+    summary = metrics.summary()
+    assert summary["parse_list"]["count"] == 2
+    assert summary["parse_post"]["count"] == summary["normalize"]["count"] == len(records) == 3
+    assert all(s["seconds"] >= 0 and s["p95"] <= s["max"] for s in summary.values())
+
+    metrics.inc("http_responses_total", status=200)
+    metrics.inc("http_responses_total", 2, status=503)
+    metrics.inc("http_bytes_total", 123456789)
+    metrics.set("fetch_rate", 0.1 + 0.2)
+    text = metrics.to_prometheus()
+    assert "craigslist_http_bytes_total 123456789\n" in text  # full precision, not 1.23457e+08
+    assert f"craigslist_fetch_rate {0.1 + 0.2!r}\n" in text
+    assert 'craigslist_http_responses_total{status="503"} 2' in text
+    assert 'craigslist_stage_seconds_count{stage="parse_post"} 3' in text
+    assert 'craigslist_stage_seconds_bucket{stage="parse_post",le="+Inf"} 3' in text
+    assert "# TYPE craigslist_queue_depth gauge" in text
+
+    metrics.write_snapshot(str(tmp_path / "metrics.json"))
+    snap = json.loads((tmp_path / "metrics.json").read_text())
+    assert snap["counters"]['http_responses_total{status="200"}'] == 1
+
+    # Disabled metrics record nothing and share one no-op timer
+    with NULL_METRICS.timer("fetch"):
+        NULL_METRICS.inc("http_responses_total", status=200)
+    assert NULL_METRICS.timer("a") is NULL_METRICS.timer("b") and NULL_METRICS.summary() == {}
+
+def test_work_queue_requeues_expired_leases_and_fences_stale_workers(tmp_path):
+    import time
+
+    from src.pipelines.work_queue import SQLiteWorkQueue, WorkQueue, WorkUnit, next_units
+
+    with pytest.raises(TypeError):
+        WorkQueue()  # abstract: backends implement the storage
+
+    unit = WorkUnit("newyork", "jobs", 0, max_pages=5)
+    assert next_units(unit, 120) == [WorkUnit("newyork", "jobs", 1, 5)]  # total unknown: one page ahead
+    assert [u.page for u in next_units(unit, 120, total=250)] == [1, 2]
+    assert next_units(unit, 0, total=250) == []
+
+    path = str(tmp_path / "queue.sqlite3")
+    with SQLiteWorkQueue(path, lease_seconds=0.2, max_attempts=2) as q, SQLiteWorkQueue(path, lease_seconds=0.2) as other:
+        assert q.add([unit, unit]) == 1
+        dead = q.claim("dead")
+        assert dead.unit == unit and other.claim("w2") is None
+        time.sleep(0.25)
+        lease = other.claim("w2")  # the dead worker's lease ran out
+        assert lease.unit == unit and lease.attempt == 2
+        assert not q.complete(dead, 120) and q.renew(dead) is None
+        assert other.complete(lease, 120, total=250, follow_ups=next_units(unit, 120, 250))
+        assert q.counts() == {"done": 1, "pending": 2}
+
+        for _ in range(2):
+            page1 = q.claim("w1")
+            assert page1.unit.page == 1 and q.fail(page1, "IOError: boom")
+        assert q.failures() == [{"location": "newyork", "category": "jobs", "page": 1, "attempts": 2,
+                                 "error": "IOError: boom"}]
+
+        # Request slots for one host are spaced across connections; other hosts are not held up
+        waits = [q.reserve("a.example", 0.5), other.reserve("a.example", 0.5), q.reserve("b.example", 0.5)]
+        assert waits[0] == 0 and 0.4 < waits[1] <= 0.5 and waits[2] == 0
+
+def test_store_defaults_live_in_data_dir():
+    import inspect
+    from src.config.settings import DATA_DIR
+    from src.fetchers.cache import ResponseCache
+    from src.pipelines.dedup import DedupIndex
+    from src.pipelines.pagination import SearchHistory
+    from src.pipelines.state_store import CrawlState
+    from src.pipelines.work_queue import SQLiteWorkQueue
+
+    assert Path(DATA_DIR) == ROOT / "data"
+    for store in (ResponseCache, DedupIndex, SearchHistory, CrawlState, SQLiteWorkQueue):
+        default = inspect.signature(store).parameters["path"].default
+        assert Path(default).parent == ROOT / "data", store
@@ -0,0 +1,66 @@
+from __future__ import annotations
+
+import sys
+from pathlib import Path
+
+# Ensure src is importable
+ROOT = Path(__file__).resolve().parents[1]
+SRC = ROOT / "src"
+sys.path.insert(0, str(ROOT))
+sys.path.insert(0, str(SRC))
+
+from batch import format_report, load_jobs, run_job  # noqa: E402
+
+def test_load_jobs_reads_sample_inputs():
+    jobs = load_jobs(str(ROOT / "data" / "inputs.sample.txt"))
+    assert jobs == [("jobs", "newyork"), ("housing", "sanfrancisco"), ("services", "boston")]
+
+def test_run_job_retries_then_reports():
+    calls = []
+    closed = []
+
+    class FlakyScraper:
+        def __init__(self, category, location):
+            self.stats = {"pages": 0, "listings": 0, "bytes": 0}
+
+        def __enter__(self):
+            return self
+
+        def __exit__(self, *exc):
+            closed.append(self)
+
+        def scrape(self, num_pages):
+            calls.append(num_pages)
+            if len(calls) < 2:
+                raise ConnectionError("reset by peer")
+            self.stats = {"pages": num_pages, "listings": 240, "bytes": 4096}
+
+    report = run_job("jobs", "newyork", num_pages=2, retries=2, backoff=0, scraper_cls=FlakyScraper)
+    assert report["attempts"] == 2
+    assert len(closed) == 2  # every attempt's scraper was closed
+    assert report["error"] is None
+    assert (report["pages"], report["listings"], report["bytes"]) == (2, 240, 4096)
+    assert "jobs" in format_report([report], 1.0)
+
+def test_default_output_path_is_repo_data_dir(monkeypatch, tmp_path):
+    from runner import CraigslistScraper
+
+    monkeypatch.chdir(tmp_path)
+    assert CraigslistScraper("jobs", "newyork").output_path() == str(ROOT / "data" / "jobs_newyork_scrape.json")
+
+def test_scraper_close_releases_its_stores(tmp_path):
+    import sqlite3
+
+    import pytest
+
+    from runner import CraigslistScraper
+
+    paths = {name: str(tmp_path / f"{name}.sqlite3") for name in ("state", "cache", "dedup", "history")}
+    with CraigslistScraper("jobs", "newyork", concurrency=2, state_path=paths["state"], cache_path=paths["cache"],
+                           dedup_path=paths["dedup"], history_path=paths["history"]) as scraper:
+        fetcher = scraper._async_fetcher()
+    for conn in (scraper.state._conn, scraper.cache.cache._conn, scraper.dedup._conn, scraper.history._conn):
+        with pytest.raises(sqlite3.ProgrammingError):
+            conn.execute("SELECT 1")
+    assert fetcher._executor._shutdown
+    scraper.close()  # closing twice is harmless